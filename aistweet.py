@@ -1,10 +1,91 @@
 #!/usr/bin/python3
 
 import argparse
+import asyncio
 import threading
 
+from aistweet.metrics import Metrics
+from aistweet.predictor import CrossingPredictor
+from aistweet.replay import Recorder
 from aistweet.ship_tracker import ShipTracker
-from aistweet.tweeter import Tweeter
+
+
+def feed(value):
+    host, _, port = value.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def camera(value):
+    fields = [float(field) for field in value.split(",")]
+    if len(fields) not in (3, 4):
+        raise argparse.ArgumentTypeError("expected LAT,LON,DIRECTION[,CAMERA_NUM]")
+    return (fields[0], fields[1]), fields[2], int(fields[3]) if len(fields) > 3 else 0
+
+
+def tracker_for(args, metrics, threaded=True):
+    return ShipTracker(
+        args.host,
+        args.port,
+        args.latitude,
+        args.longitude,
+        args.db,
+        distance_backend=args.distance,
+        max_range=args.range,
+        feeds=args.feed,
+        metrics=metrics,
+        position_ttl=args.ttl,
+        smoothing=args.smooth,
+        archive_dir=args.archive,
+        threaded=threaded,
+    )
+
+
+def tweeters_for(tweeter_class, tracker, args, metrics):
+    # all cameras share one predictor and one posting queue
+    predictor = CrossingPredictor(tracker)
+    poster = None
+    tweeters = []
+    cameras = [(tracker.coordinates, args.direction, 0)] + args.camera
+    for station, direction, camera_num in cameras:
+        tweeter = tweeter_class(
+            tracker,
+            direction,
+            args.tts,
+            args.light,
+            spool_dir=args.spool,
+            capture_dir=args.captures,
+            fake_camera=args.fake_camera,
+            burst=args.burst,
+            timezone=args.timezone,
+            station=station,
+            camera_num=camera_num,
+            predictor=predictor,
+            poster=poster,
+            metrics=metrics,
+            validate=args.validate,
+        )
+        poster = tweeter.poster
+        tweeters.append(tweeter)
+    return tweeters
+
+
+async def run_async(args, metrics, recorder):
+    from aistweet.runtime import AsyncRuntime
+
+    runtime = AsyncRuntime(tracker_for(args, metrics, threaded=False))
+    tweeters = []
+    try:
+        runtime.tracker.pipeline.recorder = recorder
+        runtime.start()
+
+        from aistweet.tweeter import AsyncTweeter
+
+        tweeters = tweeters_for(AsyncTweeter, runtime.tracker, args, metrics)
+        await asyncio.Event().wait()
+    finally:
+        for tweeter in tweeters:
+            await tweeter.stop()
+        runtime.stop()
 
 
 if __name__ == "__main__":
@@ -27,7 +108,46 @@ if __name__ == "__main__":
     parser.add_argument(
         "--port", type=int, default=10110, help=("port for receiving UDP AIS messages")
     )
+    parser.add_argument(
+        "--feed",
+        type=feed,
+        action="append",
+        default=[],
+        help=("additional [HOST:]PORT for receiving UDP AIS messages"),
+    )
     parser.add_argument("--db", type=str, help=("database file for static ship data"))
+    parser.add_argument(
+        "--ttl",
+        type=float,
+        help=("seconds before a vessel position that is not updated is forgotten"),
+    )
+    parser.add_argument(
+        "--archive", type=str, help=("directory to archive vessel tracks in")
+    )
+    parser.add_argument(
+        "--record", type=str, help=("file to record received AIS messages to")
+    )
+    parser.add_argument(
+        "--distance",
+        choices=["geodesic", "haversine", "tangent"],
+        default="geodesic",
+        help=("distance calculation for crossing prediction"),
+    )
+    parser.add_argument(
+        "--smooth",
+        action="store_true",
+        help=("predict crossings from filtered vessel tracks"),
+    )
+    parser.add_argument(
+        "--range",
+        type=float,
+        help=("maximum range in meters of vessels considered for snapshots"),
+    )
+    parser.add_argument(
+        "--timezone",
+        type=str,
+        help=("time zone of the station (looked up from its position by default)"),
+    )
     parser.add_argument(
         "--tts", action="store_true", help=("announce ship name via text-to-speech")
     )
@@ -36,21 +156,79 @@ if __name__ == "__main__":
         action="store_true",
         help=("disable night snapshots via light sensor"),
     )
+    parser.add_argument(
+        "--spool", type=str, help=("directory for posts waiting to be uploaded")
+    )
+    parser.add_argument(
+        "--captures", type=str, help=("directory to also save captured images to")
+    )
+    parser.add_argument(
+        "--fake-camera",
+        action="store_true",
+        help=("use a synthetic camera instead of the Pi camera"),
+    )
+    parser.add_argument(
+        "--camera",
+        type=camera,
+        action="append",
+        default=[],
+        help=("additional camera as LAT,LON,DIRECTION[,CAMERA_NUM]"),
+    )
+    parser.add_argument(
+        "--metrics",
+        type=int,
+        help=("local port to serve Prometheus metrics on"),
+    )
+    parser.add_argument(
+        "--asyncio",
+        action="store_true",
+        help=("run on a single asyncio event loop instead of threads"),
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=1,
+        help=("number of frames to capture around each crossing"),
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help=("skip posting frames that are dark, blurred or show no change"),
+    )
     args = parser.parse_args()
 
+    tweeters = []
+    tracker = None
+    recorder = None
+    metrics = None
     try:
-        tracker = ShipTracker(
-            args.host, args.port, args.latitude, args.longitude, args.db
-        )
-        tweeter = Tweeter(
-            tracker,
-            args.direction,
-            args.tts,
-            args.light,
-        )
-        forever = threading.Event()
-        forever.wait()
+        if args.metrics:
+            metrics = Metrics()
+            metrics.serve(args.metrics)
+        if args.record:
+            recorder = Recorder(args.record)
+        if args.asyncio:
+            asyncio.run(run_async(args, metrics, recorder))
+        else:
+            tracker = tracker_for(args, metrics)
+            tracker.pipeline.recorder = recorder
+
+            # the tracker is already listening, so messages that arrive while
+            # the cameras and the poster are set up are not lost
+            from aistweet.tweeter import Tweeter
+
+            tweeters = tweeters_for(Tweeter, tracker, args, metrics)
+            forever = threading.Event()
+            forever.wait()
     except KeyboardInterrupt:
         pass
     finally:
-        tweeter.stop()
+        for tweeter in tweeters:
+            tweeter.stop()
+        if tracker is not None:
+            # flushes the static store and track archive
+            tracker.stop()
+        if recorder is not None:
+            recorder.close()
+        if metrics is not None:
+            metrics.stop()
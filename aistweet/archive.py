@@ -0,0 +1,363 @@
+import os
+import threading
+
+import numpy as np
+
+# one position report: time, MMSI, latitude and longitude in 1/600000
+# degrees as AIS sends them, speed and course in tenths, heading, status and
+# message type, with the AIS "not available" values where a field is missing
+RECORD_DTYPE = np.dtype(
+    [
+        ("t", "<f8"),
+        ("mmsi", "<u4"),
+        ("lat", "<i4"),
+        ("lon", "<i4"),
+        ("speed", "<u2"),
+        ("course", "<u2"),
+        ("heading", "<u2"),
+        ("status", "u1"),
+        ("msg_type", "u1"),
+    ]
+)
+
+# per-vessel entries of a segment index: where the vessel's records start in
+# the segment's order file, how many there are, and the times they span
+INDEX_DTYPE = np.dtype(
+    [
+        ("mmsi", "<u4"),
+        ("first", "<u4"),
+        ("count", "<u4"),
+        ("start", "<f8"),
+        ("end", "<f8"),
+    ]
+)
+
+# reports as queries return them, with NaN where a value is not available
+TRACK_DTYPE = np.dtype(
+    [
+        ("t", "<f8"),
+        ("mmsi", "<u4"),
+        ("lat", "<f8"),
+        ("lon", "<f8"),
+        ("speed", "<f4"),
+        ("course", "<f4"),
+        ("heading", "<u2"),
+        ("status", "u1"),
+        ("msg_type", "u1"),
+    ]
+)
+
+# the scale of each record field, or None to store it as it is
+SCALES = (
+    ("t", None),
+    ("mmsi", None),
+    ("lat", 600000.0),
+    ("lon", 600000.0),
+    ("speed", 10.0),
+    ("course", 10.0),
+    ("heading", None),
+    ("status", None),
+    ("msg_type", None),
+)
+
+# the values AIS sends when a field is not available
+UNAVAILABLE = {
+    "lat": 91.0,
+    "lon": 181.0,
+    "speed": 102.3,
+    "course": 360.0,
+    "heading": 511,
+    "status": 15,
+}
+
+
+def encode(reports):
+    """Convert queued (mmsi, data, t) reports to records."""
+    values = np.array(
+        [
+            (
+                t,
+                mmsi,
+                data.get("lat", 91.0),
+                data.get("lon", 181.0),
+                data.get("speed", 102.3),
+                data.get("course", 360.0),
+                data.get("heading", 511),
+                data.get("status", 15),
+                data["msg_type"],
+            )
+            for mmsi, data, t in reports
+        ],
+        np.float64,
+    ).reshape(-1, 9)
+    records = np.empty(len(values), RECORD_DTYPE)
+    for i, (key, scale) in enumerate(SCALES):
+        records[key] = np.rint(values[:, i] * scale) if scale else values[:, i]
+    return records
+
+
+def decode(records):
+    """Convert raw records to reports in degrees, knots and seconds."""
+    reports = np.empty(len(records), TRACK_DTYPE)
+    for key in ("t", "mmsi", "heading", "status", "msg_type"):
+        reports[key] = records[key]
+    for key, scale in (("lat", 600000.0), ("lon", 600000.0)):
+        reports[key] = records[key] / scale
+        reports[key][records[key] == int(UNAVAILABLE[key] * scale)] = np.nan
+    for key in ("speed", "course"):
+        reports[key] = records[key] / 10.0
+        reports[key][records[key] == int(UNAVAILABLE[key] * 10.0)] = np.nan
+    return reports
+
+
+def save(path, array):
+    """Write an array so that readers never see it half written."""
+    with open(f"{path}.tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(f"{path}.tmp", path)
+
+
+class Segment(object):
+    """One file of records, and once it is closed, its index."""
+
+    def __init__(self, directory, start):
+        self.start = start
+        self.path = os.path.join(directory, f"{start:010d}.track")
+        self.index_path = os.path.join(directory, f"{start:010d}.index.npy")
+        self.order_path = os.path.join(directory, f"{start:010d}.order.npy")
+        self.index = None
+        self.order = None
+
+    @property
+    def closed(self):
+        return os.path.exists(self.index_path)
+
+    def records(self):
+        """Map the segment's records, leaving out a torn last record."""
+        try:
+            count = os.path.getsize(self.path) // RECORD_DTYPE.itemsize
+        except FileNotFoundError:
+            count = 0
+        if not count:
+            return np.empty(0, RECORD_DTYPE)
+        return np.memmap(self.path, RECORD_DTYPE, "r", shape=(count,))
+
+    def build_index(self):
+        records = self.records()
+        order = np.lexsort((records["t"], records["mmsi"])).astype("<u4")
+        mmsis = records["mmsi"][order]
+        times = records["t"][order]
+        first = np.flatnonzero(np.r_[True, mmsis[1:] != mmsis[:-1]][: len(order)])
+        index = np.empty(len(first), INDEX_DTYPE)
+        index["mmsi"] = mmsis[first]
+        index["first"] = first
+        index["count"] = np.diff(np.r_[first, len(order)])
+        index["start"] = times[first]
+        index["end"] = times[np.r_[first[1:], len(order)] - 1]
+        save(self.order_path, order)
+        # the index is written last, as it marks the segment closed
+        save(self.index_path, index)
+
+    def remove_index(self):
+        for path in (self.index_path, self.order_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.index = self.order = None
+
+    def load_index(self):
+        if self.index is None:
+            self.index = np.load(self.index_path)
+            self.order = np.load(self.order_path, mmap_mode="r")
+        return self.index, self.order
+
+    def span(self):
+        """Return the first and last report times of a closed segment."""
+        index, _ = self.load_index()
+        if not len(index):
+            return None
+        return index["start"].min(), index["end"].max()
+
+    def track(self, mmsi):
+        if not self.closed:
+            records = self.records()
+            return records[records["mmsi"] == mmsi]
+        index, order = self.load_index()
+        i = np.searchsorted(index["mmsi"], mmsi)
+        if i == len(index) or index["mmsi"][i] != mmsi:
+            return np.empty(0, RECORD_DTYPE)
+        first, count = int(index["first"][i]), int(index["count"][i])
+        return self.records()[order[first : first + count]]
+
+
+class TrackArchive(object):
+    """Append-only archive of position reports in time-rotated segments.
+
+    Reports are queued by append() and written out by a background thread,
+    so archiving costs ingest no more than a list append. Each segment holds
+    SEGMENT_DURATION seconds of fixed-width records, and is indexed by MMSI
+    when the next one is started. Queries map only the segments they need.
+    """
+
+    SEGMENT_DURATION = 3600.0
+    FLUSH_INTERVAL = 1.0
+    FLUSH_THRESHOLD = 4096
+
+    def __init__(
+        self,
+        directory,
+        segment_duration=None,
+        flush_interval=None,
+        flush_threshold=None,
+    ):
+        self.directory = directory
+        self.segment_duration = segment_duration or self.SEGMENT_DURATION
+        self.flush_interval = flush_interval or self.FLUSH_INTERVAL
+        self.flush_threshold = flush_threshold or self.FLUSH_THRESHOLD
+        os.makedirs(self.directory, exist_ok=True)
+
+        # segments left unindexed by a crash are indexed now
+        self.segments = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".track"):
+                segment = Segment(self.directory, int(name.split(".")[0]))
+                if not segment.closed:
+                    segment.build_index()
+                self.segments.append(segment)
+        self.current = None
+        self.file = None
+
+        self.pending = []
+        self.appended = 0
+        self.records_written = 0
+        self.flushes = 0
+        self.rotations = 0
+
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = True
+        self.flusher = threading.Thread(target=self.run, args=())
+        self.flusher.daemon = True
+        self.flusher.start()
+
+    def append(self, mmsi, data, t):
+        """Queue a decoded position report to be archived."""
+        with self.lock:
+            self.pending.append((mmsi, data, t))
+            self.appended += 1
+            if len(self.pending) >= self.flush_threshold:
+                self.wakeup.set()
+
+    def rotate(self, start):
+        if self.file is not None:
+            self.file.close()
+            self.current.build_index()
+            self.rotations += 1
+        for segment in self.segments:
+            if segment.start == start:
+                # reopened after a restart within the same period
+                segment.remove_index()
+                break
+        else:
+            segment = Segment(self.directory, start)
+            self.segments.append(segment)
+        self.current = segment
+        self.file = open(segment.path, "ab")
+        # a record torn by a crash would misalign every one appended after it
+        torn = self.file.tell() % RECORD_DTYPE.itemsize
+        if torn:
+            self.file.truncate(self.file.tell() - torn)
+
+    def write(self, pending):
+        records = encode(pending)
+        duration = self.segment_duration
+        starts = records["t"] // duration * duration
+        i = 0
+        while i < len(records):
+            if self.current is None or starts[i] > self.current.start:
+                self.rotate(int(starts[i]))
+            # late reports go to the current segment rather than reopen one
+            later = np.flatnonzero(starts[i:] > self.current.start)
+            end = i + later[0] if len(later) else len(records)
+            self.file.write(records[i:end].tobytes())
+            i = end
+        self.file.flush()
+
+    def flush(self):
+        # the files are only ever written by the thread holding this lock
+        with self.write_lock:
+            with self.lock:
+                pending, self.pending = self.pending, []
+            if not pending:
+                return 0
+            self.write(pending)
+            self.flushes += 1
+            self.records_written += len(pending)
+        return len(pending)
+
+    def run(self):
+        while self.running:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def close(self):
+        self.running = False
+        self.wakeup.set()
+        self.flusher.join()
+        self.flush()
+        with self.write_lock:
+            if self.file is not None:
+                self.file.close()
+                self.current.build_index()
+                self.file = None
+                self.current = None
+
+    def overlapping(self, start, end):
+        with self.write_lock:
+            segments = list(self.segments)
+        for segment in segments:
+            if segment.closed:
+                span = segment.span()
+                if span is None or span[1] < start or span[0] > end:
+                    continue
+            elif segment.start > end:
+                continue
+            yield segment
+
+    def track(self, mmsi, start=None, end=None):
+        """Return a vessel's archived reports, in time order."""
+        self.flush()
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        parts = []
+        for segment in self.overlapping(start, end):
+            records = segment.track(mmsi)
+            parts.append(records[(records["t"] >= start) & (records["t"] <= end)])
+        return self.collect(parts)
+
+    def window(self, start, end):
+        """Return every archived report from `start` to `end`, in time order."""
+        self.flush()
+        parts = []
+        for segment in self.overlapping(start, end):
+            records = segment.records()
+            parts.append(records[(records["t"] >= start) & (records["t"] <= end)])
+        return self.collect(parts)
+
+    @staticmethod
+    def collect(parts):
+        records = np.concatenate(parts) if parts else np.empty(0, RECORD_DTYPE)
+        return decode(records[np.argsort(records["t"], kind="stable")])
+
+    def stats(self):
+        return {
+            "segments": len(self.segments),
+            "pending": len(self.pending),
+            "appended": self.appended,
+            "records_written": self.records_written,
+            "flushes": self.flushes,
+            "rotations": self.rotations,
+        }
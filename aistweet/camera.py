@@ -0,0 +1,203 @@
+import abc
+import io
+import threading
+import time
+
+try:
+    from picamera import PiCamera
+except ModuleNotFoundError:
+    PiCamera = None
+
+
+class Camera(abc.ABC):
+    """Common interface of camera backends.
+
+    Frames are captured as JPEG into a caller-supplied stream, so they can go
+    from the sensor to the compressor without touching the filesystem.
+    """
+
+    @abc.abstractmethod
+    def configure(self, zoom, resolution, framerate, exposure_mode):
+        pass
+
+    def start_preview(self):
+        pass
+
+    def stop_preview(self):
+        pass
+
+    @abc.abstractmethod
+    def capture(self, stream):
+        pass
+
+    def close(self):
+        pass
+
+
+class PiCameraBackend(Camera):
+    def __init__(self, camera_num=0):
+        self.camera = PiCamera(camera_num=camera_num)
+
+    def configure(self, zoom, resolution, framerate, exposure_mode):
+        self.camera.zoom = zoom
+        self.camera.resolution = resolution
+        self.camera.framerate = framerate
+        self.camera.exposure_mode = exposure_mode
+
+    def start_preview(self):
+        self.camera.start_preview()
+
+    def stop_preview(self):
+        self.camera.stop_preview()
+
+    def capture(self, stream):
+        self.camera.capture(stream, format="jpeg")
+
+    def close(self):
+        self.camera.close()
+
+
+class FakeCamera(Camera):
+    """Camera stand-in that renders a synthetic scene, for use without a Pi.
+
+    A ship sails across the scene every CROSSING_PERIOD seconds, so frames
+    taken at different times differ as they would on the water.
+    """
+
+    CROSSING_PERIOD = 20.0
+
+    def __init__(self):
+        self.zoom = (0.0, 0.0, 1.0, 1.0)
+        self.resolution = (1640, 1232)
+        self.framerate = None
+        self.exposure_mode = "auto"
+        self.previewing = False
+        self.captures = 0
+
+    def configure(self, zoom, resolution, framerate, exposure_mode):
+        self.zoom = zoom
+        self.resolution = resolution
+        self.framerate = framerate
+        self.exposure_mode = exposure_mode
+
+    def start_preview(self):
+        self.previewing = True
+
+    def stop_preview(self):
+        self.previewing = False
+
+    def capture(self, stream):
+        from PIL import Image, ImageDraw
+
+        width, height = self.resolution
+        sky = (20, 20, 40) if self.exposure_mode == "night" else (120, 170, 220)
+        image = Image.new("RGB", self.resolution, sky)
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((0, height // 2, width, height), fill=(30, 70, 100))
+        # a ship a third of the frame long, crossing it
+        phase = time.time() % self.CROSSING_PERIOD / self.CROSSING_PERIOD
+        bow = int((4.0 * phase - 1.0) * width / 3.0)
+        hull = (bow - width // 3, height // 2 - height // 12, bow, height // 2)
+        draw.rectangle(hull, fill=(160, 40, 30))
+        image.save(stream, format="JPEG", quality=90)
+        self.captures += 1
+
+
+def open_camera(fake=False, camera_num=0):
+    """Open a Pi camera if there is one, or a fake camera if asked for."""
+    if fake:
+        return FakeCamera()
+    if PiCamera is None:
+        return None
+    return PiCameraBackend(camera_num)
+
+
+def sharpness(frame):
+    """Score a captured frame by the variance of its edges."""
+    from PIL import Image, ImageFilter, ImageStat
+
+    frame.seek(0)
+    with Image.open(frame) as image:
+        image.draft("L", (image.size[0] // 8, image.size[1] // 8))
+        edges = image.convert("L").filter(ImageFilter.FIND_EDGES)
+        score = ImageStat.Stat(edges).var[0]
+    frame.seek(0)
+    return score
+
+
+class CameraManager(object):
+    """Keeps a camera previewing, and so warm, in the mode needed next.
+
+    A mode is a (zoom, resolution, framerate, exposure_mode) tuple. Capturing
+    in the mode the camera was prepared for does not wait at all; switching
+    modes waits out the warmup period first.
+    """
+
+    WARMUP = 1.0
+
+    def __init__(self, camera, warmup=None):
+        self.camera = camera
+        self.warmup = warmup or self.WARMUP
+        self.mode = None
+        self.ready_at = 0.0
+        self.switches = 0
+        self.warm_captures = 0
+        self.cold_captures = 0
+        self.lock = threading.RLock()
+
+    def prepare(self, mode, blocking=True):
+        """Switch to a mode ahead of time; without blocking, skip if busy."""
+        if not self.lock.acquire(blocking):
+            return False
+        try:
+            if mode != self.mode:
+                self.camera.configure(*mode)
+                if self.mode is None:
+                    self.camera.start_preview()
+                self.mode = mode
+                self.ready_at = time.time() + self.warmup
+                self.switches += 1
+            return True
+        finally:
+            self.lock.release()
+
+    def capture(self, mode):
+        with self.lock:
+            self.prepare(mode)
+            wait = self.ready_at - time.time()
+            if wait > 0.0:
+                self.cold_captures += 1
+                time.sleep(wait)
+            else:
+                self.warm_captures += 1
+            frame = io.BytesIO()
+            self.camera.capture(frame)
+            frame.seek(0)
+            return frame
+
+    def burst(self, mode, count, interval, score=sharpness):
+        """Capture `count` frames `interval` seconds apart and keep the best."""
+        with self.lock:
+            best, best_score = None, None
+            for i in range(count):
+                if i > 0:
+                    time.sleep(interval)
+                frame = self.capture(mode)
+                frame_score = score(frame) if count > 1 else 0.0
+                if best is None or frame_score > best_score:
+                    best, best_score = frame, frame_score
+            return best
+
+    def close(self):
+        with self.lock:
+            if self.mode is not None:
+                self.camera.stop_preview()
+                self.mode = None
+            self.camera.close()
+
+    def stats(self):
+        return {
+            "switches": self.switches,
+            "warm_captures": self.warm_captures,
+            "cold_captures": self.cold_captures,
+        }
@@ -1,18 +1,72 @@
-import os
-from PIL import Image
+import io
 
 
-def resize_and_compress(input_path, output_path, max_size, target_resolution):
-    with Image.open(input_path) as image:
+class JpegEncoder(object):
+    """In-memory JPEG encoder that targets a maximum file size.
+
+    Quality is binary searched for the best setting that fits, starting from
+    the quality that worked for the previous image, and every trial encode
+    reuses the same buffer.
+    """
+
+    MIN_QUALITY = 15
+    MAX_QUALITY = 95
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.quality = None
+        self.encodes = 0
+
+    def encode(self, image, quality):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        image.save(self.buffer, format="JPEG", quality=quality)
+        self.encodes += 1
+        return self.buffer.tell()
+
+    def compress(self, image, max_size, target_resolution, best_effort=False):
+        """Return the JPEG bytes of the best quality that fits.
+
+        If nothing fits, return None, or with `best_effort` the encoding at
+        the lowest quality.
+        """
+        from PIL import Image
+
         # resize to target resolution
         if image.size[0] > target_resolution[0] or image.size[1] > target_resolution[1]:
             image = image.resize(target_resolution, Image.LANCZOS)
 
-        # reduce quality until below maximum size
-        quality = 95
-        while quality > 10:
-            image.save(output_path, format="JPEG", quality=quality)
-            if os.path.getsize(output_path) <= max_size:
-                return True
-            quality -= 5
+        low, high = self.MIN_QUALITY, self.MAX_QUALITY
+        best = None
+        # similar frames usually settle on a neighbor of the last quality
+        probes = [] if self.quality is None else [self.quality]
+        while low <= high:
+            quality = probes.pop() if probes else (low + high + 1) // 2
+            if not low <= quality <= high:
+                continue
+            fits = self.encode(image, quality) <= max_size
+            if fits:
+                best = (quality, self.buffer.getvalue())
+                low = quality + 1
+            else:
+                high = quality - 1
+            if quality == self.quality:
+                probes.append(quality + 1 if fits else quality - 1)
+
+        if best is None:
+            # the search always ends on the lowest quality when nothing fits
+            return self.buffer.getvalue() if best_effort else None
+        self.quality = best[0]
+        return best[1]
+
+
+def resize_and_compress(input_path, output_path, max_size, target_resolution):
+    from PIL import Image
+
+    with Image.open(input_path) as image:
+        data = JpegEncoder().compress(image, max_size, target_resolution)
+    if data is None:
         return False
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return True
@@ -0,0 +1,155 @@
+import enum
+
+# six bits of each armored payload character, and the value of each one
+BITS = {}
+ARMOR = [-1] * 256
+for value in range(64):
+    char = value + 48 if value < 40 else value + 56
+    BITS[char] = format(value, "06b")
+    ARMOR[char] = value
+
+SIXBIT_CHARS = "".join(chr(v + 64) if v < 32 else chr(v) for v in range(64))
+
+
+class AISType(enum.IntEnum):
+    """The message types the tracker uses, named as pyais names them."""
+
+    POS_CLASS_A1 = 1
+    POS_CLASS_A2 = 2
+    POS_CLASS_A3 = 3
+    STATIC_AND_VOYAGE = 5
+    POS_CLASS_B = 18
+    STATIC = 24
+
+
+# (name, start bit, width, kind) of the fields of each message type, where
+# kind is "u" (unsigned), "s" (signed), "t" (text) or a divisor
+POSITION_A = (
+    ("status", 38, 4, "u"),
+    ("speed", 50, 10, 10.0),
+    ("lon", 61, 28, "s"),
+    ("lat", 89, 27, "s"),
+    ("course", 116, 12, 10.0),
+    ("heading", 128, 9, "u"),
+)
+LAYOUTS = {
+    1: POSITION_A,
+    2: POSITION_A,
+    3: POSITION_A,
+    5: (
+        ("imo", 40, 30, "u"),
+        ("shipname", 112, 120, "t"),
+        ("shiptype", 232, 8, "u"),
+        ("to_bow", 240, 9, "u"),
+        ("to_stern", 249, 9, "u"),
+        ("to_port", 258, 6, "u"),
+        ("to_starboard", 264, 6, "u"),
+        ("draught", 294, 8, 10.0),
+        ("destination", 302, 120, "t"),
+    ),
+    18: (
+        ("speed", 46, 10, 10.0),
+        ("lon", 57, 28, "s"),
+        ("lat", 85, 27, "s"),
+        ("course", 112, 12, 10.0),
+        ("heading", 124, 9, "u"),
+    ),
+}
+# static data reports come in two parts
+LAYOUTS_24 = (
+    (("shipname", 40, 120, "t"),),
+    (
+        ("shiptype", 40, 8, "u"),
+        ("to_bow", 132, 9, "u"),
+        ("to_stern", 141, 9, "u"),
+        ("to_port", 150, 6, "u"),
+        ("to_starboard", 156, 6, "u"),
+    ),
+)
+
+
+def message_type(payload):
+    """Return the message type of a payload from its first character alone."""
+    return ARMOR[payload[0]] if payload else -1
+
+
+class PayloadDecoder(object):
+    """Decodes only the given fields of the given message types.
+
+    Fields are read straight from the armored payload and named as the
+    tracker names them. Payloads of any other type are recognized by their
+    first character alone and never decoded.
+    """
+
+    def __init__(self, types, fields):
+        self.types = frozenset(int(msg_type) for msg_type in types) & (
+            set(LAYOUTS) | {24}
+        )
+        fields = set(fields)
+
+        def select(layout):
+            selected = tuple(field for field in layout if field[0] in fields)
+            end = max((start + width for _, start, width, _ in selected), default=38)
+            return selected, end
+
+        self.layouts = {
+            msg_type: select(layout)
+            for msg_type, layout in LAYOUTS.items()
+            if msg_type in self.types
+        }
+        self.layouts_24 = tuple(select(layout) for layout in LAYOUTS_24)
+
+    def decode(self, payload, fill=0):
+        """Return a dict of the payload's fields, or None for other types.
+
+        Raise ValueError for a malformed or truncated payload.
+        """
+        msg_type = message_type(payload)
+        if msg_type not in self.types:
+            return None
+        try:
+            bits = "".join([BITS[char] for char in payload])
+        except KeyError:
+            raise ValueError("invalid payload character")
+        if fill:
+            bits = bits[:-fill]
+        if len(bits) < 38:
+            raise ValueError("payload too short")
+        mmsi = int(bits[8:38], 2)
+
+        if msg_type == 24:
+            partno = int(bits[38:40], 2)
+            if partno > 1:
+                raise ValueError(f"invalid part number {partno}")
+            layout, end = self.layouts_24[partno]
+            if partno == 1 and 980000000 <= mmsi <= 989999999:
+                # auxiliary craft carry their mothership's MMSI instead
+                layout = tuple(field for field in layout if field[0] == "shiptype")
+                end = 48
+        else:
+            layout, end = self.layouts[msg_type]
+        if len(bits) < end:
+            raise ValueError("payload too short")
+
+        data = {"msg_type": msg_type, "mmsi": mmsi}
+        for name, start, width, kind in layout:
+            if kind == "t":
+                text = "".join(
+                    [
+                        SIXBIT_CHARS[int(bits[i : i + 6], 2)]
+                        for i in range(start, start + width, 6)
+                    ]
+                )
+                data[name] = text.rstrip("@").strip()
+                continue
+            value = int(bits[start : start + width], 2)
+            if kind == "u":
+                data[name] = value
+            elif kind == "s":
+                if value >> (width - 1):
+                    value -= 1 << width
+                # degrees rounded to six places, as pyais does
+                data[name] = ((10 * value + 3) // 6) / 1e6
+            else:
+                data[name] = value / kind
+        return data
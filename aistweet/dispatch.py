@@ -0,0 +1,242 @@
+import collections
+import datetime
+import queue
+import threading
+import time
+
+from aistweet.metrics import NULL_METRICS
+
+
+class Subscriber(object):
+    """Events waiting to be delivered to one callback.
+
+    A coalescing subscriber keeps only the latest event per MMSI, in the
+    order the MMSIs first came up, which suits callbacks that only care
+    about a vessel's current state. Otherwise every event is kept. Either
+    way no more than `capacity` events wait, and the oldest are dropped.
+    """
+
+    def __init__(self, callback, name, coalesce=True, capacity=65536, lag=None):
+        self.callback = callback
+        self.name = name
+        self.coalesce = coalesce
+        self.capacity = capacity
+        self.lag = lag
+
+        # mmsi -> (t, queued) if coalescing, else (mmsi, t, queued) in order
+        self.pending = collections.OrderedDict() if coalesce else collections.deque()
+        self.lock = threading.Lock()
+        self.scheduled = False
+
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_lag = 0.0
+
+    def put(self, mmsi, t, queued):
+        """Queue an event; return whether the subscriber needs a worker."""
+        with self.lock:
+            if self.coalesce:
+                previous = self.pending.get(mmsi)
+                if previous is not None:
+                    # the vessel keeps its place, and its wait, in the queue
+                    self.pending[mmsi] = (t, previous[1])
+                    self.coalesced += 1
+                else:
+                    if len(self.pending) >= self.capacity:
+                        self.pending.popitem(last=False)
+                        self.dropped += 1
+                    self.pending[mmsi] = (t, queued)
+            else:
+                if len(self.pending) >= self.capacity:
+                    self.pending.popleft()
+                    self.dropped += 1
+                self.pending.append((mmsi, t, queued))
+            if self.scheduled:
+                return False
+            self.scheduled = True
+            return True
+
+    def take(self, max_events):
+        with self.lock:
+            events = []
+            while self.pending and len(events) < max_events:
+                if self.coalesce:
+                    mmsi, (t, queued) = self.pending.popitem(last=False)
+                    events.append((mmsi, t, queued))
+                else:
+                    events.append(self.pending.popleft())
+            return events
+
+    def release(self):
+        """Give the subscriber up after a batch; return whether it has more."""
+        with self.lock:
+            if self.pending:
+                return True
+            self.scheduled = False
+            return False
+
+    def stats(self):
+        with self.lock:
+            oldest = None
+            if self.pending:
+                if self.coalesce:
+                    oldest = min(queued for _, queued in self.pending.values())
+                else:
+                    oldest = self.pending[0][2]
+            return {
+                "pending": len(self.pending),
+                "delivered": self.delivered,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                # how long the oldest waiting event has waited
+                "lag": 0.0 if oldest is None else max(time.time() - oldest, 0.0),
+                "max_lag": self.max_lag,
+            }
+
+
+class Dispatcher(object):
+    """Delivers (mmsi, t) events to subscribers on a pool of worker threads.
+
+    Each subscriber has its own queue and is served by one worker at a time,
+    so its callback is never called concurrently with itself and a slow
+    subscriber only holds up its own events. An exception in a callback is
+    logged and counted and does not stop delivery.
+    """
+
+    WORKERS = 4
+    BATCH_SIZE = 64
+    CAPACITY = 65536
+
+    def __init__(self, workers=None, metrics=None, log=None):
+        self.workers = workers or self.WORKERS
+        self.metrics = metrics or NULL_METRICS
+        self.log = log or self.print_log
+
+        self.subscribers = []
+        self.names = collections.Counter()
+        self.ready = queue.Queue()
+        self.idle = threading.Condition(threading.Lock())
+        self.busy = 0
+
+        self.published = 0
+        self.errors = 0
+
+        self.threads = []
+
+    @staticmethod
+    def print_log(message):
+        print(f"[{datetime.datetime.now()}] {message}")
+
+    def start(self):
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self.run, args=())
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        for _ in self.threads:
+            self.ready.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def subscribe(self, callback, name=None, coalesce=True, capacity=None):
+        """Deliver future events to callback(mmsi, t); return the Subscriber."""
+        if name is None:
+            name = getattr(callback, "__qualname__", "subscriber")
+            self.names[name] += 1
+            if self.names[name] > 1:
+                name = f"{name}.{self.names[name]}"
+        labels = {"subscriber": name}
+        subscriber = Subscriber(
+            callback,
+            name,
+            coalesce,
+            capacity or self.CAPACITY,
+            self.metrics.histogram(
+                "dispatch_lag_seconds",
+                "Time from an event being published to its delivery",
+                labels,
+            ),
+        )
+        self.metrics.register("subscriber", subscriber.stats, labels)
+        # replaced rather than appended to, so publish needs no lock
+        self.subscribers = self.subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers = [s for s in self.subscribers if s is not subscriber]
+
+    def publish(self, updates):
+        """Queue (mmsi, t) events for every subscriber."""
+        queued = time.time()
+        for subscriber in self.subscribers:
+            wake = False
+            for mmsi, t in updates:
+                wake = subscriber.put(mmsi, t, queued) or wake
+            if wake:
+                with self.idle:
+                    self.busy += 1
+                self.ready.put(subscriber)
+        self.published += len(updates)
+
+    def invoke(self, name, callback, *args):
+        """Call a callback, logging and counting rather than raising errors."""
+        try:
+            callback(*args)
+            return True
+        except Exception as e:
+            self.errors += 1
+            self.log(f"{name} failed: {e!r}")
+            return False
+
+    def run(self):
+        while True:
+            subscriber = self.ready.get()
+            if subscriber is None:
+                break
+            self.serve(subscriber)
+
+    def run_ready(self):
+        """Deliver every queued event on the calling thread, for running
+        without workers (as on an event loop)."""
+        while True:
+            try:
+                subscriber = self.ready.get_nowait()
+            except queue.Empty:
+                return
+            self.serve(subscriber)
+
+    def serve(self, subscriber):
+        for mmsi, t, queued in subscriber.take(self.BATCH_SIZE):
+            lag = time.time() - queued
+            subscriber.lag.observe(lag)
+            subscriber.max_lag = max(subscriber.max_lag, lag)
+            if not self.invoke(subscriber.name, subscriber.callback, mmsi, t):
+                subscriber.errors += 1
+            subscriber.delivered += 1
+        # take turns with the other subscribers rather than hog a worker
+        if subscriber.release():
+            self.ready.put(subscriber)
+        else:
+            with self.idle:
+                self.busy -= 1
+                if not self.busy:
+                    self.idle.notify_all()
+
+    def drain(self, timeout=None):
+        """Wait until every published event has been delivered."""
+        with self.idle:
+            return self.idle.wait_for(lambda: not self.busy, timeout)
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "errors": self.errors,
+            "ready": self.ready.qsize(),
+        }
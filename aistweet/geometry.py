@@ -1,10 +1,61 @@
 import math
 from typing import Tuple
 
-from geopy.distance import distance
+import numpy as np
 
 from aistweet.units import kn_to_m_s, m_to_lat, m_to_lon
 
+EARTH_RADIUS = 6371008.8
+WGS84_A = 6378137.0
+WGS84_E2 = (1.0 / 298.257223563) * (2.0 - 1.0 / 298.257223563)
+
+
+def geodesic_distance(lat_1: float, lon_1: float, lat_2: float, lon_2: float) -> float:
+    """Calculate the exact distance in meters on the WGS-84 ellipsoid."""
+    # geopy is slow to import, and unused with the other backends
+    from geopy.distance import distance
+
+    return distance((lat_1, lon_1), (lat_2, lon_2)).m
+
+
+def haversine_distance(lat_1: float, lon_1: float, lat_2: float, lon_2: float) -> float:
+    """Calculate the great-circle distance in meters on a spherical Earth.
+
+    Within 0.6% of the geodesic distance at any range and latitude.
+    """
+    lat_1_r = math.radians(lat_1)
+    lat_2_r = math.radians(lat_2)
+    a = (
+        math.sin((lat_2_r - lat_1_r) / 2.0) ** 2
+        + math.cos(lat_1_r)
+        * math.cos(lat_2_r)
+        * math.sin(math.radians(lon_2 - lon_1) / 2.0) ** 2
+    )
+    return 2.0 * EARTH_RADIUS * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def tangent_plane_distance(
+    lat_1: float, lon_1: float, lat_2: float, lon_2: float
+) -> float:
+    """Calculate the distance in meters on a plane tangent to the ellipsoid.
+
+    Uses the WGS-84 radii of curvature at the mean latitude. Within 0.003% of
+    the geodesic distance up to 50 km at latitudes up to 70 degrees, with the
+    error growing with the square of the range beyond that.
+    """
+    lat_m_r = math.radians((lat_1 + lat_2) / 2.0)
+    w = 1.0 - WGS84_E2 * math.sin(lat_m_r) ** 2
+    dy = WGS84_A * (1.0 - WGS84_E2) / w**1.5 * math.radians(lat_2 - lat_1)
+    dx = WGS84_A / math.sqrt(w) * math.cos(lat_m_r) * math.radians(lon_2 - lon_1)
+    return math.hypot(dx, dy)
+
+
+DISTANCE_BACKENDS = {
+    "geodesic": geodesic_distance,
+    "haversine": haversine_distance,
+    "tangent": tangent_plane_distance,
+}
+
 
 def center_coordinates(
     lat: float,
@@ -38,8 +89,11 @@ def crossing_time_and_depth(
     vessel_speed: float,
     vessel_course: float,
     t: float,
+    distance_backend: str = "geodesic",
 ) -> Tuple[float, float]:
     """Calculate the time and depth at which a vessel will cross the camera axis."""
+    distance_m = DISTANCE_BACKENDS[distance_backend]
+
     # convert to radians
     camera_lat_r = math.radians(camera_lat)
     camera_lon_r = math.radians(camera_lon)
@@ -98,9 +152,149 @@ def crossing_time_and_depth(
         int_lat = math.degrees(int_lat_r)
         int_lon = math.degrees(int_lon_r)
 
-        d = distance((vessel_lat, vessel_lon), (int_lat, int_lon)).m
-        depth = distance((camera_lat, camera_lon), (int_lat, int_lon)).m
-    except ValueError:
+        d = distance_m(vessel_lat, vessel_lon, int_lat, int_lon)
+        depth = distance_m(camera_lat, camera_lon, int_lat, int_lon)
+    except (ValueError, ZeroDivisionError):
+        # no crossing, or a vessel right at the camera
         return None, None
 
     return t + d / kn_to_m_s(vessel_speed), depth
+
+
+def haversine_distance_batch(
+    lat_1: np.ndarray, lon_1: np.ndarray, lat_2: np.ndarray, lon_2: np.ndarray
+) -> np.ndarray:
+    """Calculate great-circle distances in meters between arrays of points."""
+    lat_1_r, lon_1_r, lat_2_r, lon_2_r = (
+        np.radians(a) for a in (lat_1, lon_1, lat_2, lon_2)
+    )
+    a = (
+        np.sin((lat_2_r - lat_1_r) / 2.0) ** 2
+        + np.cos(lat_1_r) * np.cos(lat_2_r) * np.sin((lon_2_r - lon_1_r) / 2.0) ** 2
+    )
+    return 2.0 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def tangent_plane_distance_batch(
+    lat_1: np.ndarray, lon_1: np.ndarray, lat_2: np.ndarray, lon_2: np.ndarray
+) -> np.ndarray:
+    """Calculate tangent plane distances in meters between arrays of points."""
+    lat_m_r = np.radians((lat_1 + lat_2) / 2.0)
+    w = 1.0 - WGS84_E2 * np.sin(lat_m_r) ** 2
+    dy = WGS84_A * (1.0 - WGS84_E2) / w**1.5 * np.radians(lat_2 - lat_1)
+    dx = WGS84_A / np.sqrt(w) * np.cos(lat_m_r) * np.radians(lon_2 - lon_1)
+    return np.hypot(dx, dy)
+
+
+# the exact geodesic has no vectorized form, so it maps to the haversine
+BATCH_DISTANCE_BACKENDS = {
+    "geodesic": haversine_distance_batch,
+    "haversine": haversine_distance_batch,
+    "tangent": tangent_plane_distance_batch,
+}
+
+
+def center_coordinates_batch(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    to_bow: np.ndarray,
+    to_stern: np.ndarray,
+    to_starboard: np.ndarray,
+    to_port: np.ndarray,
+    heading: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate the physical center points of an array of vessels."""
+    l_offset = ((to_bow + to_stern) / 2.0) - to_stern
+    w_offset = ((to_starboard + to_port) / 2.0) - to_port
+
+    theta = np.radians(-np.asarray(heading, dtype=float) % 360)
+    lat_offset = (w_offset * np.sin(theta) + l_offset * np.cos(theta)) / 111111.0
+    lon_offset = (w_offset * np.cos(theta) - l_offset * np.sin(theta)) / (
+        np.cos(np.radians(lat)) * 111111.0
+    )
+
+    return (lat + lat_offset, lon + lon_offset)
+
+
+def crossing_time_and_depth_batch(
+    camera_lat: float,
+    camera_lon: float,
+    camera_heading: float,
+    vessel_lat: np.ndarray,
+    vessel_lon: np.ndarray,
+    vessel_speed: np.ndarray,
+    vessel_course: np.ndarray,
+    t: np.ndarray,
+    distance_backend: str = "geodesic",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate crossing times and depths for an array of vessels at once.
+
+    This follows `crossing_time_and_depth` step by step, but vessels for which
+    the scalar version fails (or which are not moving) come out as NaN rather
+    than raising. The geodesic backend is approximated by the haversine, which
+    keeps the results within 0.6% of the scalar version.
+    """
+    distance_m = BATCH_DISTANCE_BACKENDS[distance_backend]
+
+    camera_lat_r = math.radians(camera_lat)
+    camera_lon_r = math.radians(camera_lon)
+    camera_dir_r = math.radians(camera_heading)
+    vessel_lat_r = np.radians(vessel_lat)
+    vessel_lon_r = np.radians(vessel_lon)
+    vessel_dir_r = np.radians(vessel_course)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        d_12 = 2.0 * np.arcsin(
+            np.sqrt(
+                np.sin((camera_lat_r - vessel_lat_r) / 2.0) ** 2
+                + math.cos(camera_lat_r)
+                * np.cos(vessel_lat_r)
+                * np.sin((camera_lon_r - vessel_lon_r) / 2.0) ** 2
+            )
+        )
+
+        # arguments outside [-1, 1] are exactly the scalar ValueError cases,
+        # and are left to propagate as NaN
+        t_a = np.arccos(
+            (np.sin(vessel_lat_r) - math.sin(camera_lat_r) * np.cos(d_12))
+            / (np.sin(d_12) * math.cos(camera_lat_r))
+        )
+        t_b = np.arccos(
+            (math.sin(camera_lat_r) - np.sin(vessel_lat_r) * np.cos(d_12))
+            / (np.sin(d_12) * np.cos(vessel_lat_r))
+        )
+
+        east = np.sin(vessel_lon_r - camera_lon_r) > 0.0
+        t_12 = np.where(east, t_a, math.tau - t_a)
+        t_21 = np.where(east, math.tau - t_b, t_b)
+
+        a_1 = camera_dir_r - t_12
+        a_2 = t_21 - vessel_dir_r
+        a_3 = np.arccos(
+            -np.cos(a_1) * np.cos(a_2) + np.sin(a_1) * np.sin(a_2) * np.cos(d_12)
+        )
+        d_13 = np.arctan2(
+            np.sin(d_12) * np.sin(a_1) * np.sin(a_2),
+            np.cos(a_2) + np.cos(a_1) * np.cos(a_3),
+        )
+
+        int_lat_r = np.arcsin(
+            math.sin(camera_lat_r) * np.cos(d_13)
+            + math.cos(camera_lat_r) * np.sin(d_13) * math.cos(camera_dir_r)
+        )
+        int_lon_r = camera_lon_r + np.arctan2(
+            math.sin(camera_dir_r) * np.sin(d_13) * math.cos(camera_lat_r),
+            np.cos(d_13) - math.sin(camera_lat_r) * np.sin(int_lat_r),
+        )
+
+        int_lat = np.degrees(int_lat_r)
+        int_lon = np.degrees(int_lon_r)
+
+        d = distance_m(vessel_lat, vessel_lon, int_lat, int_lon)
+        depth = distance_m(camera_lat, camera_lon, int_lat, int_lon)
+
+        speed = np.asarray(vessel_speed, dtype=float)
+        times = np.where(speed > 0.0, t + d / kn_to_m_s(speed), np.nan)
+
+    invalid = np.isnan(times) | np.isnan(depth)
+    return np.where(invalid, np.nan, times), np.where(invalid, np.nan, depth)
@@ -0,0 +1,379 @@
+import asyncio
+import collections
+import socket
+import threading
+import time
+
+from aistweet.decode import PayloadDecoder, message_type
+
+
+class RingBuffer(object):
+    """Bounded FIFO shared between two pipeline stages.
+
+    When the buffer is full the oldest item is overwritten, so a stalled
+    consumer loses stale data rather than blocking its producer.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = collections.deque(maxlen=capacity)
+        self.dropped = 0
+        self.cond = threading.Condition(threading.Lock())
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item):
+        with self.cond:
+            full = len(self.items) == self.capacity
+            if full:
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+            return full
+
+    def get_batch(self, max_items, timeout=None):
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            batch = []
+            while self.items and len(batch) < max_items:
+                batch.append(self.items.popleft())
+            return batch
+
+
+class IngestPipeline(object):
+    """Three-stage AIS ingest: socket receive, batch decode, batch apply.
+
+    Each stage runs in its own daemon thread and the stages are joined by
+    ring buffers, so slow decoding or slow callbacks never hold up draining
+    the UDP socket. Any number of feeds can be received at once; a message
+    heard by more than one receiver within `dedup_window` seconds is only
+    applied once.
+
+    Sentences of message types the tracker ignores are dropped on their
+    first payload character, and only the fields the tracker stores are
+    decoded from the rest.
+    """
+
+    BUF_SIZE = 4096
+    RAW_CAPACITY = 16384
+    DECODED_CAPACITY = 16384
+    BATCH_SIZE = 256
+    POLL_INTERVAL = 0.5
+    DEDUP_WINDOW = 2.0
+    # partial multipart messages kept, and seconds to wait for the rest
+    MAX_FRAGMENTS = 64
+    FRAGMENT_TIMEOUT = 5.0
+
+    def __init__(self, tracker, host=None, port=None, feeds=(), dedup_window=None):
+        self.tracker = tracker
+        self.host = host
+        self.port = port
+
+        # (host, port) of every feed, the first being the primary one
+        self.feeds = list(feeds)
+        if self.host is not None and self.port is not None:
+            self.feeds.insert(0, (self.host, self.port))
+
+        # deduplication only matters once receivers can overlap
+        if dedup_window is None:
+            dedup_window = self.DEDUP_WINDOW if len(self.feeds) > 1 else 0.0
+        self.dedup_window = dedup_window
+        self.recent = {}
+        self.recent_order = collections.deque()
+
+        self.raw = RingBuffer(self.RAW_CAPACITY)
+        self.decoded = RingBuffer(self.DECODED_CAPACITY)
+
+        self.decoder = PayloadDecoder(
+            tracker.RELEVANT_MSGS,
+            list(tracker.STATIC_FIELDS)
+            + list(tracker.VOYAGE_FIELDS)
+            + list(tracker.POSITION_FIELDS),
+        )
+
+        # partially received multipart messages, oldest first
+        self.fragments = collections.OrderedDict()
+
+        self.received = 0
+        self.decode_errors = 0
+        self.decodes = 0
+        self.skipped = 0
+        self.fragments_dropped = 0
+        self.duplicates = 0
+        self.applied = 0
+
+        # datagrams and decoded messages that have not made it through yet
+        self.outstanding = 0
+        self.outstanding_cond = threading.Condition(threading.Lock())
+
+        # optional Recorder of every datagram as it arrives
+        self.recorder = None
+
+        self.running = False
+        self.socks = []
+        self.threads = []
+
+    def start(self):
+        self.running = True
+        stages = [(self.decode_stage, ()), (self.apply_stage, ())]
+        for source, feed in enumerate(self.feeds):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(feed)
+            sock.settimeout(self.POLL_INTERVAL)
+            self.socks.append(sock)
+            stages.append((self.receive_stage, (sock, source)))
+        for stage, args in stages:
+            thread = threading.Thread(target=stage, args=args)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        for sock in self.socks:
+            sock.close()
+        self.socks = []
+
+    def submit(self, datagram, t=None, source=0):
+        """Queue a raw datagram as if it had just arrived from a feed."""
+        t = self.receive(datagram, t, source)
+        self.settle(1)
+        if self.raw.put((datagram, t, source)):
+            self.settle(-1)
+
+    def receive(self, datagram, t=None, source=0):
+        self.received += 1
+        if t is None:
+            t = time.time()
+        if self.recorder is not None:
+            self.recorder.record(datagram, t, source)
+        return t
+
+    def settle(self, delta):
+        with self.outstanding_cond:
+            self.outstanding += delta
+            if self.outstanding <= 0:
+                self.outstanding_cond.notify_all()
+
+    def drain(self, timeout=None):
+        """Wait until every submitted datagram has been applied, and its
+        events delivered to subscribers."""
+        start = time.time()
+        with self.outstanding_cond:
+            if not self.outstanding_cond.wait_for(
+                lambda: self.outstanding <= 0, timeout
+            ):
+                return False
+        if timeout is not None:
+            timeout = max(timeout - (time.time() - start), 0.0)
+        return self.tracker.dispatcher.drain(timeout)
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "raw_depth": len(self.raw),
+            "raw_dropped": self.raw.dropped,
+            "decoded": self.decodes,
+            "decode_errors": self.decode_errors,
+            "skipped": self.skipped,
+            "fragments_dropped": self.fragments_dropped,
+            "duplicates": self.duplicates,
+            "decoded_depth": len(self.decoded),
+            "decoded_dropped": self.decoded.dropped,
+            "applied": self.applied,
+        }
+
+    def receive_stage(self, sock, source):
+        while self.running:
+            try:
+                datagram = sock.recv(self.BUF_SIZE)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.submit(datagram, source=source)
+
+    def decode_stage(self):
+        while self.running:
+            batch = self.raw.get_batch(self.BATCH_SIZE, self.POLL_INTERVAL)
+            for datagram, t, source in batch:
+                # each datagram is replaced by the messages decoded from it
+                delta = -1
+                for line in datagram.splitlines():
+                    data = self.decode_line(line.strip(), t, source)
+                    if data is not None and not self.decoded.put((data, t)):
+                        delta += 1
+                self.settle(delta)
+
+    def decode_line(self, line, t=0.0, source=0):
+        if not line:
+            return None
+        # an NMEA 4 tag block, such as \s:source,c:time*hh\, may come first
+        if line[:1] == b"\\":
+            line = line[1:].partition(b"\\")[2]
+        if len(line) <= 10 or line[:1] not in (b"!", b"$"):
+            self.decode_errors += 1
+            return None
+        # !AIVDM,count,number,sequence,channel,payload,fill*checksum
+        fields = line.split(b",")
+        try:
+            if len(fields) != 7:
+                raise ValueError("wrong number of fields")
+            frag_cnt, frag_num = int(fields[1]), int(fields[2])
+            payload = fields[5]
+            fill = int(fields[6].split(b"*")[0] or 0)
+        except ValueError:
+            self.decode_errors += 1
+            return None
+
+        # the message type is in the first fragment's first character
+        if frag_num == 1 and message_type(payload) not in self.decoder.types:
+            self.skipped += 1
+            if frag_cnt > 1:
+                # later fragments must not be taken for an earlier message's
+                self.fragments.pop((source, fields[3], fields[4], frag_cnt), None)
+            return None
+        if frag_cnt > 1:
+            message = self.assemble(
+                (source, fields[3], fields[4], frag_cnt), frag_num, payload, fill, t
+            )
+            if message is None:
+                return None
+            payload, fill = message
+
+        if self.duplicate(payload, t):
+            return None
+        try:
+            data = self.decoder.decode(payload, fill)
+        except ValueError:
+            self.decode_errors += 1
+            return None
+        self.decodes += 1
+        return data
+
+    def duplicate(self, payload, t):
+        if not self.dedup_window:
+            return False
+        # forget payloads that have left the window
+        while self.recent_order and self.recent_order[0][0] < t - self.dedup_window:
+            seen, old = self.recent_order.popleft()
+            if self.recent.get(old) == seen:
+                del self.recent[old]
+        seen = self.recent.get(payload)
+        if seen is not None and t - seen <= self.dedup_window:
+            self.duplicates += 1
+            return True
+        self.recent[payload] = t
+        self.recent_order.append((t, payload))
+        return False
+
+    def assemble(self, slot, frag_num, payload, fill, t):
+        """Collect the fragments of a multipart message by their slot, a
+        (source, sequence, channel, count) tuple, so fragments from different
+        receivers are never mixed. Return the whole (payload, fill) once the
+        last fragment is in."""
+        # give up on messages whose fragments stopped coming
+        while self.fragments:
+            oldest = next(iter(self.fragments))
+            if (
+                len(self.fragments) < self.MAX_FRAGMENTS
+                and t - self.fragments[oldest][0] <= self.FRAGMENT_TIMEOUT
+            ):
+                break
+            del self.fragments[oldest]
+            self.fragments_dropped += 1
+
+        if frag_num == 1:
+            if self.fragments.pop(slot, None) is not None:
+                self.fragments_dropped += 1
+            self.fragments[slot] = (t, [payload])
+            return None
+        parts = self.fragments.get(slot)
+        if parts is None or frag_num != len(parts[1]) + 1:
+            if self.fragments.pop(slot, None) is not None:
+                self.fragments_dropped += 1
+            return None
+        parts[1].append(payload)
+        if frag_num < slot[3]:
+            return None
+        del self.fragments[slot]
+        return b"".join(parts[1]), fill
+
+    def apply_stage(self):
+        while self.running:
+            batch = self.decoded.get_batch(self.BATCH_SIZE, self.POLL_INTERVAL)
+            if not batch:
+                continue
+            self.apply(batch)
+            self.settle(-len(batch))
+
+    def apply(self, batch):
+        updates = self.tracker.add_messages(batch)
+        self.applied += len(updates)
+        dispatcher = self.tracker.dispatcher
+        for mmsi, t in updates:
+            for callback in self.tracker.message_callbacks:
+                dispatcher.invoke("message callback", callback, mmsi, t)
+        dispatcher.publish(updates)
+
+
+class AsyncIngest(object):
+    """Ingest on an event loop, in place of the pipeline's threads.
+
+    The loop watches each feed's socket and reads everything that has
+    arrived, up to a batch at a time, rather than the one datagram per turn
+    of the loop a datagram transport would. What was read in one turn is
+    applied as a batch, and its events delivered to subscribers, at the
+    start of the next.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.loop = asyncio.get_event_loop()
+        self.socks = []
+        self.batch = []
+        self.scheduled = False
+
+    def start(self):
+        for source, feed in enumerate(self.pipeline.feeds):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.bind(feed)
+            self.loop.add_reader(sock, self.read, sock, source)
+            self.socks.append(sock)
+
+    def stop(self):
+        for sock in self.socks:
+            self.loop.remove_reader(sock)
+            sock.close()
+        self.socks = []
+
+    def read(self, sock, source):
+        for _ in range(self.pipeline.BATCH_SIZE):
+            try:
+                datagram = sock.recv(self.pipeline.BUF_SIZE)
+            except (BlockingIOError, InterruptedError):
+                break
+            self.submit(datagram, source=source)
+
+    def submit(self, datagram, t=None, source=0):
+        pipeline = self.pipeline
+        t = pipeline.receive(datagram, t, source)
+        for line in datagram.splitlines():
+            data = pipeline.decode_line(line.strip(), t, source)
+            if data is not None:
+                self.batch.append((data, t))
+        if self.batch and not self.scheduled:
+            self.scheduled = True
+            self.loop.call_soon(self.apply)
+
+    def apply(self):
+        batch, self.batch = self.batch, []
+        self.scheduled = False
+        self.pipeline.apply(batch)
+        self.pipeline.tracker.dispatcher.run_ready()
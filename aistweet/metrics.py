@@ -0,0 +1,209 @@
+import bisect
+import http.server
+import threading
+import time
+
+
+class Histogram(object):
+    """Cumulative histogram of observed values, such as durations in seconds."""
+
+    BUCKETS = (
+        0.00001,
+        0.00005,
+        0.0001,
+        0.0005,
+        0.001,
+        0.005,
+        0.01,
+        0.05,
+        0.1,
+        0.5,
+        1.0,
+        5.0,
+        10.0,
+    )
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.sum
+
+
+class NullHistogram(object):
+    def observe(self, value):
+        pass
+
+
+class InstrumentedLock(object):
+    """Reentrant lock that records how long it is waited for and held."""
+
+    def __init__(self, lock, wait, hold):
+        self.lock = lock
+        self.wait = wait
+        self.hold = hold
+        self.depth = 0
+        self.acquired = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = time.perf_counter()
+        if not self.lock.acquire(blocking, timeout):
+            return False
+        self.depth += 1
+        if self.depth == 1:
+            self.acquired = time.perf_counter()
+            self.wait.observe(self.acquired - start)
+        return True
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            self.hold.observe(time.perf_counter() - self.acquired)
+        self.lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class Metrics(object):
+    """Registry of metrics, rendered in the Prometheus text format.
+
+    Components register their existing stats() methods, whose numeric values
+    are read at scrape time, and histograms for the hot paths they time.
+    A disabled registry hands out no-op histograms and leaves locks alone,
+    so instrumentation costs next to nothing when metrics are off.
+    """
+
+    PREFIX = "aistweet"
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.collectors = {}
+        self.histograms = {}
+        self.help = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    def register(self, name, stats, labels=None):
+        """Expose the numeric values of a stats() callable as name_key."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.collectors[(name, self.label_key(labels))] = stats
+
+    def histogram(self, name, help, labels=None, buckets=None):
+        if not self.enabled:
+            return NULL_HISTOGRAM
+        key = (name, self.label_key(labels))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(buckets)
+                self.help[name] = help
+            return self.histograms[key]
+
+    def instrument_lock(self, name, lock, labels=None):
+        """Wrap a reentrant lock to time waits for it and holds of it."""
+        if not self.enabled:
+            return lock
+        labels = {**(labels or {}), "lock": name}
+        return InstrumentedLock(
+            lock,
+            self.histogram(
+                "lock_wait_seconds", "Time spent waiting for a lock", labels
+            ),
+            self.histogram("lock_hold_seconds", "Time a lock is held for", labels),
+        )
+
+    @staticmethod
+    def label_key(labels):
+        return tuple(sorted((labels or {}).items()))
+
+    @staticmethod
+    def format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+    def render(self):
+        with self.lock:
+            collectors = list(self.collectors.items())
+            histograms = sorted(self.histograms.items())
+
+        samples = {}
+        for (name, labels), stats in collectors:
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = f"{self.PREFIX}_{name}_{key}"
+                samples.setdefault(metric, []).append(
+                    f"{metric}{self.format_labels(labels)} {value}"
+                )
+        lines = []
+        for metric in sorted(samples):
+            lines.append(f"# TYPE {metric} untyped")
+            lines.extend(samples[metric])
+
+        current = None
+        for (name, labels), histogram in histograms:
+            metric = f"{self.PREFIX}_{name}"
+            if name != current:
+                lines.append(f"# HELP {metric} {self.help[name]}")
+                lines.append(f"# TYPE {metric} histogram")
+                current = name
+            counts, total = histogram.snapshot()
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = self.format_labels(labels, [("le", bound)])
+                lines.append(f"{metric}_bucket{le} {cumulative}")
+            lines.append(f"{metric}_sum{self.format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{self.format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve the metrics over HTTP from a background thread."""
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                data = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+NULL_HISTOGRAM = NullHistogram()
+NULL_METRICS = Metrics(enabled=False)
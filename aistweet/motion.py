@@ -0,0 +1,221 @@
+import array
+import math
+
+from aistweet.units import kn_to_m_s
+
+M_PER_DEG = 111111.0
+
+
+class TrackEstimate(object):
+    """Immutable filtered state of a vessel at time `t`."""
+
+    __slots__ = ("t", "lat", "lon", "speed", "course", "cov")
+
+    def __init__(self, t, lat, lon, speed, course, cov):
+        self.t = t
+        self.lat = lat
+        self.lon = lon
+        self.speed = speed
+        self.course = course
+        # (var x, var y, cov x/vx, cov y/vy, var vx, var vy) in meters and m/s
+        self.cov = cov
+
+    def crossing_uncertainty(self, direction, crossing):
+        """Return the standard deviation in seconds of a crossing time."""
+        var_x, var_y, cov_xv, cov_yv, var_vx, var_vy = self.cov
+        direction_r = math.radians(direction)
+        # offset from the camera axis, and its rate of change
+        n_x, n_y = math.cos(direction_r), -math.sin(direction_r)
+        rate = kn_to_m_s(self.speed) * math.sin(math.radians(self.course) - direction_r)
+        if rate == 0.0:
+            return None
+        dt = crossing - self.t
+        var_offset = n_x * n_x * (var_x + 2.0 * dt * cov_xv + dt * dt * var_vx) + (
+            n_y * n_y * (var_y + 2.0 * dt * cov_yv + dt * dt * var_vy)
+        )
+        return math.sqrt(max(var_offset, 0.0)) / abs(rate)
+
+
+class AxisFilter(object):
+    """Constant-velocity Kalman filter along one axis of a local plane."""
+
+    __slots__ = ("p", "v", "p00", "p01", "p11")
+
+    def __init__(self, p, v, var_p, var_v):
+        self.p = p
+        self.v = v
+        self.p00 = var_p
+        self.p01 = 0.0
+        self.p11 = var_v
+
+    def predict(self, dt, q):
+        self.p += self.v * dt
+        self.p00 += 2.0 * dt * self.p01 + dt * dt * self.p11 + q * dt**4 / 4.0
+        self.p01 += dt * self.p11 + q * dt**3 / 2.0
+        self.p11 += q * dt * dt
+
+    def update(self, z_p, z_v, var_p, var_v):
+        if z_v is None:
+            # position only
+            s = self.p00 + var_p
+            k0, k1 = self.p00 / s, self.p01 / s
+            e = z_p - self.p
+            self.p += k0 * e
+            self.v += k1 * e
+            p00, p01, p11 = self.p00, self.p01, self.p11
+            self.p00 = (1.0 - k0) * p00
+            self.p01 = (1.0 - k0) * p01
+            self.p11 = p11 - k1 * p01
+            return
+
+        # K = P (P + R)^-1, with H = I
+        a, b, d = self.p00 + var_p, self.p01, self.p11 + var_v
+        det = a * d - b * b
+        i00, i01, i11 = d / det, -b / det, a / det
+        k00 = self.p00 * i00 + self.p01 * i01
+        k01 = self.p00 * i01 + self.p01 * i11
+        k10 = self.p01 * i00 + self.p11 * i01
+        k11 = self.p01 * i01 + self.p11 * i11
+        e_p, e_v = z_p - self.p, z_v - self.v
+        self.p += k00 * e_p + k01 * e_v
+        self.v += k10 * e_p + k11 * e_v
+        p00, p01, p11 = self.p00, self.p01, self.p11
+        self.p00 = (1.0 - k00) * p00 - k01 * p01
+        self.p01 = (1.0 - k00) * p01 - k01 * p11
+        self.p11 = -k10 * p01 + (1.0 - k11) * p11
+
+
+class TrackFilter(object):
+    """Smoothed position and velocity of one vessel.
+
+    Reports are projected onto a plane around the vessel's first position
+    and fed to a constant-velocity Kalman filter per axis. The last few
+    positions are kept in a fixed-size ring buffer, which stands in for the
+    velocity when a report comes without speed or course.
+    """
+
+    HISTORY = 8
+    # report noise (m, kn, degrees) of Class A and Class B transponders
+    NOISE = {False: (10.0, 0.1, 1.0), True: (25.0, 0.3, 5.0)}
+    # random acceleration in m/s^2
+    ACCELERATION = 0.05
+    # gap in seconds, or disagreement in meters, that restarts the track
+    MAX_GAP = 180.0
+    MAX_INNOVATION = 500.0
+
+    def __init__(self, t, lat, lon, speed, course, class_b=False):
+        self.lat0 = lat
+        self.lon0 = lon
+        self.m_per_lon = M_PER_DEG * math.cos(math.radians(lat))
+
+        self.times = array.array("d", [math.nan] * self.HISTORY)
+        self.xs = array.array("d", [0.0] * self.HISTORY)
+        self.ys = array.array("d", [0.0] * self.HISTORY)
+        self.next = 0
+        self.resets = 0
+
+        self.reset(t, lat, lon, speed, course, class_b)
+
+    def project(self, lat, lon):
+        return (lon - self.lon0) * self.m_per_lon, (lat - self.lat0) * M_PER_DEG
+
+    def noise(self, speed, class_b):
+        sigma_p, sigma_sog, sigma_cog = self.NOISE[class_b]
+        v = kn_to_m_s(speed or 0.0)
+        var_v = kn_to_m_s(sigma_sog) ** 2 + (v * math.radians(sigma_cog)) ** 2
+        return sigma_p**2, var_v
+
+    def velocity(self, speed, course):
+        if speed is not None and course is not None:
+            v = kn_to_m_s(speed)
+            return v * math.sin(math.radians(course)), v * math.cos(
+                math.radians(course)
+            )
+        # fall back on the track history
+        oldest = self.next if self.times[self.next] == self.times[self.next] else 0
+        newest = (self.next - 1) % self.HISTORY
+        dt = self.times[newest] - self.times[oldest]
+        if not dt > 0.0:
+            return None, None
+        return (
+            (self.xs[newest] - self.xs[oldest]) / dt,
+            (self.ys[newest] - self.ys[oldest]) / dt,
+        )
+
+    def remember(self, t, x, y):
+        self.times[self.next] = t
+        self.xs[self.next] = x
+        self.ys[self.next] = y
+        self.next = (self.next + 1) % self.HISTORY
+
+    def reset(self, t, lat, lon, speed, course, class_b=False):
+        x, y = self.project(lat, lon)
+        for i in range(self.HISTORY):
+            self.times[i] = math.nan
+        # the history starts over from the first slot, which velocity() reads
+        # as the oldest until the ring is full
+        self.next = 0
+        self.remember(t, x, y)
+        vx, vy = self.velocity(speed, course)
+        var_p, var_v = self.noise(speed, class_b)
+        if vx is None:
+            vx, vy, var_v = 0.0, 0.0, 100.0
+        self.fx = AxisFilter(x, vx, var_p, var_v)
+        self.fy = AxisFilter(y, vy, var_p, var_v)
+        self.t = t
+
+    def update(self, t, lat, lon, speed, course, class_b=False):
+        dt = t - self.t
+        x, y = self.project(lat, lon)
+        if dt > self.MAX_GAP or dt < 0.0:
+            self.resets += 1
+            self.reset(t, lat, lon, speed, course, class_b)
+            return
+        q = self.ACCELERATION**2
+        self.fx.predict(dt, q)
+        self.fy.predict(dt, q)
+        if math.hypot(x - self.fx.p, y - self.fy.p) > self.MAX_INNOVATION:
+            self.resets += 1
+            self.reset(t, lat, lon, speed, course, class_b)
+            return
+
+        self.remember(t, x, y)
+        vx, vy = self.velocity(speed, course)
+        var_p, var_v = self.noise(speed, class_b)
+        self.fx.update(x, vx, var_p, var_v)
+        self.fy.update(y, vy, var_p, var_v)
+        self.t = t
+
+    def history(self):
+        """Return the remembered (t, lat, lon) positions, oldest first."""
+        positions = []
+        for i in range(self.HISTORY):
+            j = (self.next + i) % self.HISTORY
+            if self.times[j] == self.times[j]:
+                positions.append(
+                    (
+                        self.times[j],
+                        self.lat0 + self.ys[j] / M_PER_DEG,
+                        self.lon0 + self.xs[j] / self.m_per_lon,
+                    )
+                )
+        return positions
+
+    def estimate(self):
+        speed = math.hypot(self.fx.v, self.fy.v) / kn_to_m_s(1.0)
+        course = math.degrees(math.atan2(self.fx.v, self.fy.v)) % 360.0
+        return TrackEstimate(
+            self.t,
+            self.lat0 + self.fy.p / M_PER_DEG,
+            self.lon0 + self.fx.p / self.m_per_lon,
+            speed,
+            course,
+            (
+                self.fx.p00,
+                self.fy.p00,
+                self.fx.p01,
+                self.fy.p01,
+                self.fx.p11,
+                self.fy.p11,
+            ),
+        )
@@ -0,0 +1,226 @@
+import math
+
+
+class Crossing(object):
+    """A vessel's predicted crossing of a camera axis.
+
+    `wide` and `zoomed` are how many seconds either side of the crossing the
+    vessel stays within a wide or a zoomed in frame, with `zoomed` None if it
+    does not fit in one at all.
+    """
+
+    __slots__ = ("mmsi", "t", "length", "wide", "zoomed", "score")
+
+    def __init__(self, mmsi, t, length, wide, zoomed, score):
+        self.mmsi = mmsi
+        self.t = t
+        self.length = length
+        self.wide = wide
+        self.zoomed = zoomed
+        self.score = score
+
+
+class Shot(object):
+    """One frame: the crossings it catches, when to take it, and the window
+    within which every one of its vessels is in frame."""
+
+    __slots__ = ("t", "start", "end", "crossings", "large", "score")
+
+    def __init__(self, crossings, start, end, large):
+        self.crossings = crossings
+        self.start = start
+        self.end = end
+        self.t = (start + end) / 2.0
+        self.large = large
+        self.score = sum(crossing.score for crossing in crossings)
+
+    @property
+    def mmsis(self):
+        return [crossing.mmsi for crossing in self.crossings]
+
+    @property
+    def slack(self):
+        return self.end - self.start
+
+
+class ShotPlanner(object):
+    """Plans one camera's shots from every pending crossing of its axis.
+
+    Crossings whose vessels are in frame at the same time are merged into one
+    shot, zoomed in if all of them fit. Shots the camera cannot take far
+    enough apart are then placed in order of their vessels' number, size and
+    novelty, and among equals the one with the least slack first; each is
+    moved within its slack to make room, and left out if it cannot be.
+    """
+
+    # tangent of half the horizontal field of view, wide and zoomed in
+    WIDE = math.tan(math.radians(31.1))
+    ZOOMED = 0.5 * WIDE
+    # share of the frame a vessel may fill
+    MARGIN = 0.9
+    # how far a shot may stray from the predicted crossing
+    MAX_SLACK = 5.0
+    # vessels in one shot, as many as one post can name
+    MAX_VESSELS = 3
+    # seconds before a vessel is shot again, and before it is new again
+    COOLDOWN = 60.0
+    NOVELTY_WINDOW = 86400.0
+    # vessels this long (meters) and longer count as large as they come
+    FULL_LENGTH = 200.0
+
+    def __init__(self, busy=1.0, warmup=1.0):
+        # seconds the camera is taken up by a shot, and to switch modes
+        self.busy = busy
+        self.warmup = warmup
+
+        self.pending = {}
+        self.history = {}
+        self.last = None
+
+        self.planned = 0
+        self.taken = 0
+        self.merged = 0
+        self.late = 0
+        self.missed = 0
+
+    def slack(self, tangent, depth, length, speed):
+        room = self.MARGIN * tangent * depth - length / 2.0
+        if room < 0.0:
+            return None
+        if speed <= 0.0:
+            return self.MAX_SLACK
+        return min(room / speed, self.MAX_SLACK)
+
+    def add(self, mmsi, t, depth, length, speed, now):
+        """Plan for a vessel crossing at time t, `depth` meters out, moving
+        across the axis at `speed` m/s. Return False if it was shot too
+        recently to be shot again."""
+        last = self.history.get(mmsi)
+        if last is not None and now - last < self.COOLDOWN:
+            return False
+        novel = last is None or now - last >= self.NOVELTY_WINDOW
+        self.pending[mmsi] = Crossing(
+            mmsi,
+            t,
+            length,
+            self.slack(self.WIDE, depth, length, speed) or 0.0,
+            self.slack(self.ZOOMED, depth, length, speed),
+            1.0 + min(length / self.FULL_LENGTH, 1.0) + (1.0 if novel else 0.0),
+        )
+        return True
+
+    def remove(self, mmsi):
+        return self.pending.pop(mmsi, None) is not None
+
+    def clear(self, t, margin):
+        """Return whether no vessel is expected in view within `margin`
+        seconds of time t."""
+        if self.last is not None and abs(self.last[0] - t) <= margin:
+            return False
+        return all(abs(c.t - t) > margin for c in self.pending.values())
+
+    def shot(self, crossings):
+        """Return a shot catching all of the crossings, or None."""
+        if all(crossing.zoomed is not None for crossing in crossings):
+            start = max(crossing.t - crossing.zoomed for crossing in crossings)
+            end = min(crossing.t + crossing.zoomed for crossing in crossings)
+            if start <= end:
+                return Shot(crossings, start, end, False)
+        start = max(crossing.t - crossing.wide for crossing in crossings)
+        end = min(crossing.t + crossing.wide for crossing in crossings)
+        if start <= end:
+            return Shot(crossings, start, end, True)
+        return None
+
+    def spacing(self, large, other_large):
+        return self.busy + (self.warmup if large != other_large else 0.0)
+
+    def place(self, shot, placed, earliest):
+        """Return the time nearest the shot's own that keeps clear of the
+        shots already placed, or None."""
+        start = max(shot.start, earliest)
+        if start > shot.end:
+            return None
+        ideal = min(max(shot.t, start), shot.end)
+        candidates = [ideal]
+        for t, large in placed:
+            gap = self.spacing(shot.large, large)
+            candidates.extend((t - gap, t + gap))
+        for candidate in sorted(candidates, key=lambda c: abs(c - ideal)):
+            if not start <= candidate <= shot.end:
+                continue
+            if all(
+                abs(candidate - t) >= self.spacing(shot.large, large) - 1e-6
+                for t, large in placed
+            ):
+                return candidate
+        return None
+
+    def plan(self, earliest):
+        """Return the shots to take, in order, none before `earliest`."""
+        # crossings whose vessels have already left the frame are missed
+        for crossing in list(self.pending.values()):
+            if crossing.t + crossing.wide < earliest:
+                del self.pending[crossing.mmsi]
+                self.missed += 1
+
+        groups = []
+        for crossing in sorted(self.pending.values(), key=lambda c: c.t):
+            merged = (
+                groups
+                and len(groups[-1].crossings) < self.MAX_VESSELS
+                and self.shot(groups[-1].crossings + [crossing])
+            )
+            if merged:
+                groups[-1] = merged
+            else:
+                groups.append(self.shot([crossing]))
+
+        placed = [] if self.last is None else [self.last]
+        shots = []
+        for shot in sorted(groups, key=lambda s: (-s.score, s.slack)):
+            t = self.place(shot, placed, earliest)
+            if t is not None:
+                shot.t = t
+                placed.append((t, shot.large))
+                shots.append(shot)
+        shots.sort(key=lambda shot: shot.t)
+        self.planned += 1
+        return shots
+
+    def take(self, shot, t):
+        """Record a shot as taken at time t, unless its vessels are gone by
+        then; return whether it was."""
+        crossings = [c for c in shot.crossings if c.mmsi in self.pending]
+        if not crossings:
+            return False
+        for crossing in crossings:
+            del self.pending[crossing.mmsi]
+        if t > shot.end:
+            self.late += 1
+            return False
+        for crossing in crossings:
+            # moved to the end, so the history stays in the order shot
+            self.history.pop(crossing.mmsi, None)
+            self.history[crossing.mmsi] = t
+        # vessels shot longer ago than that are new again anyway
+        while self.history:
+            mmsi, last = next(iter(self.history.items()))
+            if t - last < self.NOVELTY_WINDOW:
+                break
+            del self.history[mmsi]
+        self.last = (t, shot.large)
+        self.taken += 1
+        if len(crossings) > 1:
+            self.merged += 1
+        return True
+
+    def stats(self):
+        return {
+            "pending": len(self.pending),
+            "plans": self.planned,
+            "taken": self.taken,
+            "merged": self.merged,
+            "late": self.late,
+            "missed": self.missed,
+        }
@@ -0,0 +1,325 @@
+import asyncio
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+
+from aistweet.compress import JpegEncoder
+from aistweet.metrics import NULL_METRICS
+
+
+class Poster(object):
+    """Background Bluesky posting queue.
+
+    Captured frames are handed over in memory and compressed on a worker
+    thread, which keeps one logged-in client for as long as its session
+    stays valid. Each post is written to the spool directory (if there is
+    one) with its compressed image, so that it survives a restart; posts
+    still waiting when the poster stops are compressed and spooled then.
+    Failed posts are retried with exponential backoff.
+    """
+
+    BASE_URL = "https://bsky.social"
+    MAX_ATTEMPTS = 8
+    MAX_BACKOFF = 300.0
+    MAX_SIZE = 1000000
+    RESOLUTION = (1640, 1232)
+
+    def __init__(
+        self,
+        username,
+        password,
+        spool_dir=None,
+        base_url=None,
+        log=None,
+        metrics=None,
+    ):
+        self.username = username
+        self.password = password
+        self.spool_dir = spool_dir
+        self.base_url = base_url or self.BASE_URL
+        self.log = log or (lambda mmsi, message: None)
+
+        self.client = None
+        self.sequence = itertools.count()
+        self.encoder = JpegEncoder()
+        self.posted = 0
+        self.failed = 0
+        self.errors = 0
+
+        metrics = metrics or NULL_METRICS
+        self.compress_seconds = metrics.histogram(
+            "compress_seconds", "Time to compress a frame for posting"
+        )
+        self.upload_seconds = metrics.histogram(
+            "upload_seconds", "Time to upload an image and create its post"
+        )
+        metrics.register("poster", self.stats)
+
+        # posts waiting to go out, their captured frames until compressed,
+        # and their compressed images from then on
+        self.posts = {}
+        self.frames = {}
+        self.encoded = {}
+
+        self.queue = None
+        self.running = False
+        self.start()
+
+    def start(self):
+        self.queue = queue.Queue()
+        self.load_spool()
+        self.running = True
+        self.worker = threading.Thread(target=self.run, args=())
+        self.worker.daemon = True
+        self.worker.start()
+
+    def stop(self):
+        self.running = False
+        self.queue.put(None)
+        self.worker.join()
+
+    def load_spool(self):
+        if self.spool_dir:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            for name in sorted(os.listdir(self.spool_dir)):
+                if name.endswith(".json"):
+                    self.load(name[: -len(".json")])
+
+    def submit(self, mmsi, frame, text, alt, facets):
+        """Queue a captured JPEG frame (a file-like object) for posting."""
+        # the sequence number keeps frames submitted in the same millisecond apart
+        post_id = f"{int(time.time() * 1000)}-{next(self.sequence)}-{mmsi}"
+        self.posts[post_id] = {
+            "mmsi": mmsi,
+            "text": text,
+            "alt": alt,
+            "facets": facets,
+            "attempts": 0,
+        }
+        self.frames[post_id] = frame
+        self.queue.put_nowait(post_id)
+        return post_id
+
+    def pending(self):
+        return len(self.posts)
+
+    def path(self, post_id, extension):
+        return os.path.join(self.spool_dir, f"{post_id}.{extension}")
+
+    def load(self, post_id):
+        try:
+            with open(self.path(post_id, "json")) as f:
+                post = json.load(f)
+            with open(self.path(post_id, "jpg"), "rb") as f:
+                encoded = f.read()
+        except (OSError, ValueError):
+            self.discard(post_id)
+            return
+        self.posts[post_id] = post
+        self.encoded[post_id] = encoded
+        self.queue.put_nowait(post_id)
+
+    def save(self, post_id, image=False):
+        if not self.spool_dir:
+            return
+        if image:
+            with open(self.path(post_id, "jpg"), "wb") as f:
+                f.write(self.encoded[post_id])
+        # write to a temporary file first so a crash never leaves half a post
+        temp_path = self.path(post_id, "tmp")
+        with open(temp_path, "w") as f:
+            json.dump(self.posts[post_id], f)
+        os.replace(temp_path, self.path(post_id, "json"))
+
+    def discard(self, post_id):
+        self.posts.pop(post_id, None)
+        self.frames.pop(post_id, None)
+        self.encoded.pop(post_id, None)
+        if not self.spool_dir:
+            return
+        for extension in ("json", "jpg"):
+            try:
+                os.remove(self.path(post_id, extension))
+            except FileNotFoundError:
+                pass
+
+    def session(self):
+        if self.client is None:
+            # atproto takes most of a second to import, so it waits until
+            # there is something to post rather than hold up startup
+            from atproto import Client
+
+            client = Client(self.base_url)
+            client.login(self.username, self.password)
+            self.client = client
+        return self.client
+
+    def run(self):
+        while self.running:
+            post_id = self.queue.get()
+            if post_id is None:
+                break
+            post = self.posts.get(post_id)
+            if post is None:
+                continue
+
+            post["attempts"] += 1
+            try:
+                self.post(post_id, post)
+            except Exception as e:
+                backoff = self.attempt_failed(post_id, post, e)
+                if backoff is not None:
+                    retry = threading.Timer(backoff, self.queue.put, args=(post_id,))
+                    retry.daemon = True
+                    retry.start()
+                continue
+            self.attempt_succeeded(post_id, post)
+        self.spool_pending()
+
+    def spool_pending(self):
+        """Compress and spool the posts whose frames are still in memory."""
+        if not self.spool_dir:
+            return
+        for post_id in list(self.frames):
+            self.compress(post_id)
+
+    def attempt_failed(self, post_id, post, e):
+        """Return how long to wait before retrying a post, or None if it is
+        given up on."""
+        from atproto.exceptions import LoginRequiredError, UnauthorizedError
+
+        self.errors += 1
+        self.log(post["mmsi"], f"post attempt {post['attempts']} failed: {e}")
+        if isinstance(e, (LoginRequiredError, UnauthorizedError)):
+            self.client = None
+        if post["attempts"] >= self.MAX_ATTEMPTS:
+            self.log(post["mmsi"], "giving up on post")
+            self.failed += 1
+            self.discard(post_id)
+            return None
+        if post_id in self.encoded:
+            self.save(post_id)
+        backoff = min(2 * (2 ** (post["attempts"] - 1)), self.MAX_BACKOFF)
+        self.log(post["mmsi"], f"retrying in {backoff} seconds...")
+        return backoff
+
+    def attempt_succeeded(self, post_id, post):
+        self.posted += 1
+        self.discard(post_id)
+        self.log(post["mmsi"], "done tweeting")
+
+    def compress(self, post_id):
+        if post_id not in self.encoded:
+            from PIL import Image
+
+            start = time.perf_counter()
+            with Image.open(self.frames[post_id]) as image:
+                self.encoded[post_id] = self.encoder.compress(
+                    image, self.MAX_SIZE, self.RESOLUTION, best_effort=True
+                )
+            self.compress_seconds.observe(time.perf_counter() - start)
+            del self.frames[post_id]
+            self.save(post_id, image=True)
+        return self.encoded[post_id]
+
+    def post(self, post_id, post):
+        data = self.compress(post_id)
+
+        start = time.perf_counter()
+        client = self.session()
+        upload = client.upload_blob(data)
+        client.com.atproto.repo.create_record(self.record(client, post, upload.blob))
+        self.upload_seconds.observe(time.perf_counter() - start)
+
+    @staticmethod
+    def record(client, post, blob):
+        from atproto import models
+
+        images = [models.AppBskyEmbedImages.Image(alt=post["alt"], image=blob)]
+        embed = models.AppBskyEmbedImages.Main(images=images)
+        return models.ComAtprotoRepoCreateRecord.Data(
+            repo=client.me.did,
+            collection=models.ids.AppBskyFeedPost,
+            record=models.AppBskyFeedPost.Record(
+                created_at=client.get_current_time_iso(),
+                text=post["text"],
+                embed=embed,
+                facets=post["facets"],
+            ),
+        )
+
+    def stats(self):
+        return {
+            "pending": self.pending(),
+            "posted": self.posted,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+class AsyncPoster(Poster):
+    """Posting queue run as a task on the event loop it is created in.
+
+    Uploads go through atproto's asyncio client, and frames are compressed
+    in the loop's executor so the loop is never held up.
+    """
+
+    def start(self):
+        self.loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue()
+        self.load_spool()
+        self.running = True
+        self.worker = self.loop.create_task(self.run())
+
+    async def stop(self):
+        self.running = False
+        self.queue.put_nowait(None)
+        await self.worker
+
+    async def session(self):
+        if self.client is None:
+            # loading atproto and setting up a client's SSL context would
+            # hold the loop up
+            client = await self.loop.run_in_executor(None, self.create_client)
+            await client.login(self.username, self.password)
+            self.client = client
+        return self.client
+
+    def create_client(self):
+        from atproto import AsyncClient
+
+        return AsyncClient(self.base_url)
+
+    async def run(self):
+        while self.running:
+            post_id = await self.queue.get()
+            if post_id is None:
+                break
+            post = self.posts.get(post_id)
+            if post is None:
+                continue
+
+            post["attempts"] += 1
+            try:
+                await self.post(post_id, post)
+            except Exception as e:
+                backoff = self.attempt_failed(post_id, post, e)
+                if backoff is not None:
+                    self.loop.call_later(backoff, self.queue.put_nowait, post_id)
+                continue
+            self.attempt_succeeded(post_id, post)
+        await self.loop.run_in_executor(None, self.spool_pending)
+
+    async def post(self, post_id, post):
+        data = await self.loop.run_in_executor(None, self.compress, post_id)
+
+        start = time.perf_counter()
+        client = await self.session()
+        upload = await client.upload_blob(data)
+        await client.com.atproto.repo.create_record(
+            self.record(client, post, upload.blob)
+        )
+        self.upload_seconds.observe(time.perf_counter() - start)
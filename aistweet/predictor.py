@@ -0,0 +1,188 @@
+import math
+import threading
+
+from aistweet.units import kn_to_m_s
+
+
+class Prediction(object):
+    __slots__ = (
+        "lat",
+        "lon",
+        "heading",
+        "speed",
+        "course",
+        "t",
+        "sides",
+        "results",
+        "seen",
+    )
+
+    def __init__(self, lat, lon, heading, speed, course, t, sides, results):
+        self.lat = lat
+        self.lon = lon
+        self.heading = heading
+        self.speed = speed
+        self.course = course
+        self.t = t
+        self.sides = sides
+        self.results = results
+        # the latest report these predictions were handed out for
+        self.seen = (t, lat, lon)
+
+
+class CrossingPredictor(object):
+    """Incremental crossing prediction for a set of camera axes.
+
+    The last predictions for each vessel are kept along with the report they
+    were made from. A new report that agrees with the previous one's course
+    and speed, puts the vessel within `position_tolerance` meters of where
+    dead reckoning expected it and leaves it on the same side of every camera
+    axis reuses the previous predictions.
+    Otherwise all axes are predicted again in one pass over the vessel. A
+    prediction only asks for a reschedule when it has drifted from the
+    scheduled time by more than `time_tolerance` seconds.
+    """
+
+    TIME_TOLERANCE = 1.0
+    COURSE_TOLERANCE = 2.0
+    SPEED_TOLERANCE = 0.2
+    # about twice the position error of a Class A report
+    POSITION_TOLERANCE = 25.0
+
+    def __init__(
+        self,
+        tracker,
+        direction=None,
+        time_tolerance=None,
+        course_tolerance=None,
+        speed_tolerance=None,
+        station=None,
+        position_tolerance=None,
+    ):
+        self.tracker = tracker
+        self.time_tolerance = time_tolerance or self.TIME_TOLERANCE
+        self.course_tolerance = course_tolerance or self.COURSE_TOLERANCE
+        self.speed_tolerance = speed_tolerance or self.SPEED_TOLERANCE
+        self.position_tolerance = position_tolerance or self.POSITION_TOLERANCE
+
+        self.predictions = {}
+        self.scheduled = {}
+        # cameras sharing the predictor call it from different threads
+        self.lock = threading.Lock()
+
+        # ((lat, lon), direction) of each camera axis
+        self.axes = []
+        if direction is not None:
+            self.add_axis(direction, station)
+
+        self.computed = 0
+        self.reused = 0
+        self.schedules = 0
+        self.avoided_reschedules = 0
+        # the same counts for each axis, as its camera sees them
+        self.axis_schedules = {}
+        self.axis_avoided_reschedules = {}
+
+    def add_axis(self, direction, station=None):
+        """Add a camera axis (by default at the tracker's station); return its index."""
+        self.axes.append((station or self.tracker.coordinates, direction))
+        self.predictions.clear()
+        return len(self.axes) - 1
+
+    def predict(self, mmsi, axis=0):
+        """Return the predicted crossing time and depth of an axis."""
+        with self.lock:
+            return self.predict_locked(mmsi, axis)
+
+    def predict_locked(self, mmsi, axis):
+        ship = self.tracker[mmsi]
+        lat, lon = ship["lat"], ship["lon"]
+        heading, speed, course = ship["heading"], ship["speed"], ship["course"]
+        t = ship["last_update"]
+
+        previous = self.predictions.get(mmsi)
+        if previous is not None:
+            # the same report, as seen from another axis's callback
+            if previous.seen == (t, lat, lon):
+                return previous.results[axis]
+            if previous.sides == self.sides(lat, lon) and self.consistent(
+                previous, lat, lon, heading, speed, course, t
+            ):
+                self.reused += 1
+                previous.seen = (t, lat, lon)
+                return previous.results[axis]
+
+        results = self.tracker.crossings_for(mmsi, self.axes, ship)
+        self.computed += 1
+        self.predictions[mmsi] = Prediction(
+            lat, lon, heading, speed, course, t, self.sides(lat, lon), results
+        )
+        return results[axis]
+
+    def sides(self, lat, lon):
+        """Return which side of each camera axis a position is on."""
+        if lat is None or lon is None:
+            return None
+        sides = []
+        for (station_lat, station_lon), direction in self.axes:
+            dy = lat - station_lat
+            dx = (lon - station_lon) * math.cos(math.radians(lat))
+            direction_r = math.radians(direction)
+            sides.append(dx * math.cos(direction_r) - dy * math.sin(direction_r) > 0.0)
+        return tuple(sides)
+
+    def consistent(self, previous, lat, lon, heading, speed, course, t):
+        if all(crossing is None for crossing, _ in previous.results):
+            return False
+        if None in (lat, lon, speed, course, t):
+            return False
+        if abs(speed - previous.speed) > self.speed_tolerance:
+            return False
+        for old, new in ((previous.course, course), (previous.heading, heading)):
+            if old is None or new is None:
+                continue
+            if abs((new - old + 180.0) % 360.0 - 180.0) > self.course_tolerance:
+                return False
+
+        # compare the reported position with the dead-reckoned one; an
+        # offset within the noise of a report says nothing new
+        v = kn_to_m_s(previous.speed)
+        dt = t - previous.t
+        dy = (lat - previous.lat) * 111111.0
+        dx = (lon - previous.lon) * 111111.0 * math.cos(math.radians(lat))
+        ex = v * dt * math.sin(math.radians(previous.course))
+        ey = v * dt * math.cos(math.radians(previous.course))
+        return math.hypot(dx - ex, dy - ey) < self.position_tolerance
+
+    def needs_reschedule(self, mmsi, crossing, axis=0):
+        scheduled = self.scheduled.get((axis, mmsi))
+        if scheduled is not None and abs(crossing - scheduled) <= self.time_tolerance:
+            self.avoided_reschedules += 1
+            self.axis_avoided_reschedules[axis] = (
+                self.axis_avoided_reschedules.get(axis, 0) + 1
+            )
+            return False
+        return True
+
+    def mark_scheduled(self, mmsi, crossing, axis=0):
+        self.scheduled[(axis, mmsi)] = crossing
+        self.schedules += 1
+        self.axis_schedules[axis] = self.axis_schedules.get(axis, 0) + 1
+
+    def forget(self, mmsi, axis=0):
+        self.predictions.pop(mmsi, None)
+        self.scheduled.pop((axis, mmsi), None)
+
+    def axis_stats(self, axis):
+        return {
+            "schedules": self.axis_schedules.get(axis, 0),
+            "avoided_reschedules": self.axis_avoided_reschedules.get(axis, 0),
+        }
+
+    def stats(self):
+        return {
+            "computed": self.computed,
+            "reused": self.reused,
+            "schedules": self.schedules,
+            "avoided_reschedules": self.avoided_reschedules,
+        }
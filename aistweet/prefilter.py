@@ -0,0 +1,129 @@
+import math
+
+import numpy as np
+
+from aistweet.units import kn_to_m_s
+
+
+class CrossingPrefilter(object):
+    """Cheap test for whether a vessel could cross a camera axis soon.
+
+    Positions are projected onto a plane around the station and looked up in
+    a grid of cells covering `max_range`. A vessel passes if it is in range,
+    is moving towards the camera axis and can reach it in front of the
+    camera within `horizon` seconds. `margin` meters of slack cover the
+    offset between a vessel's antenna and its center.
+    """
+
+    MAX_RANGE = 20000.0
+    HORIZON = 65.0
+    MARGIN = 500.0
+    CELL_SIZE = 1000.0
+
+    def __init__(self, lat, lon, max_range=None, horizon=None, margin=None):
+        self.lat = lat
+        self.lon = lon
+        self.max_range = max_range or self.MAX_RANGE
+        self.horizon = horizon or self.HORIZON
+        self.margin = margin or self.MARGIN
+
+        self.m_per_lat = 111111.0
+        self.m_per_lon = 111111.0 * math.cos(math.radians(lat))
+
+        # cells with any point within range of the station
+        self.n = n = int(math.ceil((self.max_range + self.margin) / self.CELL_SIZE))
+        self.cells = set()
+        for i in range(-n, n):
+            for j in range(-n, n):
+                nearest_x = max(i * self.CELL_SIZE, min(0.0, (i + 1) * self.CELL_SIZE))
+                nearest_y = max(j * self.CELL_SIZE, min(0.0, (j + 1) * self.CELL_SIZE))
+                if math.hypot(nearest_x, nearest_y) <= self.max_range + self.margin:
+                    self.cells.add((i, j))
+
+        self.checked = 0
+        self.passed = 0
+
+    def plausible(self, lat, lon, speed, course, direction):
+        self.checked += 1
+        if None in (lat, lon, speed, course):
+            return False
+
+        x = (lon - self.lon) * self.m_per_lon
+        y = (lat - self.lat) * self.m_per_lat
+        if (int(x // self.CELL_SIZE), int(y // self.CELL_SIZE)) not in self.cells:
+            return False
+
+        # offset from the camera axis and velocity towards it
+        direction_r = math.radians(direction)
+        course_r = math.radians(course)
+        offset = x * math.cos(direction_r) - y * math.sin(direction_r)
+        v = kn_to_m_s(speed)
+        closing = math.copysign(1.0, offset) * v * math.sin(direction_r - course_r)
+        distance = abs(offset) - self.margin
+        if distance > 0.0:
+            if closing <= 0.0 or distance > closing * self.horizon:
+                return False
+
+            # where along the axis the vessel will cross
+            tc = abs(offset) / closing
+            cross_x = x + v * tc * math.sin(course_r)
+            cross_y = y + v * tc * math.cos(course_r)
+            depth = cross_x * math.sin(direction_r) + cross_y * math.cos(direction_r)
+            if not -self.margin < depth < self.max_range + self.margin:
+                return False
+
+        self.passed += 1
+        return True
+
+    def plausible_batch(self, lat, lon, speed, course, direction):
+        """Return a mask of the vessels in arrays of positions, speeds and
+        courses that pass plausible()."""
+        x = (lon - self.lon) * self.m_per_lon
+        y = (lat - self.lat) * self.m_per_lat
+        # the same cells as the grid, without looking each one up
+        i = np.floor(x / self.CELL_SIZE)
+        j = np.floor(y / self.CELL_SIZE)
+        nearest_x = np.maximum(
+            i * self.CELL_SIZE, np.minimum(0.0, (i + 1) * self.CELL_SIZE)
+        )
+        nearest_y = np.maximum(
+            j * self.CELL_SIZE, np.minimum(0.0, (j + 1) * self.CELL_SIZE)
+        )
+        ok = (
+            (i >= -self.n)
+            & (i < self.n)
+            & (j >= -self.n)
+            & (j < self.n)
+            & (np.hypot(nearest_x, nearest_y) <= self.max_range + self.margin)
+        )
+
+        direction_r = math.radians(direction)
+        course_r = np.radians(course)
+        offset = x * math.cos(direction_r) - y * math.sin(direction_r)
+        v = kn_to_m_s(speed)
+        closing = np.copysign(1.0, offset) * v * np.sin(direction_r - course_r)
+        distance = np.abs(offset) - self.margin
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tc = np.abs(offset) / closing
+            cross_x = x + v * tc * np.sin(course_r)
+            cross_y = y + v * tc * np.cos(course_r)
+        depth = cross_x * math.sin(direction_r) + cross_y * math.cos(direction_r)
+        reaches = (
+            (closing > 0.0)
+            & (distance <= closing * self.horizon)
+            & (-self.margin < depth)
+            & (depth < self.max_range + self.margin)
+        )
+        ok &= ~np.isnan(speed + course) & ((distance <= 0.0) | reaches)
+
+        self.checked += len(ok)
+        self.passed += int(np.count_nonzero(ok))
+        return ok
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "passed": self.passed,
+            # share of vessels spared the full crossing calculation
+            "hit_rate": 1.0 - self.passed / self.checked if self.checked else 0.0,
+        }
@@ -0,0 +1,273 @@
+import argparse
+import math
+import random
+import socket
+import threading
+import time
+
+from aistweet.units import kn_to_m_s, m_to_lat, m_to_lon
+
+
+class Recorder(object):
+    """Records raw NMEA sentences with their arrival timestamps.
+
+    Each line of a recording holds the arrival time, the index of the feed
+    the sentence came in on and the sentence itself, separated by spaces.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w")
+        self.lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, datagram, t, source=0):
+        with self.lock:
+            if self.file is None:
+                return
+            for line in datagram.splitlines():
+                line = line.strip()
+                if line:
+                    sentence = line.decode("ascii", errors="replace")
+                    self.file.write(f"{t:.6f} {source} {sentence}\n")
+                    self.recorded += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read_recording(path):
+    """Yield (t, source, datagram) for each sentence of a recording."""
+    with open(path) as f:
+        for line in f:
+            fields = line.split(" ", 2)
+            if len(fields) < 3:
+                continue
+            yield float(fields[0]), int(fields[1]), fields[2].strip().encode()
+
+
+def replay(records, sink, speed=None):
+    """Feed recorded (t, source, datagram) tuples into a sink.
+
+    The sink is called as sink(datagram, t, source), which fits
+    IngestPipeline.submit. Without a speed the records are fed in flat out
+    with their recorded timestamps. With a speed they are paced at that
+    multiple of real time and stamped with the time they are fed in.
+    """
+    count = 0
+    start = None
+    for t, source, datagram in records:
+        if speed:
+            now = time.time()
+            if start is None:
+                start = (now, t)
+            due = start[0] + (t - start[1]) / speed
+            if due > now:
+                time.sleep(due - now)
+            t = max(due, now)
+        sink(datagram, t, source)
+        count += 1
+    return count
+
+
+class UdpSink(object):
+    """Replay sink that sends each datagram to a UDP endpoint."""
+
+    def __init__(self, host, port):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def __call__(self, datagram, t, source=0):
+        self.sock.sendto(datagram, self.address)
+
+    def close(self):
+        self.sock.close()
+
+
+class SyntheticVessel(object):
+    __slots__ = ("mmsi", "x", "y", "speed", "course", "interval", "phase")
+
+    def __init__(self, mmsi, x, y, speed, course, interval, phase):
+        self.mmsi = mmsi
+        self.x = x
+        self.y = y
+        self.speed = speed
+        self.course = course
+        self.interval = interval
+        self.phase = phase
+
+
+class SyntheticTraffic(object):
+    """Deterministic traffic of vessels on straight tracks around a station.
+
+    Vessels start at random points within `radius` meters of (lat, lon) and
+    keep a constant speed and course, which makes their true crossing times
+    of any camera axis known exactly. Each vessel reports its position every
+    few seconds and its static and voyage data every STATIC_INTERVAL.
+
+    Reports can be made noisy with Gaussian errors of the given standard
+    deviations (in meters, knots and degrees), and sent as Class B reports.
+    """
+
+    STATIC_INTERVAL = 360.0
+
+    def __init__(
+        self,
+        lat,
+        lon,
+        vessels,
+        radius=5000.0,
+        seed=0,
+        start=0.0,
+        position_noise=0.0,
+        speed_noise=0.0,
+        course_noise=0.0,
+        class_b=False,
+    ):
+        self.lat = lat
+        self.lon = lon
+        self.start = start
+        self.seed = seed
+        self.noise = (position_noise, speed_noise, course_noise)
+        self.class_b = class_b
+
+        rng = random.Random(seed)
+        self.vessels = {}
+        while len(self.vessels) < vessels:
+            mmsi = rng.randint(200000000, 775999999)
+            distance = radius * math.sqrt(rng.random())
+            bearing = rng.uniform(0.0, math.tau)
+            self.vessels[mmsi] = SyntheticVessel(
+                mmsi,
+                distance * math.sin(bearing),
+                distance * math.cos(bearing),
+                round(rng.uniform(2.0, 20.0), 1),
+                round(rng.uniform(0.0, 359.9), 1),
+                rng.choice((2.0, 3.0, 6.0, 10.0)),
+                rng.uniform(0.0, 10.0),
+            )
+
+    def offset(self, vessel, t):
+        v = kn_to_m_s(vessel.speed)
+        dt = t - self.start
+        return (
+            vessel.x + v * dt * math.sin(math.radians(vessel.course)),
+            vessel.y + v * dt * math.cos(math.radians(vessel.course)),
+        )
+
+    def position(self, mmsi, t):
+        x, y = self.offset(self.vessels[mmsi], t)
+        return self.lat + m_to_lat(y), self.lon + m_to_lon(x, self.lat)
+
+    def messages(self, duration):
+        """Return the (t, data) of every message sent within `duration`."""
+        messages = []
+        rng = random.Random(self.seed)
+        position_noise, speed_noise, course_noise = self.noise
+        for vessel in self.vessels.values():
+            t = self.start + vessel.phase
+            while t < self.start + duration:
+                x, y = self.offset(vessel, t)
+                if position_noise:
+                    x += rng.gauss(0.0, position_noise)
+                    y += rng.gauss(0.0, position_noise)
+                speed, course = vessel.speed, vessel.course
+                if speed_noise:
+                    speed = max(speed + rng.gauss(0.0, speed_noise), 0.0)
+                if course_noise:
+                    course = (course + rng.gauss(0.0, course_noise)) % 360.0
+                data = {
+                    "msg_type": 18 if self.class_b else 1,
+                    "mmsi": vessel.mmsi,
+                    "lat": self.lat + m_to_lat(y),
+                    "lon": self.lon + m_to_lon(x, self.lat),
+                    "speed": round(speed, 1),
+                    "course": round(course, 1) % 360.0,
+                    "heading": int(round(vessel.course)) % 360,
+                }
+                if not self.class_b:
+                    data["status"] = 0
+                messages.append((t, data))
+                t += vessel.interval
+            t = self.start + vessel.phase * self.STATIC_INTERVAL / 10.0
+            while t < self.start + duration:
+                data = {
+                    "msg_type": 5,
+                    "mmsi": vessel.mmsi,
+                    "imo": vessel.mmsi % 10000000,
+                    "shipname": f"VESSEL {vessel.mmsi % 10000}",
+                    "shiptype": 70,
+                    # antenna amidships, so it marks the vessel's center
+                    "to_bow": 60,
+                    "to_stern": 60,
+                    "to_port": 10,
+                    "to_starboard": 10,
+                    "destination": "DETROIT",
+                    "draught": 5.5,
+                }
+                messages.append((t, data))
+                t += self.STATIC_INTERVAL
+        messages.sort(key=lambda message: message[0])
+        return messages
+
+    def records(self, duration):
+        """Return the messages within `duration` as a recording would hold them."""
+        from pyais.encode import encode_dict
+
+        records = []
+        for t, data in self.messages(duration):
+            # pyais names the ship type differently from the tracker
+            if "shiptype" in data:
+                data["ship_type"] = data.pop("shiptype")
+            records.append((t, 0, "\n".join(encode_dict(data)).encode()))
+        return records
+
+    def crossing(self, mmsi, station, direction):
+        """Return when a vessel truly crosses a camera axis, or None."""
+        vessel = self.vessels[mmsi]
+        sx = (station[1] - self.lon) / m_to_lon(1.0, self.lat)
+        sy = (station[0] - self.lat) / m_to_lat(1.0)
+        direction_r = math.radians(direction)
+        course_r = math.radians(vessel.course)
+        v = kn_to_m_s(vessel.speed)
+
+        # offset from the axis, and its rate of change
+        x, y = vessel.x - sx, vessel.y - sy
+        offset = x * math.cos(direction_r) - y * math.sin(direction_r)
+        rate = v * math.sin(course_r - direction_r)
+        if rate == 0.0:
+            return None
+        dt = -offset / rate
+        if dt < 0.0:
+            return None
+        cross_x = x + v * dt * math.sin(course_r)
+        cross_y = y + v * dt * math.cos(course_r)
+        if cross_x * math.sin(direction_r) + cross_y * math.cos(direction_r) <= 0.0:
+            return None
+        return self.start + dt
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="replay recorded AIS messages")
+    parser.add_argument("recording", type=str, help=("recording to replay"))
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help=("host to send UDP to")
+    )
+    parser.add_argument("--port", type=int, default=10110, help=("port to send UDP to"))
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help=("multiple of real time to replay at (0 for as fast as possible)"),
+    )
+    args = parser.parse_args()
+
+    sink = UdpSink(args.host, args.port)
+    try:
+        count = replay(read_recording(args.recording), sink, args.speed)
+    finally:
+        sink.close()
+    print(f"replayed {count} sentences")
@@ -0,0 +1,38 @@
+import asyncio
+
+from aistweet.ingest import AsyncIngest
+
+
+class AsyncRuntime(object):
+    """Drives a tracker created with threaded=False from an event loop.
+
+    Feeds are received, decoded and applied on the loop, subscribers are
+    called on it right after, and vessels are aged by a timer on it, so the
+    tracker needs no threads of its own.
+    """
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.loop = asyncio.get_event_loop()
+        self.ingest = AsyncIngest(tracker.pipeline)
+        self.sweep_handle = None
+
+    def start(self):
+        self.ingest.start()
+        if self.tracker.ages:
+            self.sweep_handle = self.loop.call_later(
+                self.tracker.SWEEP_INTERVAL, self.sweep
+            )
+
+    def sweep(self):
+        self.tracker.expire()
+        self.tracker.dispatcher.run_ready()
+        self.sweep_handle = self.loop.call_later(
+            self.tracker.SWEEP_INTERVAL, self.sweep
+        )
+
+    def stop(self):
+        if self.sweep_handle is not None:
+            self.sweep_handle.cancel()
+        self.ingest.stop()
+        self.tracker.stop()
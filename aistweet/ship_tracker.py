@@ -1,14 +1,25 @@
-import csv
 import threading
 import time
-from pkg_resources import resource_filename
 
 import flag
-import sqlite3
-from pyais.ais_types import AISType
-from pyais.stream import UDPReceiver
-
-from aistweet.geometry import center_coordinates, crossing_time_and_depth
+import numpy as np
+
+from aistweet import tables
+from aistweet.archive import TrackArchive
+from aistweet.decode import AISType
+from aistweet.dispatch import Dispatcher
+from aistweet.geometry import (
+    center_coordinates,
+    center_coordinates_batch,
+    crossing_time_and_depth,
+    crossing_time_and_depth_batch,
+)
+from aistweet.ingest import IngestPipeline
+from aistweet.metrics import NULL_METRICS
+from aistweet.motion import TrackFilter
+from aistweet.prefilter import CrossingPrefilter
+from aistweet.store import StaticStore
+from aistweet.vessel_table import VesselTable
 
 
 class ShipTracker(object):
@@ -19,6 +30,11 @@ class ShipTracker(object):
         AISType.POS_CLASS_A3,
         AISType.POS_CLASS_B,
     ]
+    RELEVANT_MSGS = frozenset(STATIC_MSGS + POSITION_MSGS)
+
+    # seconds before an unrefreshed position is forgotten, and between sweeps
+    POSITION_TTL = 600.0
+    SWEEP_INTERVAL = 10.0
 
     STATIC_FIELDS = {
         "shipname": "(Unidentified)",
@@ -38,116 +54,287 @@ class ShipTracker(object):
         "speed": None,
     }
 
-    def __init__(self, host, port, latitude, longitude, db_file=None):
+    def __init__(
+        self,
+        host,
+        port,
+        latitude,
+        longitude,
+        db_file=None,
+        listen=True,
+        capacity=None,
+        max_age=None,
+        distance_backend="geodesic",
+        max_range=None,
+        feeds=(),
+        metrics=None,
+        position_ttl=None,
+        aging=None,
+        smoothing=False,
+        archive_dir=None,
+        threaded=True,
+    ):
         self.host = host
         self.port = port
+        self.feeds = feeds
 
         self.lat = latitude
         self.lon = longitude
-
-        self.ships = {}
+        self.distance_backend = distance_backend
+        self.max_range = max_range
+        self.metrics = metrics or NULL_METRICS
+        self.prefilters = {}
+        self.prefilter = self.prefilter_for(self.coordinates)
+
+        self.ships = VesselTable(
+            {
+                **self.STATIC_FIELDS,
+                **self.VOYAGE_FIELDS,
+                **self.POSITION_FIELDS,
+                "last_update": None,
+            },
+            capacity,
+            max_age,
+        )
 
         self.db_file = db_file
+        self.store = None
         if self.db_file:
-            conn = sqlite3.connect(self.db_file)
-            c = conn.cursor()
-            c.execute(
-                "CREATE TABLE IF NOT EXISTS Ships(mmsi INTEGER PRIMARY KEY, "
-                "shipname TEXT, shiptype INTEGER, to_bow INTEGER, to_stern INTEGER, "
-                "to_port INTEGER, to_starboard INTEGER)"
-            )
-            conn.commit()
-            conn.close()
+            self.store = StaticStore(self.db_file, self.STATIC_FIELDS)
 
-        self.countries = self.readcsv("mid")
-        self.shiptypes = self.readcsv("shiptype")
-        self.statuses = self.readcsv("status")
+        # position history, written behind like the static store
+        self.archive = None
+        if archive_dir:
+            self.archive = TrackArchive(archive_dir)
 
-        self.message_callbacks = []
+        self.countries = tables.MID
+        self.shiptypes = tables.SHIPTYPE
+        self.statuses = tables.STATUS
 
-        self.lock = threading.RLock()
+        # called inline by ingest with (mmsi, t) for every applied message,
+        # so they must be quick; anything slower should subscribe() instead
+        self.message_callbacks = []
 
-        self.listener = threading.Thread(target=self.run, args=())
-        self.listener.daemon = True
-        self.listener.start()
+        # per-vessel motion filters, and the estimates readers see
+        self.smoothing = smoothing
+        self.tracks = {}
+        self.estimates = {}
+
+        # called with (mmsi, evicted) when a vessel's position expires or the
+        # whole vessel is evicted
+        self.expiry_callbacks = []
+        self.expirations = []
+        self.position_ttl = position_ttl or self.POSITION_TTL
+
+        self.lock = self.metrics.instrument_lock("tracker", threading.RLock())
+        self.add_message_seconds = self.metrics.histogram(
+            "add_message_seconds", "Time to apply one decoded message"
+        )
+
+        # without threads, ingest, delivery and aging are left to be driven
+        # from an event loop (see AsyncRuntime)
+        self.threaded = threaded
+        self.dispatcher = Dispatcher(metrics=self.metrics)
+        self.pipeline = IngestPipeline(
+            self,
+            self.host if listen else None,
+            self.port if listen else None,
+            self.feeds if listen else (),
+        )
+        if self.threaded:
+            self.dispatcher.start()
+            self.pipeline.start()
+
+        # age vessels against the wall clock when tracking live
+        self.ages = listen if aging is None else aging
+        self.aging = threading.Event()
+        self.aging_thread = None
+        if self.ages and self.threaded:
+            self.aging_thread = threading.Thread(target=self.run_aging, args=())
+            self.aging_thread.daemon = True
+            self.aging_thread.start()
+
+        self.metrics.register("ingest", self.pipeline.stats)
+        self.metrics.register("vessels", self.ships.stats)
+        self.metrics.register("dispatch", self.dispatcher.stats)
+        if self.store is not None:
+            self.metrics.register("store", self.store.stats)
+        if self.archive is not None:
+            self.metrics.register("archive", self.archive.stats)
+        if self.smoothing:
+            self.metrics.register("motion", self.motion_stats)
+
+    def stop(self):
+        self.aging.set()
+        if self.aging_thread is not None:
+            self.aging_thread.join()
+        self.pipeline.stop()
+        self.dispatcher.stop()
+        if self.store is not None:
+            self.store.close()
+        if self.archive is not None:
+            self.archive.close()
 
     @staticmethod
     def readcsv(filename):
-        d = {}
-        path = resource_filename("aistweet", f"data/{filename}.csv")
-        with open(path, newline="") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                d[int(row[0])] = row[1]
-        return d
+        return tables.read_csv(filename)
 
     @property
     def coordinates(self):
         return (self.lat, self.lon)
 
+    def prefilter_for(self, station):
+        """Return the (shared) crossing prefilter of a station's coordinates."""
+        try:
+            return self.prefilters[station]
+        except KeyError:
+            prefilter = CrossingPrefilter(station[0], station[1], self.max_range)
+            self.prefilters[station] = prefilter
+            self.metrics.register(
+                "prefilter", prefilter.stats, {"station": f"{station[0]},{station[1]}"}
+            )
+            return prefilter
+
     def add_message(self, data, t):
+        return self.add_messages([(data, t)])[0][0]
+
+    def add_messages(self, batch):
+        # only writers take the lock; readers see each vessel as of the end
+        # of the last batch that touched it
+        with self.lock:
+            if not self.metrics.enabled:
+                updates = [(self.update(data, t), t) for data, t in batch]
+            else:
+                updates = []
+                for data, t in batch:
+                    start = time.perf_counter()
+                    updates.append((self.update(data, t), t))
+                    self.add_message_seconds.observe(time.perf_counter() - start)
+            for mmsi in {mmsi for mmsi, _ in updates}:
+                # a vessel can be evicted again within a busy batch
+                if mmsi in self.ships:
+                    self.ships.publish(mmsi)
+                    if mmsi in self.tracks:
+                        self.estimates[mmsi] = self.tracks[mmsi].estimate()
+        if self.expirations:
+            self.notify_expirations()
+        return updates
+
+    def expire(self, now=None):
+        """Forget positions older than the TTL and evict idle vessels.
+
+        Only the expired vessels are visited, not the whole table.
+        """
+        if now is None:
+            now = time.time()
+        with self.lock:
+            for mmsi in self.ships.expire_positions(
+                now, self.position_ttl, self.POSITION_FIELDS
+            ):
+                self.ships.publish(mmsi)
+                self.forget_track(mmsi)
+                self.expirations.append((mmsi, False))
+            for mmsi in self.ships.evict(now):
+                self.forget_track(mmsi)
+                self.expirations.append((mmsi, True))
+        self.notify_expirations()
+
+    def notify_expirations(self):
+        with self.lock:
+            expirations, self.expirations = self.expirations, []
+        for mmsi, evicted in expirations:
+            for callback in self.expiry_callbacks:
+                self.dispatcher.invoke("expiry callback", callback, mmsi, evicted)
+
+    def subscribe(self, callback, name=None, coalesce=True):
+        """Have callback(mmsi, t) called from the dispatcher's workers after
+        messages are applied, by default only for the latest of each vessel."""
+        return self.dispatcher.subscribe(callback, name, coalesce)
+
+    def run_aging(self):
+        while not self.aging.wait(self.SWEEP_INTERVAL):
+            self.expire()
+
+    def update(self, data, t):
         # get the MMSI
         mmsi = int(data["mmsi"])
 
-        with self.lock:
-            # open database connection
-            if self.db_file:
-                conn = sqlite3.connect(self.db_file)
-                c = conn.cursor()
-
-            # create a new ship entry if necessary
-            if not mmsi in self.ships:
-                self.ships[mmsi] = {
-                    **self.STATIC_FIELDS,
-                    **self.VOYAGE_FIELDS,
-                    **self.POSITION_FIELDS,
-                }
-                self.ships[mmsi]["last_update"] = None
-                # try to retrieve cached static data
-                if self.db_file:
-                    c.execute("SELECT * FROM Ships WHERE mmsi = ?", (mmsi,))
-                    row = c.fetchone()
-                    if row:
-                        for key in self.STATIC_FIELDS:
-                            row = row[1:]
-                            self.ships[mmsi][key] = row[0]
-
-            # handle static messages
-            if data["msg_type"] in self.STATIC_MSGS:
-                for key in self.STATIC_FIELDS:
-                    try:
-                        self.ships[mmsi][key] = data[key]
-                    except KeyError:
-                        pass
-                if self.db_file:
-                    c.execute(
-                        "INSERT OR REPLACE INTO Ships VALUES(?"
-                        + ", ?" * len(self.STATIC_FIELDS)
-                        + ")",
-                        (mmsi,)
-                        + tuple([self.ships[mmsi][key] for key in self.STATIC_FIELDS]),
-                    )
-                    conn.commit()
-                if data["msg_type"] == AISType.STATIC_AND_VOYAGE:
-                    for key in self.VOYAGE_FIELDS:
-                        self.ships[mmsi][key] = data[key]
-                        # TODO: eta?
-
-            # handle position reports
-            if data["msg_type"] in self.POSITION_MSGS:
-                for key in self.POSITION_FIELDS:
-                    try:
-                        self.ships[mmsi][key] = data[key]
-                    except KeyError:
-                        pass
-                self.ships[mmsi]["last_update"] = t
-
-        conn.close()
+        # create a new ship entry if necessary
+        if not mmsi in self.ships:
+            for evicted in self.ships.evict(t):
+                self.forget_track(evicted)
+                self.expirations.append((evicted, True))
+            ship = self.ships.add(mmsi, t)
+            # try to retrieve cached static data
+            if self.store is not None:
+                cached = self.store.get(mmsi)
+                if cached:
+                    ship.update(cached)
+        else:
+            ship = self.ships[mmsi]
+            self.ships.touch(mmsi, t)
+
+        # handle static messages
+        if data["msg_type"] in self.STATIC_MSGS:
+            for key in self.STATIC_FIELDS:
+                try:
+                    ship[key] = data[key]
+                except KeyError:
+                    pass
+            if self.store is not None:
+                self.store.put(mmsi, ship)
+            if data["msg_type"] == AISType.STATIC_AND_VOYAGE:
+                for key in self.VOYAGE_FIELDS:
+                    ship[key] = data[key]
+                    # TODO: eta?
+
+        # handle position reports
+        if data["msg_type"] in self.POSITION_MSGS:
+            for key in self.POSITION_FIELDS:
+                try:
+                    ship[key] = data[key]
+                except KeyError:
+                    pass
+            ship["last_update"] = t
+            self.ships.position_reported(mmsi, t)
+            if self.archive is not None:
+                self.archive.append(mmsi, data, t)
+            if self.smoothing:
+                self.track(mmsi, data, t)
+
         return mmsi
 
+    def track(self, mmsi, data, t):
+        lat, lon = data.get("lat"), data.get("lon")
+        if lat is None or lon is None or not (-90.0 < lat < 90.0):
+            return
+        if not -180.0 < lon < 180.0:
+            return
+        # 102.3 knots and 360 degrees mean not available
+        speed, course = data.get("speed"), data.get("course")
+        if speed is not None and speed >= 102.2:
+            speed = None
+        if course is not None and course >= 360.0:
+            course = None
+        class_b = data["msg_type"] == AISType.POS_CLASS_B
+        try:
+            self.tracks[mmsi].update(t, lat, lon, speed, course, class_b)
+        except KeyError:
+            self.tracks[mmsi] = TrackFilter(t, lat, lon, speed, course, class_b)
+
+    def forget_track(self, mmsi):
+        self.tracks.pop(mmsi, None)
+        self.estimates.pop(mmsi, None)
+
+    def motion_stats(self):
+        return {
+            "tracks": len(self.tracks),
+            "resets": sum(track.resets for track in list(self.tracks.values())),
+        }
+
     def __getitem__(self, mmsi):
-        with self.lock:
-            return self.ships[mmsi]
+        """Return an immutable snapshot of a vessel's latest state."""
+        return self.ships.snapshot(mmsi)
 
     def flag(self, mmsi):
         try:
@@ -156,78 +343,195 @@ class ShipTracker(object):
             return None
 
     def ship_type(self, mmsi):
-        with self.lock:
-            try:
-                return self.shiptypes[self.ships[mmsi]["shiptype"]]
-            except KeyError:
-                return "Unknown Type"
+        try:
+            return self.shiptypes[self[mmsi]["shiptype"]]
+        except KeyError:
+            return "Unknown Type"
 
     def status(self, mmsi):
-        with self.lock:
-            try:
-                return self.statuses[self.ships[mmsi]["status"]]
-            except KeyError:
-                return None
+        try:
+            return self.statuses[self[mmsi]["status"]]
+        except KeyError:
+            return None
 
     def dimensions(self, mmsi):
-        with self.lock:
-            try:
-                return (
-                    self.ships[mmsi]["to_bow"] + self.ships[mmsi]["to_stern"],
-                    self.ships[mmsi]["to_starboard"] + self.ships[mmsi]["to_port"],
-                )
-            except TypeError:
-                return (0, 0)
-
-    def center_coords(self, mmsi):
-        with self.lock:
-            lat = self.ships[mmsi]["lat"]
-            lon = self.ships[mmsi]["lon"]
-
-            if lat is None or lon is None:
-                return None
-
-            to_bow = self.ships[mmsi]["to_bow"] or 0
-            to_stern = self.ships[mmsi]["to_stern"] or 0
-            to_starboard = self.ships[mmsi]["to_starboard"] or 0
-            to_port = self.ships[mmsi]["to_port"] or 0
-            heading = self.ships[mmsi]["heading"] or 0
-
-            return center_coordinates(
-                lat, lon, to_bow, to_stern, to_starboard, to_port, heading
+        ship = self[mmsi]
+        try:
+            return (
+                ship["to_bow"] + ship["to_stern"],
+                ship["to_starboard"] + ship["to_port"],
             )
+        except TypeError:
+            return (0, 0)
 
-    def crossing(self, mmsi, direction):
-        with self.lock:
-            # check for speed above a nominal threhsold
-            speed = self.ships[mmsi]["speed"]
-            if speed is None or speed < 0.2:
-                return None, None
+    def center_coords(self, mmsi, ship=None, position=None):
+        if ship is None:
+            ship = self[mmsi]
+        lat, lon = position or (ship["lat"], ship["lon"])
+
+        if lat is None or lon is None:
+            return None
 
-            ship_lat, ship_lon = self.center_coords(mmsi)
+        to_bow = ship["to_bow"] or 0
+        to_stern = ship["to_stern"] or 0
+        to_starboard = ship["to_starboard"] or 0
+        to_port = ship["to_port"] or 0
+        heading = ship["heading"] or 0
+
+        return center_coordinates(
+            lat, lon, to_bow, to_stern, to_starboard, to_port, heading
+        )
+
+    def crossing(self, mmsi, direction, station=None):
+        return self.crossings_for(mmsi, [(station or self.coordinates, direction)])[0]
+
+    def crossings_for(self, mmsi, axes, ship=None):
+        """Predict a vessel's crossing of each of several camera axes.
+
+        Each axis is a ((lat, lon), direction) pair. The vessel (by default
+        its latest snapshot) is read and its center position worked out once
+        for all of them. With smoothing, the filtered state of the vessel
+        stands in for its last report.
+        """
+        results = [(None, None)] * len(axes)
+        if ship is None:
+            ship = self[mmsi]
+
+        # check for speed above a nominal threhsold
+        speed = ship["speed"]
+        if speed is None or speed < 0.2:
+            return results
+        lat, lon, course = ship["lat"], ship["lon"], ship["course"]
+        t = ship["last_update"]
+        estimate = self.estimate(mmsi, ship)
+        if estimate is not None:
+            lat, lon = estimate.lat, estimate.lon
+            speed, course = estimate.speed, estimate.course
+
+        center = None
+        for i, (station, direction) in enumerate(axes):
+            # skip axes the vessel cannot reach any time soon
+            prefilter = self.prefilter_for(station)
+            if not prefilter.plausible(lat, lon, speed, course, direction):
+                continue
+
+            if center is None:
+                center = self.center_coords(mmsi, ship, (lat, lon))
+            ship_lat, ship_lon = center
             if not (-90.0 < ship_lat < 90.0 and -180.0 < ship_lon < 180.0):
-                return None, None
+                return results
 
-            return crossing_time_and_depth(
-                self.lat,
-                self.lon,
+            results[i] = crossing_time_and_depth(
+                station[0],
+                station[1],
                 direction,
                 ship_lat,
                 ship_lon,
-                self.ships[mmsi]["speed"],
-                self.ships[mmsi]["course"],
-                self.ships[mmsi]["last_update"],
+                speed,
+                course,
+                t,
+                self.distance_backend,
             )
+        return results
 
-    def run(self):
-        for msg in UDPReceiver(self.host, self.port):
-            data = msg.decode().asdict()
-            if (
-                data is not None
-                and "msg_type" in data
-                and data["msg_type"] in self.STATIC_MSGS + self.POSITION_MSGS
-            ):
-                t = time.time()
-                mmsi = self.add_message(data, t)
-                for callback in self.message_callbacks:
-                    callback(mmsi, t)
+    def estimate(self, mmsi, ship=None):
+        """Return the filtered state matching a vessel's snapshot, if any."""
+        estimate = self.estimates.get(mmsi)
+        if estimate is None:
+            return None
+        if ship is None:
+            ship = self[mmsi]
+        # the estimate and snapshot are published separately
+        if estimate.t != ship["last_update"]:
+            return None
+        return estimate
+
+    def crossing_uncertainty(self, mmsi, crossing, direction):
+        """Return the standard deviation in seconds of a predicted crossing,
+        or None without a filtered state to work it out from."""
+        estimate = self.estimate(mmsi)
+        if estimate is None:
+            return None
+        return estimate.crossing_uncertainty(direction, crossing)
+
+    def crossings(self, direction, station=None):
+        """Predict crossing times and depths for every moving vessel at once.
+
+        Like crossings_for, vessels are prefiltered and, with smoothing, their
+        filtered state stands in for their last report.
+        """
+        station_lat, station_lon = station or self.coordinates
+        with self.lock:
+            mmsis = np.fromiter(self.ships.rows.keys(), dtype=np.int64)
+            rows = np.fromiter(self.ships.rows.values(), dtype=np.intp)
+            columns = {
+                key: self.ships.gather(key, rows)
+                for key in (
+                    "lat",
+                    "lon",
+                    "to_bow",
+                    "to_stern",
+                    "to_starboard",
+                    "to_port",
+                    "heading",
+                    "course",
+                    "speed",
+                    "last_update",
+                )
+            }
+
+        # check for speed above a nominal threhsold
+        moving = (columns["speed"] >= 0.2) & ~np.isnan(columns["lat"] + columns["lon"])
+        for key in columns:
+            columns[key] = columns[key][moving]
+        mmsis = mmsis[moving]
+        for key in ("to_bow", "to_stern", "to_starboard", "to_port", "heading"):
+            columns[key] = np.nan_to_num(columns[key])
+        if self.estimates:
+            for i, (mmsi, t) in enumerate(zip(mmsis, columns["last_update"])):
+                estimate = self.estimates.get(int(mmsi))
+                if estimate is not None and estimate.t == t:
+                    for key in ("lat", "lon", "speed", "course"):
+                        columns[key][i] = getattr(estimate, key)
+
+        # skip vessels that cannot reach the axis any time soon
+        plausible = self.prefilter_for((station_lat, station_lon)).plausible_batch(
+            columns["lat"],
+            columns["lon"],
+            columns["speed"],
+            columns["course"],
+            direction,
+        )
+        for key in columns:
+            columns[key] = columns[key][plausible]
+        mmsis = mmsis[plausible]
+
+        ship_lat, ship_lon = center_coordinates_batch(
+            columns["lat"],
+            columns["lon"],
+            columns["to_bow"],
+            columns["to_stern"],
+            columns["to_starboard"],
+            columns["to_port"],
+            columns["heading"],
+        )
+        valid = (np.abs(ship_lat) < 90.0) & (np.abs(ship_lon) < 180.0)
+
+        times, depths = crossing_time_and_depth_batch(
+            station_lat,
+            station_lon,
+            direction,
+            ship_lat[valid],
+            ship_lon[valid],
+            columns["speed"][valid],
+            columns["course"][valid],
+            columns["last_update"][valid],
+            self.distance_backend,
+        )
+        found = ~np.isnan(times)
+        return {
+            int(mmsi): (float(crossing), float(depth))
+            for mmsi, crossing, depth in zip(
+                mmsis[valid][found], times[found], depths[found]
+            )
+        }
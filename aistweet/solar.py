@@ -0,0 +1,118 @@
+import datetime
+import json
+import os
+
+import astral
+import astral.sun
+import pytz
+
+
+def find_timezone(lat, lon):
+    # the polygon data is only needed once per station, so load it on demand
+    # and let it go as soon as the zone is known
+    from timezonefinder import TimezoneFinder
+
+    return TimezoneFinder().timezone_at(lat=lat, lng=lon)
+
+
+class SolarService(object):
+    """Station-local time and day/night phase for a fixed location.
+
+    The time zone is resolved once and saved to `cache_file` (if given),
+    keyed by the station's coordinates, so later runs never load the time
+    zone polygons at all. Dawn and dusk are computed once per local date,
+    and the bounds of the current date are kept so that most calls to
+    `is_night` are a few comparisons.
+    """
+
+    def __init__(self, lat, lon, cache_file=None, timezone=None):
+        self.lat = lat
+        self.lon = lon
+        self.cache_file = cache_file
+
+        self.timezone = timezone or self.load() or find_timezone(lat, lon)
+        if timezone is None:
+            self.save()
+        self.tzinfo = pytz.timezone(self.timezone)
+        self.location = astral.LocationInfo(
+            "AIS Station", "Earth", self.timezone, lat, lon
+        )
+
+        # dawn and dusk timestamps by local date, and the current date's
+        # (start, end, dawn, dusk) timestamps
+        self.phases = {}
+        self.day = None
+
+    def key(self):
+        return f"{self.lat},{self.lon}"
+
+    def read_cache(self):
+        """Return the time zones cached by station coordinates."""
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cached.get("stations", {})
+
+    def load(self):
+        if not self.cache_file:
+            return None
+        return self.read_cache().get(self.key())
+
+    def save(self):
+        if not self.cache_file:
+            return
+        # cameras at other stations share the cache file
+        stations = self.read_cache()
+        if stations.get(self.key()) == self.timezone:
+            return
+        stations[self.key()] = self.timezone
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        temp_path = self.cache_file + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"stations": stations}, f)
+        os.replace(temp_path, self.cache_file)
+
+    def now(self):
+        return datetime.datetime.now(self.tzinfo)
+
+    def dawn_and_dusk(self, date):
+        """Return the dawn and dusk timestamps of a local date."""
+        try:
+            return self.phases[date]
+        except KeyError:
+            pass
+        try:
+            sun = astral.sun.sun(self.location.observer, date, tzinfo=self.tzinfo)
+            phase = (sun["dawn"].timestamp(), sun["dusk"].timestamp())
+        except ValueError:
+            # the sun never crosses the twilight threshold on this date, so
+            # it is either day or night all day long
+            noon = self.tzinfo.localize(
+                datetime.datetime.combine(date, datetime.time(12))
+            )
+            if astral.sun.elevation(self.location.observer, noon) > 0.0:
+                phase = (float("-inf"), float("inf"))
+            else:
+                phase = (float("inf"), float("inf"))
+        self.phases[date] = phase
+        return phase
+
+    def is_night(self, t=None):
+        """Return whether a timestamp (by default now) is before dawn or after dusk."""
+        if t is None:
+            t = self.now().timestamp()
+        if self.day is None or not self.day[0] <= t < self.day[1]:
+            self.day = self.local_day(t)
+        return not self.day[2] <= t <= self.day[3]
+
+    def local_day(self, t):
+        date = datetime.datetime.fromtimestamp(t, self.tzinfo).date()
+        start = self.tzinfo.localize(datetime.datetime.combine(date, datetime.time()))
+        end = self.tzinfo.localize(
+            datetime.datetime.combine(
+                date + datetime.timedelta(days=1), datetime.time()
+            )
+        )
+        return (start.timestamp(), end.timestamp()) + self.dawn_and_dusk(date)
@@ -0,0 +1,111 @@
+import sqlite3
+import threading
+
+
+class StaticStore(object):
+    """Write-behind SQLite cache of static vessel data.
+
+    All known vessels are preloaded into memory at startup, so lookups never
+    touch the database. Updates are coalesced per MMSI and written out in a
+    single transaction either periodically or once enough have accumulated.
+    """
+
+    FLUSH_INTERVAL = 30.0
+    FLUSH_THRESHOLD = 100
+
+    def __init__(self, db_file, fields, flush_interval=None, flush_threshold=None):
+        self.db_file = db_file
+        self.fields = tuple(fields)
+        self.flush_interval = flush_interval or self.FLUSH_INTERVAL
+        self.flush_threshold = flush_threshold or self.FLUSH_THRESHOLD
+
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS Ships(mmsi INTEGER PRIMARY KEY, "
+            "shipname TEXT, shiptype INTEGER, to_bow INTEGER, to_stern INTEGER, "
+            "to_port INTEGER, to_starboard INTEGER)"
+        )
+        self.conn.commit()
+
+        self.insert_sql = (
+            "INSERT OR REPLACE INTO Ships(mmsi, "
+            + ", ".join(self.fields)
+            + ") VALUES(?"
+            + ", ?" * len(self.fields)
+            + ")"
+        )
+
+        # bulk preload of known vessels
+        self.cache = {}
+        for row in self.conn.execute(
+            "SELECT mmsi, " + ", ".join(self.fields) + " FROM Ships"
+        ):
+            self.cache[row[0]] = row[1:]
+
+        self.pending = {}
+        self.flushes = 0
+        self.rows_written = 0
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = True
+        self.flusher = threading.Thread(target=self.run, args=())
+        self.flusher.daemon = True
+        self.flusher.start()
+
+    def __len__(self):
+        return len(self.cache)
+
+    def get(self, mmsi):
+        """Return the cached static fields for a vessel, or None."""
+        row = self.cache.get(mmsi)
+        if row is None:
+            return None
+        return dict(zip(self.fields, row))
+
+    def put(self, mmsi, values):
+        """Record static fields for a vessel, to be written out later."""
+        row = tuple(values[key] for key in self.fields)
+        if self.cache.get(mmsi) == row:
+            return
+        self.cache[mmsi] = row
+        with self.lock:
+            self.pending[mmsi] = row
+            if len(self.pending) >= self.flush_threshold:
+                self.wakeup.set()
+
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return 0
+            rows = [(mmsi,) + row for mmsi, row in self.pending.items()]
+            self.pending = {}
+            # the connection is only ever used by the thread holding the lock
+            with self.conn:
+                self.conn.executemany(self.insert_sql, rows)
+            self.flushes += 1
+            self.rows_written += len(rows)
+        return len(rows)
+
+    def run(self):
+        while self.running:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def close(self):
+        self.running = False
+        self.wakeup.set()
+        self.flusher.join()
+        self.flush()
+        self.conn.close()
+
+    def stats(self):
+        return {
+            "cached": len(self.cache),
+            "pending": len(self.pending),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
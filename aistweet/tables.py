@@ -0,0 +1,424 @@
+import csv
+import importlib.resources
+import io
+import json
+
+# Lookup tables generated from the CSV files in aistweet/data, so that they
+# load with the module's bytecode instead of being parsed on every start.
+# Regenerate with `python -m aistweet.tables` after editing the CSV files.
+
+MID = {
+    201: "AL",
+    202: "AD",
+    203: "AT",
+    204: "PT",
+    205: "BE",
+    206: "BY",
+    207: "BG",
+    208: "VA",
+    209: "CY",
+    210: "CY",
+    211: "DE",
+    212: "CY",
+    213: "GE",
+    214: "MD",
+    215: "MT",
+    216: "AM",
+    218: "DE",
+    219: "DK",
+    220: "DK",
+    224: "ES",
+    225: "ES",
+    226: "FR",
+    227: "FR",
+    228: "FR",
+    229: "MT",
+    230: "FI",
+    231: "FO",
+    232: "GB",
+    233: "GB",
+    234: "GB",
+    235: "GB",
+    236: "GI",
+    237: "GR",
+    238: "HR",
+    239: "GR",
+    240: "GR",
+    241: "GR",
+    242: "MA",
+    243: "HU",
+    244: "NL",
+    245: "NL",
+    246: "NL",
+    247: "IT",
+    248: "MT",
+    249: "MT",
+    250: "IE",
+    251: "IE",
+    252: "LI",
+    253: "LU",
+    254: "MC",
+    255: "PT",
+    256: "MT",
+    257: "NO",
+    258: "NO",
+    259: "NO",
+    261: "PL",
+    262: "ME",
+    263: "PT",
+    264: "RO",
+    265: "SE",
+    266: "SE",
+    267: "SK",
+    268: "SM",
+    269: "CH",
+    270: "CZ",
+    271: "TR",
+    272: "UA",
+    273: "RU",
+    274: "MK",
+    275: "LV",
+    276: "EE",
+    277: "LT",
+    278: "SI",
+    279: "RS",
+    301: "AI",
+    303: "US",
+    304: "AG",
+    305: "AG",
+    306: "SX",
+    307: "AW",
+    308: "BS",
+    309: "BS",
+    310: "BM",
+    311: "BS",
+    312: "BZ",
+    314: "BB",
+    316: "CA",
+    319: "KY",
+    321: "CR",
+    323: "CU",
+    325: "DM",
+    327: "DO",
+    329: "GP",
+    330: "GD",
+    331: "GL",
+    332: "GT",
+    334: "HN",
+    336: "HT",
+    338: "US",
+    339: "JM",
+    341: "KN",
+    343: "LC",
+    345: "MX",
+    347: "MQ",
+    348: "MS",
+    350: "NI",
+    351: "PA",
+    352: "PA",
+    353: "PA",
+    354: "PA",
+    355: "PA",
+    356: "PA",
+    357: "PA",
+    358: "PR",
+    359: "SV",
+    361: "PM",
+    362: "TT",
+    364: "TC",
+    366: "US",
+    367: "US",
+    368: "US",
+    369: "US",
+    370: "PA",
+    371: "PA",
+    372: "PA",
+    373: "PA",
+    374: "PA",
+    375: "VC",
+    376: "VC",
+    377: "VC",
+    378: "VG",
+    379: "VI",
+    401: "AF",
+    403: "SA",
+    405: "BD",
+    408: "BH",
+    410: "BT",
+    412: "CN",
+    413: "CN",
+    414: "CN",
+    416: "TW",
+    417: "LK",
+    419: "IN",
+    422: "IR",
+    423: "AZ",
+    425: "IQ",
+    428: "IL",
+    431: "JP",
+    432: "JP",
+    434: "TM",
+    436: "KZ",
+    437: "UZ",
+    438: "JO",
+    440: "KR",
+    441: "KR",
+    443: "PS",
+    445: "KP",
+    447: "KW",
+    450: "LB",
+    451: "KG",
+    453: "MO",
+    455: "MV",
+    457: "MN",
+    459: "NP",
+    461: "OM",
+    463: "PK",
+    466: "QA",
+    468: "SY",
+    470: "AE",
+    471: "AE",
+    472: "TJ",
+    473: "YE",
+    475: "YE",
+    477: "HK",
+    478: "BA",
+    501: "AQ",
+    503: "AU",
+    506: "MM",
+    508: "BN",
+    510: "FM",
+    511: "PW",
+    512: "NZ",
+    514: "KH",
+    515: "KH",
+    516: "CX",
+    518: "CK",
+    520: "FJ",
+    523: "CC",
+    525: "ID",
+    529: "KI",
+    531: "LA",
+    533: "MY",
+    536: "MP",
+    538: "MH",
+    540: "NC",
+    542: "NU",
+    544: "NR",
+    546: "PF",
+    548: "PH",
+    550: "TL",
+    553: "PG",
+    555: "PN",
+    557: "SB",
+    559: "AS",
+    561: "WS",
+    563: "SG",
+    564: "SG",
+    565: "SG",
+    566: "SG",
+    567: "TH",
+    570: "TO",
+    572: "TV",
+    574: "VN",
+    576: "VU",
+    577: "VU",
+    578: "WF",
+    601: "ZA",
+    603: "AO",
+    605: "DZ",
+    607: "TF",
+    608: "SH",
+    609: "BI",
+    610: "BJ",
+    611: "BW",
+    612: "CF",
+    613: "CM",
+    615: "CG",
+    616: "KM",
+    617: "CV",
+    618: "TF",
+    619: "CI",
+    620: "KM",
+    621: "DJ",
+    622: "EG",
+    624: "ET",
+    625: "ER",
+    626: "GA",
+    627: "GH",
+    629: "GM",
+    630: "GW",
+    631: "GQ",
+    632: "GN",
+    633: "BF",
+    634: "KE",
+    635: "TF",
+    636: "LR",
+    637: "LR",
+    638: "SS",
+    642: "LY",
+    644: "LS",
+    645: "MU",
+    647: "MG",
+    649: "ML",
+    650: "MZ",
+    654: "MR",
+    655: "MW",
+    656: "NE",
+    657: "NG",
+    659: "NA",
+    660: "RE",
+    661: "RW",
+    662: "SD",
+    663: "SN",
+    664: "SC",
+    665: "SH",
+    666: "SO",
+    667: "SL",
+    668: "ST",
+    669: "SZ",
+    670: "TD",
+    671: "TG",
+    672: "TN",
+    674: "TZ",
+    675: "UG",
+    676: "CD",
+    677: "TZ",
+    678: "ZM",
+    679: "ZW",
+    701: "AR",
+    710: "BR",
+    720: "BO",
+    725: "CL",
+    730: "CO",
+    735: "EC",
+    740: "FK",
+    745: "GF",
+    750: "GY",
+    755: "PY",
+    760: "PE",
+    765: "SR",
+    770: "UY",
+    775: "VE",
+}
+
+SHIPTYPE = {
+    20: "Wing in Ground",
+    21: "Wing in Ground (HAZ-A)",
+    22: "Wing in Ground (HAZ-B)",
+    23: "Wing in Ground (HAZ-C)",
+    24: "Wing in Ground (HAZ-D)",
+    25: "Wing in Ground",
+    26: "Wing in Ground",
+    27: "Wing in Ground",
+    28: "Wing in Ground",
+    29: "Wing in Ground",
+    30: "Fishing",
+    31: "Towing",
+    32: "Towing",
+    33: "Dredging or Underwater Ops",
+    34: "Diving Ops",
+    35: "Military Ops",
+    36: "Sailing",
+    37: "Pleasure Craft",
+    40: "High Speed Craft",
+    41: "High Speed Craft (HAZ-A)",
+    42: "High Speed Craft (HAZ-B)",
+    43: "High Speed Craft (HAZ-C)",
+    44: "High Speed Craft (HAZ-D)",
+    45: "High Speed Craft",
+    46: "High Speed Craft",
+    47: "High Speed Craft",
+    48: "High Speed Craft",
+    49: "High Speed Craft",
+    50: "Pilot Vessel",
+    51: "Search and Rescue",
+    52: "Tug",
+    53: "Port Tender",
+    54: "Anti-Pollution Equipment",
+    55: "Law Enforcement",
+    56: "Local Vessel",
+    57: "Local Vessel",
+    58: "Medical Transport",
+    59: "Noncombatant Ship",
+    60: "Passenger",
+    61: "Passenger (HAZ-A)",
+    62: "Passenger (HAZ-B)",
+    63: "Passenger (HAZ-C)",
+    64: "Passenger (HAZ-D)",
+    65: "Passenger",
+    66: "Passenger",
+    67: "Passenger",
+    68: "Passenger",
+    69: "Passenger",
+    70: "Cargo",
+    71: "Cargo (HAZ-A)",
+    72: "Cargo (HAZ-B)",
+    73: "Cargo (HAZ-C)",
+    74: "Cargo (HAZ-D)",
+    75: "Cargo",
+    76: "Cargo",
+    77: "Cargo",
+    78: "Cargo",
+    79: "Cargo",
+    80: "Tanker",
+    81: "Tanker (HAZ-A)",
+    82: "Tanker (HAZ-B)",
+    83: "Tanker (HAZ-C)",
+    84: "Tanker (HAZ-D)",
+    85: "Tanker",
+    86: "Tanker",
+    87: "Tanker",
+    88: "Tanker",
+    89: "Tanker",
+    90: "Other",
+    91: "Other (HAZ-A)",
+    92: "Other (HAZ-B)",
+    93: "Other (HAZ-C)",
+    94: "Other (HAZ-D)",
+    95: "Other",
+    96: "Other",
+    97: "Other",
+    98: "Other",
+    99: "Other",
+}
+
+STATUS = {
+    0: "under way using engine",
+    1: "at anchor",
+    2: "not under command",
+    3: "restricted manoeuverability",
+    4: "constrained by her draught",
+    5: "moored",
+    6: "aground",
+    7: "engaged in fishing",
+    8: "under way sailing",
+}
+
+
+def read_csv(name):
+    """Parse one of the CSV files in aistweet/data into a dict."""
+    try:
+        text = (importlib.resources.files("aistweet.data") / f"{name}.csv").read_text()
+    except AttributeError:
+        # before Python 3.9
+        text = importlib.resources.read_text("aistweet.data", f"{name}.csv")
+    return {int(row[0]): row[1] for row in csv.reader(io.StringIO(text))}
+
+
+def format_table(name):
+    lines = [f"{name.upper()} = {{"]
+    for key, value in read_csv(name).items():
+        lines.append(f"    {key}: {json.dumps(value)},")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    with open(__file__) as f:
+        source = f.read()
+    start = source.index("\nMID = ")
+    end = source.index("\n\n\ndef read_csv")
+    tables = "\n\n".join(format_table(name) for name in ("mid", "shiptype", "status"))
+    with open(__file__, "w") as f:
+        f.write(source[: start + 1] + tables + source[end:])
@@ -1,22 +1,15 @@
+import asyncio
+import concurrent.futures
 import datetime
 import fractions
+import functools
+import math
 import os
 import threading
 import time
 
-from atproto import Client, models
 from event_scheduler import EventScheduler
 
-import astral
-import astral.sun
-import pytz
-from timezonefinder import TimezoneFinder
-
-try:
-    from picamera import PiCamera
-except ModuleNotFoundError:
-    PiCamera = lambda: None
-
 try:
     import gtts
 except ModuleNotFoundError:
@@ -29,13 +22,29 @@ try:
 except ModuleNotFoundError:
     adafruit_veml7700 = None
 
-from aistweet.compress import resize_and_compress
+from aistweet.camera import CameraManager, open_camera
+from aistweet.metrics import NULL_METRICS
+from aistweet.planner import ShotPlanner
+from aistweet.poster import AsyncPoster, Poster
+from aistweet.predictor import CrossingPredictor
+from aistweet.solar import SolarService
+from aistweet.units import kn_to_m_s
+from aistweet.validate import FrameValidator
 
 
 class Tweeter(object):
+    POSTER = Poster
     CAMERA_WARMUP = 1.0
     CAMERA_DELAY = 1.0
+    BURST_INTERVAL = 0.5
     LIGHT_LEVEL_MAX = 50
+    # frames captured for a shot before giving up on a usable one
+    CAPTURE_ATTEMPTS = 2
+    # how often, and how far from any crossing, to capture the empty view
+    BACKGROUND_INTERVAL = 300.0
+    BACKGROUND_CLEARANCE = 30.0
+    SPOOL_DIR = os.path.expanduser("~/.aistweet/spool")
+    TIMEZONE_CACHE = os.path.expanduser("~/.aistweet/timezone.json")
 
     def __init__(
         self,
@@ -44,32 +53,83 @@ class Tweeter(object):
         tts=False,
         light=False,
         logging=True,
+        spool_dir=None,
+        capture_dir=None,
+        fake_camera=False,
+        burst=1,
+        timezone=None,
+        timezone_cache=None,
+        station=None,
+        camera_num=0,
+        predictor=None,
+        poster=None,
+        metrics=None,
+        validate=False,
     ):
         self.tracker = tracker
 
         self.direction = direction
+        self.station = station or self.tracker.coordinates
 
         self.tts = tts if gtts is not None else False
 
         self.logging = logging
 
-        self.schedule = {}
-        self.scheduler = EventScheduler("tweeter")
-
-        self.lock = threading.RLock()
+        # the timer for the next planned shot, and the shot
+        self.next_shot = None
+        # a shot taken off the plan whose frame is still to be captured
+        self.capturing = None
+        # cameras sharing a predictor have every vessel report evaluated
+        # against all of their axes at once
+        self.predictor = predictor or CrossingPredictor(self.tracker)
+        self.axis = self.predictor.add_axis(self.direction, self.station)
+
+        metrics = metrics or NULL_METRICS
+        labels = {"axis": self.axis, "station": f"{self.station[0]},{self.station[1]}"}
+        self.lock = metrics.instrument_lock("tweeter", threading.RLock(), labels)
+        # reports and expirations arrive on different threads
+        self.schedule_lock = threading.RLock()
+        self.capture_seconds = metrics.histogram(
+            "capture_seconds", "Time to capture the frame for a shot", labels
+        )
+        self.update_latency = metrics.histogram(
+            "update_latency_seconds",
+            "Time from a vessel report arriving to the camera checking it",
+            labels,
+        )
+        # shared by every camera, and counted for each one's axis as well
+        metrics.register("predictor", self.predictor.stats)
+        metrics.register(
+            "axis", functools.partial(self.predictor.axis_stats, self.axis), labels
+        )
+        self.planner = ShotPlanner(
+            self.CAMERA_DELAY + (burst - 1) * self.BURST_INTERVAL, self.CAMERA_WARMUP
+        )
+        metrics.register("planner", self.planner.stats, labels)
 
         # set up location data
-        tf = TimezoneFinder()
-        self.location = astral.LocationInfo(
-            "AIS Station",
-            "Earth",
-            tf.timezone_at(lat=self.tracker.lat, lng=self.tracker.lon),
-            self.tracker.lat,
-            self.tracker.lon,
+        self.solar = SolarService(
+            self.station[0],
+            self.station[1],
+            timezone_cache or self.TIMEZONE_CACHE,
+            timezone,
         )
 
         # set up camera
-        self.camera = PiCamera()
+        camera = open_camera(fake_camera, camera_num)
+        self.camera = None
+        if camera is not None:
+            self.camera = CameraManager(camera, self.CAMERA_WARMUP)
+            metrics.register("camera", self.camera.stats, labels)
+        self.capture_dir = capture_dir
+        self.burst = burst
+
+        # set up validation of captured frames
+        self.validator = None
+        self.background_event = None
+        if validate and self.camera is not None:
+            self.validator = FrameValidator(metrics, labels)
+            metrics.register("validator", self.validator.stats, labels)
 
         # set up light sensor
         self.light_sensor = None
@@ -77,189 +137,333 @@ class Tweeter(object):
             i2c = busio.I2C(board.SCL, board.SDA)
             self.light_sensor = adafruit_veml7700.VEML7700(i2c)
 
-        self.scheduler.start()
+        # set up background posting
+        self.poster = poster or self.POSTER(
+            os.getenv("BLUESKY_USERNAME"),
+            os.getenv("BLUESKY_PASSWORD"),
+            spool_dir or self.SPOOL_DIR,
+            log=self.log,
+            metrics=metrics,
+        )
+
+        self.start()
+        self.prepare_camera()
+        if self.validator is not None:
+            self.background_event = self.enter(0.0, 3, self.refresh_background)
 
-        # register callback
-        self.tracker.message_callbacks.append(self.check)
+        # register callbacks
+        self.subscriber = self.tracker.subscribe(self.check, f"tweeter{self.axis}")
+        self.tracker.expiry_callbacks.append(self.expire)
+
+    def start(self):
+        self.scheduler = EventScheduler("tweeter")
+        self.scheduler.start()
 
     def stop(self):
-        self.scheduler.stop()
+        self.tracker.dispatcher.unsubscribe(self.subscriber)
+        # pending shots and background captures are dropped
+        self.scheduler.stop(hard_stop=True)
+        self.poster.stop()
+        if self.camera is not None:
+            self.camera.close()
+
+    def enter(self, delay, priority, action, *args):
+        """Have action(*args) called after `delay` seconds."""
+        # the scheduler holds its own lock while running an action, so one
+        # that takes the schedule lock runs on a thread of its own
+        return self.scheduler.enter(
+            delay, priority, self.spawn, arguments=(action, args)
+        )
+
+    def spawn(self, action, args):
+        threading.Thread(target=action, args=args, daemon=True).start()
+
+    def cancel(self, event):
+        try:
+            self.scheduler.cancel(event)
+        except (KeyError, ValueError, AttributeError):
+            pass
 
     def log(self, mmsi, message):
         if self.logging:
             print(f"[{datetime.datetime.now()}] {self.shipname(mmsi)}: {message}")
 
     def check(self, mmsi, t):
-        crossing, depth = self.tracker.crossing(mmsi, self.direction)
+        self.update_latency.observe(time.time() - t)
+        with self.schedule_lock:
+            self.check_crossing(mmsi)
+
+    @property
+    def offset(self):
+        # seconds from firing a shot to the middle of its burst
+        return self.CAMERA_DELAY + (self.burst - 1) / 2.0 * self.BURST_INTERVAL
+
+    def check_crossing(self, mmsi):
+        crossing, depth = self.predictor.predict(mmsi, self.axis)
         if crossing is None:
             return
-        delta = crossing - time.time() - self.CAMERA_WARMUP - self.CAMERA_DELAY
+        now = time.time()
+        delta = crossing - now - self.offset
         if 0.0 < delta < 60.0:
-            try:
-                existing_event = self.schedule.pop(mmsi)
-                self.scheduler.cancel(existing_event)
-            except (KeyError, ValueError, AttributeError):
-                pass
-            self.schedule[mmsi] = self.scheduler.enter(
-                delta, 1, self.snap_and_tweet, arguments=(mmsi, depth)
-            )
-            self.log(mmsi, f"scheduled for tweet in {delta} seconds")
+            if not self.predictor.needs_reschedule(mmsi, crossing, self.axis):
+                return
+            length = self.tracker.dimensions(mmsi)[0]
+            speed = self.lateral_speed(mmsi)
+            if not self.planner.add(mmsi, crossing, depth, length, speed, now):
+                return
+            self.predictor.mark_scheduled(mmsi, crossing, self.axis)
+            sigma = self.tracker.crossing_uncertainty(mmsi, crossing, self.direction)
+            if sigma is None:
+                self.log(mmsi, f"crossing in {delta} seconds")
+            else:
+                self.log(mmsi, f"crossing in {delta} (+/- {sigma:.1f}) seconds")
+            self.replan()
 
-    def purge_schedule(self, mmsi):
-        try:
-            del self.schedule[mmsi]
-            self.log(mmsi, "removed from schedule")
-        except KeyError:
-            pass
+    def lateral_speed(self, mmsi):
+        """Return the speed in m/s of a vessel across the camera axis."""
+        ship = self.tracker[mmsi]
+        speed, course = ship["speed"], ship["course"]
+        estimate = self.tracker.estimate(mmsi, ship)
+        if estimate is not None:
+            speed, course = estimate.speed, estimate.course
+        if speed is None or course is None:
+            return 0.0
+        return kn_to_m_s(speed) * abs(math.sin(math.radians(course - self.direction)))
+
+    def replan(self):
+        """Plan the camera's shots afresh and set the timer for the first."""
+        now = time.time()
+        shots = self.planner.plan(now + self.offset)
+        previous = None
+        if self.next_shot is not None:
+            self.cancel(self.next_shot[0])
+            previous = self.next_shot[1].mmsis
+            self.next_shot = None
+        if shots:
+            shot = shots[0]
+            delay = max(shot.t - self.offset - now, 0.0)
+            self.next_shot = (self.enter(delay, 1, self.snap_and_tweet, shot), shot)
+            if shot.mmsis != previous:
+                names = ", ".join(self.shipname(mmsi) for mmsi in shot.mmsis[1:])
+                self.log(
+                    shot.mmsis[0],
+                    f"scheduled for tweet in {delay:.1f} seconds"
+                    + (f" with {names}" if names else ""),
+                )
+        self.prepare_camera()
 
-    def snap_and_tweet(self, mmsi, depth):
-        # only tweet once while this ship is scheduled (60 second cooldown)
-        if mmsi in self.schedule and self.schedule[mmsi] is None:
+    def prepare_camera(self):
+        """Warm the camera up in the mode of the next shot (or a wide view)."""
+        # the shot being captured keeps the mode it was warmed up in
+        if self.camera is None or self.capturing is not None:
+            return
+        shot = self.next_shot
+        mode = self.camera_mode(True if shot is None else shot[1].large)
+        if mode is not None:
+            self.camera.prepare(mode, blocking=False)
+
+    def expire(self, mmsi, evicted):
+        with self.schedule_lock:
+            self.drop_shot(mmsi)
+
+    def drop_shot(self, mmsi):
+        # a crossing predicted from a position that is no longer current is
+        # dropped, and the shots planned without it
+        if self.planner.remove(mmsi):
+            self.log(mmsi, "position expired, removed from schedule")
+            self.replan()
+        self.predictor.forget(mmsi, self.axis)
+
+    def snap_and_tweet(self, shot):
+        if not self.begin_shot(shot):
             return
-        self.schedule[mmsi] = None
-
-        self.log(mmsi, "ship in view, tweeting...")
         with self.lock:
-            # determine whether this is a "large" ship in FOV (horiz. 62.2deg)
-            # large if ship length > 0.9 * tan(31.1) * distance to ship
-            large = self.tracker.dimensions(mmsi)[0] > (0.542915 * depth)
-
-            # grab the image
-            image_path = os.path.join("/tmp", f"{mmsi}.jpg")
-            if not self.snap(image_path, large):
-                self.log(mmsi, "image capture aborted")
+            frame = self.capture(shot)
+            if not self.submit_shot(shot, frame):
                 return
-            resize_and_compress(image_path, image_path, 1000000, (1640, 1232))
-            self.log(mmsi, f"image captured to {image_path}")
-
-            # set up Bluesky connection
-            username = os.getenv("BLUESKY_USERNAME")
-            password = os.getenv("BLUESKY_PASSWORD")
-            client = Client("https://bsky.social")
-
-            for attempt in range(1, 6):
-                try:
-                    client.login(username, password)
-                    break
-                except Exception as e:
-                    self.log(mmsi, f"login attempt {attempt} failed: {e}")
-                    if attempt == 5:
-                        return
-                    sleep_time = 2 * (2 ** (attempt - 1))
-                    self.log(mmsi, f"retrying in {sleep_time} seconds...")
-                    time.sleep(sleep_time)
-
-            # create post
-            try:
-                shipname = self.shipname(mmsi)
-
-                with open(image_path, "rb") as image_file:
-                    upload = client.upload_blob(image_file)
-                images = [
-                    models.AppBskyEmbedImages.Image(alt=shipname, image=upload.blob)
-                ]
-                embed = models.AppBskyEmbedImages.Main(images=images)
-
-                text = self.generate_text(mmsi)
-
-                url = f"https://www.vesselfinder.com/vessels/details/{mmsi}"
-                facets = [
-                    {
-                        "index": {"byteStart": 9, "byteEnd": 9 + len(shipname)},
-                        "features": [
-                            {"$type": "app.bsky.richtext.facet#link", "uri": url}
-                        ],
-                    }
-                ]
-
-                client.com.atproto.repo.create_record(
-                    models.ComAtprotoRepoCreateRecord.Data(
-                        repo=client.me.did,
-                        collection=models.ids.AppBskyFeedPost,
-                        record=models.AppBskyFeedPost.Record(
-                            created_at=client.get_current_time_iso(),
-                            text=text,
-                            embed=embed,
-                            facets=facets,
-                        ),
-                    )
-                )
-            except Exception as e:
-                self.log(mmsi, f"post error: {e}")
-
-            # clean up the image
-            os.remove(image_path)
-
-            # remove event from schedule after a minute
-            self.scheduler.enter(60.0, 2, self.purge_schedule, arguments=(mmsi,))
 
             # announce the ship using TTS
             if self.tts:
-                speech_path = os.path.join("/tmp", f"{mmsi}.mp3")
-                try:
-                    speech = gtts.gTTS(
-                        text=self.shipname(mmsi).title(), lang="en", slow=False
-                    )
-                    speech.save(speech_path)
+                speech_path = self.speech(shot.mmsis[0])
+                if speech_path is not None:
                     os.system(f"mpg321 -q {speech_path}")
                     os.remove(speech_path)
-                except gtts.tts.gTTSError:
-                    pass
 
-        self.log(mmsi, "done tweeting")
-
-    def snap(self, path, large):
-        if self.camera is None:
+        self.log(shot.mmsis[0], "queued for posting")
+
+    def begin_shot(self, shot):
+        """Take a shot off the plan; return whether it is still worth taking."""
+        with self.schedule_lock:
+            # a shot whose timer fired as it was replanned has been replaced
+            if self.next_shot is None or self.next_shot[1] is not shot:
+                return False
+            self.next_shot = None
+            taken = self.planner.take(shot, time.time() + self.offset)
+            if taken:
+                self.capturing = shot
+            self.replan()
+            for mmsi in shot.mmsis:
+                self.predictor.forget(mmsi, self.axis)
+        if not taken:
+            self.log(shot.mmsis[0], "ship out of view, shot dropped")
             return False
 
+        self.log(shot.mmsis[0], "ship in view, tweeting...")
+        return True
+
+    def capture(self, shot):
+        """Capture the frame for a shot, or None if there is no usable one
+        before the ship is out of view."""
         with self.lock:
-            # set zoom based on ship size
-            self.camera.zoom = (0.0, 0.0, 1.0, 1.0) if large else (0.25, 0.35, 0.5, 0.5)
-            # set exposure mode based on dawn/dusk times
-            sun = astral.sun.sun(
-                self.location.observer,
-                datetime.date.today(),
-                tzinfo=self.location.timezone,
+            try:
+                return self.capture_frame(shot)
+            finally:
+                # the camera is free to be readied for the next shot
+                self.capturing = None
+
+    def capture_frame(self, shot):
+        for attempt in range(self.CAPTURE_ATTEMPTS):
+            # the shot before may have kept the camera busy past the window
+            if time.time() + self.offset > shot.end:
+                self.log(shot.mmsis[0], "ship out of view before capture")
+                return None
+            start = time.perf_counter()
+            frame = self.snap(shot.large)
+            self.capture_seconds.observe(time.perf_counter() - start)
+            if frame is None or self.validator is None:
+                return frame
+
+            # rejected before any encoding or uploading
+            failed = self.validator.check(frame, self.camera.mode)
+            if failed is None:
+                return frame
+            self.log(shot.mmsis[0], f"frame rejected on {failed}")
+            # another frame will be no brighter
+            if failed == "brightness":
+                return None
+        return None
+
+    def refresh_background(self):
+        self.capture_background()
+        self.background_event = self.enter(
+            self.BACKGROUND_INTERVAL, 3, self.refresh_background
+        )
+
+    def capture_background(self):
+        """Capture the view for the validator's background, unless a vessel
+        may be in it."""
+        with self.schedule_lock:
+            if not self.planner.clear(
+                time.time() + self.offset, self.BACKGROUND_CLEARANCE
+            ):
+                return
+        with self.lock:
+            mode = self.camera.mode
+            if mode is None:
+                return
+            frame = self.camera.capture(mode)
+        self.validator.update_background(frame, mode)
+
+    def submit_shot(self, shot, frame):
+        """Hand a captured frame over for posting, if there is one."""
+        mmsi = shot.mmsis[0]
+        self.prepare_camera()
+        if frame is None:
+            self.log(mmsi, "image capture aborted")
+            return False
+        if self.capture_dir:
+            image_path = os.path.join(self.capture_dir, f"{mmsi}.jpg")
+            with open(image_path, "wb") as f:
+                f.write(frame.getbuffer())
+            self.log(mmsi, f"image captured to {image_path}")
+        else:
+            self.log(mmsi, "image captured")
+
+        # hand the post over to the background poster
+        text, facets = self.post_text(shot.mmsis)
+        alt = ", ".join(self.shipname(mmsi) for mmsi in shot.mmsis)
+        frame.seek(0)
+        self.poster.submit(mmsi, frame, text, alt, facets)
+        return True
+
+    def post_text(self, mmsis):
+        """Return the text of a post about the vessels in one frame, and
+        facets linking each of their names."""
+        text = ""
+        facets = []
+        for i, mmsi in enumerate(mmsis):
+            if i == 1:
+                text += "\nAlso in frame: "
+            elif i > 1:
+                text += ", "
+            flag = self.tracker.flag(mmsi)
+            if flag:
+                text += f"{flag} "
+            # the name's byte offsets, as it is placed in the text
+            start = len(text.encode())
+            text += self.shipname(mmsi)
+            url = f"https://www.vesselfinder.com/vessels/details/{mmsi}"
+            facets.append(
+                {
+                    "index": {"byteStart": start, "byteEnd": len(text.encode())},
+                    "features": [{"$type": "app.bsky.richtext.facet#link", "uri": url}],
+                }
             )
-            now = self.now()
-            if now < sun["dawn"] or now > sun["dusk"]:
-                if self.light_sensor is not None:
-                    if self.light_sensor.light > self.LIGHT_LEVEL_MAX:
-                        return False
-                self.camera.resolution = (1640, 1232)
-                self.camera.framerate = fractions.Fraction(2, 1)
-                self.camera.exposure_mode = "night"
-            else:
-                self.camera.resolution = (1640, 1232) if large else (3280, 2464)
-                self.camera.framerate = fractions.Fraction(30, 1)
-                self.camera.exposure_mode = "auto"
+            if i == 0:
+                text += self.describe(mmsi)
+        return text, facets
 
-            # capture image
-            self.camera.start_preview()
-            time.sleep(self.CAMERA_WARMUP)
-            self.camera.capture(path)
-            self.camera.stop_preview()
-            return True
+    def speech(self, mmsi):
+        """Return the path of an MP3 of the ship's name, or None."""
+        speech_path = os.path.join("/tmp", f"{mmsi}.mp3")
+        try:
+            speech = gtts.gTTS(text=self.shipname(mmsi).title(), lang="en", slow=False)
+            speech.save(speech_path)
+        except gtts.tts.gTTSError:
+            return None
+        return speech_path
 
-    def now(self):
-        return pytz.utc.localize(datetime.datetime.utcnow()).astimezone(
-            pytz.timezone(self.location.timezone)
-        )
+    def snap(self, large):
+        if self.camera is None:
+            return None
 
-    def shipname(self, mmsi):
-        return self.tracker[mmsi]["shipname"] or "(Unidentified)"
+        mode = self.camera_mode(large)
+        if mode is None:
+            return None
+        with self.lock:
+            return self.camera.burst(mode, self.burst, self.BURST_INTERVAL)
+
+    def camera_mode(self, large):
+        # set zoom based on ship size
+        zoom = (0.0, 0.0, 1.0, 1.0) if large else (0.25, 0.35, 0.5, 0.5)
+        # set exposure mode based on dawn/dusk times
+        if self.solar.is_night():
+            if self.light_sensor is not None:
+                if self.light_sensor.light > self.LIGHT_LEVEL_MAX:
+                    return None
+            return (zoom, (1640, 1232), fractions.Fraction(2, 1), "night")
+        return (
+            zoom,
+            (1640, 1232) if large else (3280, 2464),
+            fractions.Fraction(30, 1),
+            "auto",
+        )
 
-    def generate_text(self, mmsi):
-        text = ""
+    def now(self):
+        return self.solar.now()
 
-        flag = self.tracker.flag(mmsi)
-        if flag:
-            text += f"{flag} "
+    def shipname(self, mmsi):
+        try:
+            return self.tracker[mmsi]["shipname"] or "(Unidentified)"
+        except KeyError:
+            # spooled posts can outlive the tracker's memory of a ship
+            return "(Unidentified)"
 
+    def describe(self, mmsi):
+        """Return what follows a ship's name in a post about it."""
         ship = self.tracker[mmsi]
 
-        text += self.shipname(mmsi)
-        text += f", {self.tracker.ship_type(mmsi)}"
+        text = f", {self.tracker.ship_type(mmsi)}"
 
         length, width = self.tracker.dimensions(mmsi)
         if length > 0 and width > 0:
@@ -279,3 +483,74 @@ class Tweeter(object):
             text += f", course: {course:.1f} \N{DEGREE SIGN} / speed: {speed:.1f} kn"
 
         return text
+
+
+class AsyncTweeter(Tweeter):
+    """Tweeter for a tracker driven by an AsyncRuntime.
+
+    Shots are timed by the event loop and captured on a thread of their
+    own, so the loop is never held up, and the ship's name is played by a
+    subprocess the loop waits on. Create it, and stop it, on the loop.
+    """
+
+    POSTER = AsyncPoster
+
+    def start(self):
+        self.loop = asyncio.get_event_loop()
+        # one capture at a time, in the order they were due
+        self.executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.tasks = set()
+
+    async def stop(self):
+        self.tracker.dispatcher.unsubscribe(self.subscriber)
+        if self.next_shot is not None:
+            self.next_shot[0].cancel()
+        if self.background_event is not None:
+            self.background_event.cancel()
+        if self.tasks:
+            await asyncio.wait(self.tasks)
+        # a background capture under way has set its next one by now
+        if self.background_event is not None:
+            self.background_event.cancel()
+        await self.poster.stop()
+        if self.camera is not None:
+            await self.loop.run_in_executor(self.executor, self.camera.close)
+        self.executor.shutdown()
+
+    def enter(self, delay, priority, action, *args):
+        if asyncio.iscoroutinefunction(action):
+            return self.loop.call_later(delay, self.spawn, action, args)
+        return self.loop.call_later(delay, action, *args)
+
+    def spawn(self, action, args):
+        task = self.loop.create_task(action(*args))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def cancel(self, event):
+        event.cancel()
+
+    async def refresh_background(self):
+        await self.loop.run_in_executor(self.executor, self.capture_background)
+        self.background_event = self.enter(
+            self.BACKGROUND_INTERVAL, 3, self.refresh_background
+        )
+
+    async def snap_and_tweet(self, shot):
+        if not self.begin_shot(shot):
+            return
+        frame = await self.loop.run_in_executor(self.executor, self.capture, shot)
+        if not self.submit_shot(shot, frame):
+            return
+        mmsi = shot.mmsis[0]
+
+        if self.tts:
+            speech_path = await self.loop.run_in_executor(None, self.speech, mmsi)
+            if speech_path is not None:
+                process = await asyncio.create_subprocess_exec(
+                    "mpg321", "-q", speech_path
+                )
+                await process.wait()
+                os.remove(speech_path)
+
+        self.log(mmsi, "queued for posting")
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import numpy as np
+
+from aistweet.metrics import NULL_METRICS
+
+
+class FrameValidator(object):
+    """Cheap checks that a captured frame is worth posting.
+
+    A frame is decoded at an eighth of its size or less, scaled down in the
+    JPEG decoder itself, and its brightness, sharpness and difference from a
+    background of the same camera mode are worked out in grayscale with
+    numpy. Checks run cheapest first, and stop at the first one failed.
+
+    Backgrounds are running averages of frames captured while no vessel is
+    expected in view; until a mode has one, its frames pass that check.
+    """
+
+    # size of the thumbnail compared against the background
+    SIZE = (80, 60)
+    # mean brightness (0-255) of a usable frame
+    MIN_BRIGHTNESS = 12.0
+    MAX_BRIGHTNESS = 250.0
+    # variance of the Laplacian of a frame in focus and not fogged over
+    MIN_SHARPNESS = 10.0
+    # by how much a pixel has to change, and the share of them that a vessel
+    # in view changes
+    CHANGE_LEVEL = 24.0
+    MIN_CHANGED = 0.01
+    # weight of each new frame in a running background
+    BACKGROUND_RATE = 0.25
+
+    CHECKS = ("brightness", "sharpness", "difference")
+
+    def __init__(self, metrics=None, labels=None):
+        metrics = metrics or NULL_METRICS
+        self.seconds = {
+            check: metrics.histogram(
+                "validation_seconds",
+                "Time to decode a captured frame or run a check on it",
+                {**(labels or {}), "check": check},
+            )
+            for check in ("decode",) + self.CHECKS
+        }
+        self.backgrounds = {}
+        self.lock = threading.Lock()
+
+        self.passed = 0
+        self.rejected = dict.fromkeys(self.CHECKS, 0)
+        self.background_updates = 0
+
+    def decode(self, frame):
+        """Return a frame in grayscale at reduced size, and as a thumbnail."""
+        from PIL import Image
+
+        frame.seek(0)
+        with Image.open(frame) as image:
+            image.draft("L", (image.size[0] // 8, image.size[1] // 8))
+            image = image.convert("L")
+            pixels = np.asarray(image, dtype=np.float32)
+            thumbnail = np.asarray(
+                image.resize(self.SIZE, Image.BILINEAR), dtype=np.float32
+            )
+        frame.seek(0)
+        return pixels, thumbnail
+
+    @staticmethod
+    def sharpness(pixels):
+        laplacian = (
+            4.0 * pixels[1:-1, 1:-1]
+            - pixels[:-2, 1:-1]
+            - pixels[2:, 1:-1]
+            - pixels[1:-1, :-2]
+            - pixels[1:-1, 2:]
+        )
+        return float(laplacian.var())
+
+    def changed(self, thumbnail, background):
+        """Return the share of the thumbnail that differs from a background."""
+        # compared about their means, so a change of exposure is no vessel
+        difference = np.abs(
+            (thumbnail - thumbnail.mean()) - (background - background.mean())
+        )
+        return np.count_nonzero(difference > self.CHANGE_LEVEL) / difference.size
+
+    def check(self, frame, mode):
+        """Return the name of the check a frame fails, or None."""
+        start = time.perf_counter()
+        pixels, thumbnail = self.decode(frame)
+        now = time.perf_counter()
+        self.seconds["decode"].observe(now - start)
+
+        failed = None
+        for check in self.CHECKS:
+            start = now
+            if check == "brightness":
+                brightness = float(thumbnail.mean())
+                ok = self.MIN_BRIGHTNESS <= brightness <= self.MAX_BRIGHTNESS
+            elif check == "sharpness":
+                ok = self.sharpness(pixels) >= self.MIN_SHARPNESS
+            else:
+                with self.lock:
+                    background = self.backgrounds.get(mode)
+                ok = (
+                    background is None
+                    or self.changed(thumbnail, background) >= self.MIN_CHANGED
+                )
+            now = time.perf_counter()
+            self.seconds[check].observe(now - start)
+            if not ok:
+                failed = check
+                break
+
+        with self.lock:
+            if failed is None:
+                self.passed += 1
+            else:
+                self.rejected[failed] += 1
+        return failed
+
+    def update_background(self, frame, mode):
+        """Blend a frame of the empty view into the background of its mode."""
+        thumbnail = self.decode(frame)[1]
+        with self.lock:
+            background = self.backgrounds.get(mode)
+            if background is None:
+                self.backgrounds[mode] = thumbnail
+            else:
+                # a new array, so a check reading the old one is unaffected
+                self.backgrounds[mode] = background + self.BACKGROUND_RATE * (
+                    thumbnail - background
+                )
+            self.background_updates += 1
+
+    def stats(self):
+        with self.lock:
+            stats = {
+                "passed": self.passed,
+                "backgrounds": len(self.backgrounds),
+                "background_updates": self.background_updates,
+            }
+            for check, count in self.rejected.items():
+                stats[f"rejected_{check}"] = count
+            return stats
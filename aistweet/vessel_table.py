@@ -0,0 +1,331 @@
+import array
+import collections
+import math
+
+import numpy as np
+
+INT_NONE = -(2**31)
+
+
+class VesselRecord(object):
+    """Dict-like view of one row of a VesselTable."""
+
+    __slots__ = ("table", "row", "mmsi")
+
+    def __init__(self, table, row, mmsi):
+        self.table = table
+        self.row = row
+        self.mmsi = mmsi
+
+    def __getitem__(self, key):
+        return self.table.read(self.row, key)
+
+    def __setitem__(self, key, value):
+        self.table.write(self.row, key, value)
+
+    def __contains__(self, key):
+        return key in self.table.columns
+
+    def __iter__(self):
+        return iter(self.table.columns)
+
+    def __len__(self):
+        return len(self.table.columns)
+
+    def __repr__(self):
+        return f"VesselRecord({self.mmsi}, {dict(self.items())})"
+
+    def keys(self):
+        return self.table.columns.keys()
+
+    def items(self):
+        return [(key, self[key]) for key in self.table.columns]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, values):
+        for key, value in values.items():
+            self[key] = value
+
+
+class VesselSnapshot(object):
+    """Immutable copy of one vessel's fields as of its last published update."""
+
+    __slots__ = ("index", "values", "mmsi")
+
+    def __init__(self, index, values, mmsi):
+        self.index = index
+        self.values = values
+        self.mmsi = mmsi
+
+    def __getitem__(self, key):
+        value = self.values[self.index[key]]
+        if value == INT_NONE or value != value:
+            return None
+        return value
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __repr__(self):
+        return f"VesselSnapshot({self.mmsi}, {dict(self.items())})"
+
+    def keys(self):
+        return self.index.keys()
+
+    def items(self):
+        return [(key, self[key]) for key in self.index]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class TimeOrder(object):
+    """Table rows linked in order of a timestamp, oldest first.
+
+    Moving a row to the back and taking rows off the front are O(1), so
+    finding everything older than a cutoff costs O(rows found).
+    """
+
+    def __init__(self):
+        self.times = array.array("d")
+        self.prev = array.array("i")
+        self.next = array.array("i")
+        self.head = -1
+        self.tail = -1
+
+    def grow(self):
+        # rows that are not linked have a NaN time
+        self.times.append(math.nan)
+        self.prev.append(-1)
+        self.next.append(-1)
+
+    def linked(self, row):
+        return self.times[row] == self.times[row]
+
+    def oldest(self):
+        return self.head
+
+    def append(self, row, t):
+        if self.linked(row):
+            self.unlink(row)
+        self.times[row] = t
+        self.prev[row] = self.tail
+        self.next[row] = -1
+        if self.tail >= 0:
+            self.next[self.tail] = row
+        else:
+            self.head = row
+        self.tail = row
+
+    def unlink(self, row):
+        if not self.linked(row):
+            return
+        prev, next = self.prev[row], self.next[row]
+        if prev >= 0:
+            self.next[prev] = next
+        else:
+            self.head = next
+        if next >= 0:
+            self.prev[next] = prev
+        else:
+            self.tail = prev
+        self.times[row] = math.nan
+
+
+class VesselTable(object):
+    """Columnar store of vessel state with one row per MMSI.
+
+    Numeric fields live in typed arrays (with NaN or INT_NONE standing in
+    for None) and text fields in plain lists. Rows belonging to vessels not
+    heard from in `max_age` seconds are recycled for new vessels, and the
+    least recently heard vessel is evicted once `capacity` rows are in use.
+    Rows are also kept in order of their last position report, so that
+    positions can be expired once they are too old to extrapolate from.
+
+    Rows are only written under the owner's lock. Readers instead use the
+    immutable snapshot last published for a vessel, which never shows a
+    half-applied update and needs no lock at all.
+    """
+
+    CAPACITY = 65536
+    MAX_AGE = 86400.0
+
+    # array typecode per field, or None for text
+    TYPECODES = {
+        "shipname": None,
+        "shiptype": "i",
+        "to_bow": "i",
+        "to_stern": "i",
+        "to_port": "i",
+        "to_starboard": "i",
+        "imo": "i",
+        "destination": None,
+        "draught": "d",
+        "lat": "d",
+        "lon": "d",
+        "status": "i",
+        "heading": "i",
+        "course": "d",
+        "speed": "d",
+        "last_update": "d",
+    }
+
+    def __init__(self, defaults, capacity=None, max_age=None):
+        self.defaults = dict(defaults)
+        self.capacity = capacity or self.CAPACITY
+        self.max_age = max_age or self.MAX_AGE
+
+        self.columns = collections.OrderedDict()
+        self.nulls = {}
+        for key in self.defaults:
+            typecode = self.TYPECODES.get(key)
+            if typecode is None:
+                self.columns[key] = []
+                self.nulls[key] = None
+            else:
+                self.columns[key] = array.array(typecode)
+                self.nulls[key] = math.nan if typecode == "d" else INT_NONE
+
+        self.index = {key: i for i, key in enumerate(self.columns)}
+        self.snapshots = {}
+
+        self.rows = {}
+        self.free = []
+        self.size = 0
+
+        # per-row bookkeeping, with rows linked in order of last touch and
+        # of last position report
+        self.mmsis = array.array("q")
+        self.touched = TimeOrder()
+        self.positioned = TimeOrder()
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, mmsi):
+        return mmsi in self.rows
+
+    def __iter__(self):
+        return iter(list(self.rows))
+
+    def __getitem__(self, mmsi):
+        return VesselRecord(self, self.rows[mmsi], mmsi)
+
+    def __delitem__(self, mmsi):
+        row = self.rows.pop(mmsi)
+        self.snapshots.pop(mmsi, None)
+        self.touched.unlink(row)
+        self.positioned.unlink(row)
+        self.free.append(row)
+
+    def read(self, row, key):
+        value = self.columns[key][row]
+        if value == INT_NONE or value != value:
+            return None
+        return value
+
+    def write(self, row, key, value):
+        self.columns[key][row] = self.nulls[key] if value is None else value
+
+    def publish(self, mmsi):
+        """Replace the snapshot readers see with a copy of the current row."""
+        row = self.rows[mmsi]
+        values = tuple(column[row] for column in self.columns.values())
+        self.snapshots[mmsi] = VesselSnapshot(self.index, values, mmsi)
+
+    def snapshot(self, mmsi):
+        return self.snapshots[mmsi]
+
+    def gather(self, key, rows):
+        """Copy a numeric column for the given rows, with None as NaN."""
+        column = self.columns[key]
+        values = np.frombuffer(column, dtype=column.typecode)[rows].astype(float)
+        if column.typecode != "d":
+            values[values == INT_NONE] = np.nan
+        return values
+
+    def add(self, mmsi, t):
+        """Allocate and initialize a row for a new vessel.
+
+        Call evict() first to keep to the capacity and act on what it frees.
+        """
+        if self.free:
+            row = self.free.pop()
+        else:
+            row = self.size
+            self.size += 1
+            for key, column in self.columns.items():
+                column.append(self.nulls[key])
+            self.mmsis.append(0)
+            self.touched.grow()
+            self.positioned.grow()
+        self.rows[mmsi] = row
+        self.mmsis[row] = mmsi
+        for key, value in self.defaults.items():
+            self.write(row, key, value)
+        self.touched.append(row, t)
+        return VesselRecord(self, row, mmsi)
+
+    def touch(self, mmsi, t):
+        self.touched.append(self.rows[mmsi], t)
+
+    def position_reported(self, mmsi, t):
+        self.positioned.append(self.rows[mmsi], t)
+
+    def evict(self, t):
+        """Free rows of stale vessels, and the oldest vessel if at capacity.
+
+        Return the MMSIs of the evicted vessels.
+        """
+        evicted = []
+        while self.touched.head >= 0:
+            row = self.touched.head
+            if (
+                t - self.touched.times[row] <= self.max_age
+                and len(self.rows) < self.capacity
+            ):
+                break
+            evicted.append(self.mmsis[row])
+            del self[self.mmsis[row]]
+            self.evicted += 1
+        return evicted
+
+    def expire_positions(self, t, ttl, keys):
+        """Clear the given fields of vessels without a position report for
+        `ttl` seconds; return their MMSIs."""
+        expired = []
+        while self.positioned.head >= 0:
+            row = self.positioned.head
+            if t - self.positioned.times[row] <= ttl:
+                break
+            self.positioned.unlink(row)
+            for key in keys:
+                self.write(row, key, None)
+            expired.append(self.mmsis[row])
+            self.expired += 1
+        return expired
+
+    def stats(self):
+        return {
+            "vessels": len(self.rows),
+            "rows": self.size,
+            "free": len(self.free),
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+
+import argparse
+import tempfile
+import time
+
+from aistweet.replay import SyntheticTraffic
+from aistweet.ship_tracker import ShipTracker
+
+STATION = (42.3, -83.0)
+
+
+def ingest(records, archive_dir):
+    """Feed recorded traffic through a tracker; return the time it took."""
+    tracker = ShipTracker(None, None, *STATION, listen=False, archive_dir=archive_dir)
+    start = time.perf_counter()
+    for t, source, datagram in records:
+        while len(tracker.pipeline.raw) >= tracker.pipeline.raw.capacity:
+            time.sleep(0.001)
+        tracker.pipeline.submit(datagram, t, source)
+    tracker.pipeline.drain()
+    elapsed = time.perf_counter() - start
+    tracker.stop()
+    return elapsed, tracker
+
+
+def timed(label, query, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        reports = query()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label}: {elapsed * 1000:.2f} ms, {len(reports)} reports")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="track archive")
+    parser.add_argument("--vessels", type=int, default=500)
+    parser.add_argument(
+        "--duration", type=float, default=7200.0, help="seconds of traffic"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    traffic = SyntheticTraffic(*STATION, args.vessels, seed=args.seed)
+    records = traffic.records(args.duration)
+
+    elapsed, _ = ingest(records, None)
+    print(f"without archive: {len(records) / elapsed:.0f} msgs/s")
+
+    directory = tempfile.mkdtemp()
+    elapsed, tracker = ingest(records, directory)
+    print(f"with archive: {len(records) / elapsed:.0f} msgs/s")
+    print(f"archive: {tracker.archive.stats()}")
+
+    # queries run against the closed archive, as from another process
+    archive = tracker.archive.__class__(directory)
+    mmsi = next(iter(traffic.vessels))
+    timed("one vessel's track", lambda: archive.track(mmsi))
+    middle = records[len(records) // 2][0]
+    timed("one minute window", lambda: archive.window(middle, middle + 60.0))
+    timed("whole archive", lambda: archive.window(0.0, float("inf")), repeat=3)
+    archive.close()
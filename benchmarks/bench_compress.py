@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from aistweet.compress import JpegEncoder
+
+
+def synthetic_frames(count, size, seed=0):
+    """Generate noisy gradient frames standing in for camera captures."""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 160, size[0])[None, :, None]
+    for _ in range(count):
+        noise = rng.integers(0, 96, (size[1], size[0], 3))
+        yield Image.fromarray((noise + gradient).astype("uint8"))
+
+
+def disk_loop(image, max_size, target_resolution, path):
+    """The previous approach: step quality down, writing to disk each time."""
+    encodes = 0
+    if image.size[0] > target_resolution[0] or image.size[1] > target_resolution[1]:
+        image = image.resize(target_resolution, Image.LANCZOS)
+    quality = 95
+    while quality > 10:
+        image.save(path, format="JPEG", quality=quality)
+        encodes += 1
+        if os.path.getsize(path) <= max_size:
+            break
+        quality -= 5
+    with open(path, "rb") as f:
+        return f.read(), encodes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JPEG size targeting benchmark")
+    parser.add_argument("frames", nargs="*", help="sample frames (default: synthetic)")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--max-size", type=int, default=1000000)
+    args = parser.parse_args()
+
+    if args.frames:
+        frames = [Image.open(path) for path in args.frames]
+    else:
+        frames = list(synthetic_frames(args.count, (3280, 2464)))
+
+    target = (1640, 1232)
+    path = os.path.join(tempfile.mkdtemp(), "frame.jpg")
+
+    start = time.perf_counter()
+    encodes = 0
+    for frame in frames:
+        encodes += disk_loop(frame, args.max_size, target, path)[1]
+    elapsed = time.perf_counter() - start
+    print(f"disk loop: {encodes} encodes, {elapsed / len(frames):.3f} s/frame")
+    os.remove(path)
+
+    encoder = JpegEncoder()
+    start = time.perf_counter()
+    for frame in frames:
+        encoder.compress(frame, args.max_size, target)
+    elapsed = time.perf_counter() - start
+    print(f"in-memory: {encoder.encodes} encodes, {elapsed / len(frames):.3f} s/frame")
@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+from pyais.ais_types import AISType
+
+from aistweet.ship_tracker import ShipTracker
+
+BATCH_SIZE = 256
+
+
+def write(tracker, mmsis, stop, counts):
+    # each report moves lat and lon by the same amount, so a reader that sees
+    # them disagree has seen a torn update
+    rng = random.Random(0)
+    k = 0
+    while not stop.is_set():
+        batch = []
+        for _ in range(BATCH_SIZE):
+            k += 1
+            offset = (k % 1000 + 1) * 1e-5
+            data = {
+                "msg_type": AISType.POS_CLASS_A1,
+                "mmsi": rng.choice(mmsis),
+                "lat": 42.29 + offset,
+                "lon": -83.01 + offset,
+                "heading": 0,
+                "course": 0.0,
+                "speed": 10.0,
+            }
+            batch.append((data, time.time()))
+        tracker.add_messages(batch)
+        counts["written"] += len(batch)
+
+
+def read(tracker, mmsis, mode, stop, latencies, counts, seed):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        mmsi = rng.choice(mmsis)
+        start = time.perf_counter()
+        if mode == "snapshot":
+            ship = tracker[mmsi]
+            lat, lon = ship["lat"], ship["lon"]
+            tracker.dimensions(mmsi)
+            tracker.crossing(mmsi, 90.0)
+        elif mode == "locked":
+            # how every read used to go through the tracker lock
+            with tracker.lock:
+                ship = tracker.ships[mmsi]
+                lat, lon = ship["lat"], ship["lon"]
+                tracker.dimensions(mmsi)
+                tracker.crossings_for(mmsi, [(tracker.coordinates, 90.0)], ship)
+        else:
+            ship = tracker.ships[mmsi]
+            lat = ship["lat"]
+            time.sleep(0)
+            lon = ship["lon"]
+        latencies.append(time.perf_counter() - start)
+        if abs((lat - 42.29) - (lon + 83.01)) > 1e-9:
+            counts["torn"] += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="tracker read/write contention")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--vessels", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--modes", nargs="+", default=["snapshot", "locked", "live"])
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+        mmsis = list(range(316000000, 316000000 + args.vessels))
+        tracker.add_messages(
+            [
+                (
+                    {
+                        "msg_type": AISType.POS_CLASS_A1,
+                        "mmsi": m,
+                        "lat": 42.29,
+                        "lon": -83.01,
+                    },
+                    0.0,
+                )
+                for m in mmsis
+            ]
+        )
+
+        stop = threading.Event()
+        counts = {"written": 0, "torn": 0}
+        latencies = [[] for _ in range(args.readers)]
+        threads = [threading.Thread(target=write, args=(tracker, mmsis, stop, counts))]
+        for i in range(args.readers):
+            threads.append(
+                threading.Thread(
+                    target=read,
+                    args=(tracker, mmsis, mode, stop, latencies[i], counts, i),
+                )
+            )
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        tracker.stop()
+
+        reads = np.concatenate([np.asarray(l) for l in latencies]) * 1e6
+        p50, p99 = np.percentile(reads, [50, 99])
+        print(f"== {mode} ==")
+        print(f"writer: {counts['written'] / args.duration:.0f} msgs/s")
+        print(f"readers: {len(reads) / args.duration:.0f} reads/s")
+        print(
+            f"read latency (us): p50 {p50:.1f} / p99 {p99:.1f} / max {reads.max():.1f}"
+        )
+        print(f"torn reads: {counts['torn']}")
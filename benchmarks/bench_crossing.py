@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+
+import argparse
+import time
+
+import numpy as np
+
+from aistweet.geometry import crossing_time_and_depth, crossing_time_and_depth_batch
+
+CAMERA = (42.3, -83.0, 45.0)
+
+
+def synthetic_fleet(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        42.3 + rng.uniform(-0.2, 0.2, count),
+        -83.0 + rng.uniform(-0.2, 0.2, count),
+        rng.uniform(0.2, 20.0, count),
+        rng.uniform(0.0, 360.0, count),
+        np.full(count, time.time()),
+    )
+
+
+def scalar(fleet):
+    return [crossing_time_and_depth(*CAMERA, *vessel) for vessel in zip(*fleet)]
+
+
+def batch(fleet):
+    return crossing_time_and_depth_batch(*CAMERA, *fleet)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fleet crossing benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        fleet = synthetic_fleet(size)
+        for name, predict in (("scalar", scalar), ("batch", batch)):
+            start = time.perf_counter()
+            predict(fleet)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{size} vessels, {name}: {elapsed * 1000.0:.1f} ms "
+                f"({elapsed / size * 1e6:.2f} us/vessel)"
+            )
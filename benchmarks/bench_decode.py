@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+
+import argparse
+import random
+import time
+
+from pyais.encode import encode_dict
+from pyais.exceptions import AISBaseException
+from pyais.messages import NMEAMessage
+
+from aistweet.replay import SyntheticTraffic
+from aistweet.ship_tracker import ShipTracker
+
+STATION = (42.3, -83.0)
+
+
+def sentences(vessels, duration, irrelevant, seed):
+    """Synthetic traffic, mixed with a share of message types the tracker
+    ignores (base stations, binary messages and aids to navigation)."""
+    lines = []
+    traffic = SyntheticTraffic(*STATION, vessels, seed=seed)
+    for _, _, datagram in traffic.records(duration):
+        lines.extend(datagram.splitlines())
+    rng = random.Random(seed)
+    others = [
+        encode_dict({"msg_type": 4, "mmsi": 3160001, "lat": 42.3, "lon": -83.0}),
+        encode_dict({"msg_type": 8, "mmsi": 316001234, "data": b"\x01" * 40}),
+        encode_dict(
+            {
+                "msg_type": 21,
+                "mmsi": 993160001,
+                "name": "BUOY",
+                "lat": 42.3,
+                "lon": -83.0,
+            }
+        ),
+    ]
+    count = int(len(lines) * irrelevant / (1.0 - irrelevant))
+    for _ in range(count):
+        position = rng.randrange(len(lines) + 1)
+        # never between the fragments of a multipart message
+        while position < len(lines) and lines[position].split(b",")[2] != b"1":
+            position += 1
+        lines[position:position] = [s.encode() for s in rng.choice(others)]
+    return lines
+
+
+def full_decode(lines, relevant):
+    """Decode the way ingest used to: every sentence through pyais."""
+    fragments = {}
+    kept = 0
+    for line in lines:
+        try:
+            msg = NMEAMessage.from_bytes(line)
+            if not msg.is_single:
+                slot = (msg.seq_id, msg.channel, msg.frag_cnt)
+                fragments.setdefault(slot, []).append(msg)
+                if len(fragments[slot]) < msg.frag_cnt:
+                    continue
+                msg = NMEAMessage.assemble_from_iterable(fragments.pop(slot))
+            data = msg.decode().asdict()
+        except (AISBaseException, ValueError):
+            continue
+        if data.get("msg_type") in relevant:
+            kept += 1
+    return kept
+
+
+def fast_decode(pipeline, lines):
+    kept = 0
+    for line in lines:
+        if pipeline.decode_line(line) is not None:
+            kept += 1
+    return kept
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AIS sentence decoding")
+    parser.add_argument("--vessels", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=300.0)
+    parser.add_argument(
+        "--irrelevant",
+        type=float,
+        default=0.3,
+        help="share of sentences of types the tracker ignores",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    lines = sentences(args.vessels, args.duration, args.irrelevant, args.seed)
+    tracker = ShipTracker(None, None, *STATION, listen=False)
+
+    start = time.perf_counter()
+    kept = full_decode(lines, tracker.RELEVANT_MSGS)
+    full = time.perf_counter() - start
+    print(f"full decode: {len(lines) / full:.0f} sentences/s, {kept} kept")
+
+    start = time.perf_counter()
+    kept = fast_decode(tracker.pipeline, lines)
+    fast = time.perf_counter() - start
+    print(f"fast path: {len(lines) / fast:.0f} sentences/s, {kept} kept")
+    print(f"speedup: {full / fast:.2f}x")
+    print(f"pipeline: {tracker.pipeline.stats()}")
+    tracker.stop()
@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+
+import argparse
+import random
+import timeit
+
+from geopy.distance import distance
+
+from aistweet.geometry import DISTANCE_BACKENDS, crossing_time_and_depth
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="distance backend microbenchmark")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    points = []
+    for _ in range(args.number):
+        lat = rng.uniform(-70.0, 70.0)
+        p = distance(meters=rng.uniform(100.0, 50000.0)).destination(
+            (lat, 10.0), rng.uniform(0.0, 360.0)
+        )
+        points.append((lat, 10.0, p.latitude, p.longitude))
+
+    exact = [DISTANCE_BACKENDS["geodesic"](*p) for p in points]
+    for name, distance_m in DISTANCE_BACKENDS.items():
+        elapsed = timeit.timeit(
+            lambda: [distance_m(*p) for p in points], number=1
+        ) / len(points)
+        error = max(abs(distance_m(*p) - d) / d for p, d in zip(points, exact))
+        crossing = (
+            timeit.timeit(
+                lambda: crossing_time_and_depth(
+                    42.3, -83.0, 45.0, 42.29, -82.98, 8.0, 300.0, 0.0, name
+                ),
+                number=args.number,
+            )
+            / args.number
+        )
+        print(
+            f"{name}: {elapsed * 1e6:.2f} us/distance, max rel. error {error:.2e}, "
+            f"{crossing * 1e6:.2f} us/crossing"
+        )
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+
+import argparse
+import random
+import time
+
+from pyais.encode import encode_dict
+
+from aistweet.ship_tracker import ShipTracker
+
+
+def synthetic_sentences(count, vessels, seed=0):
+    rng = random.Random(seed)
+    mmsis = [rng.randint(200000000, 775999999) for _ in range(vessels)]
+    sentences = []
+    for i in range(count):
+        mmsi = rng.choice(mmsis)
+        if i % 20 == 0:
+            data = {
+                "msg_type": 5,
+                "mmsi": mmsi,
+                "shipname": f"VESSEL {mmsi % 10000}",
+                "shiptype": 70,
+                "to_bow": 100,
+                "to_stern": 20,
+                "to_port": 10,
+                "to_starboard": 10,
+                "destination": "DETROIT",
+                "draught": 5.5,
+            }
+        else:
+            data = {
+                "msg_type": 1,
+                "mmsi": mmsi,
+                "lat": 42.3 + rng.uniform(-0.1, 0.1),
+                "lon": -83.0 + rng.uniform(-0.1, 0.1),
+                "speed": rng.uniform(0.0, 15.0),
+                "course": rng.uniform(0.0, 359.9),
+                "heading": rng.randint(0, 359),
+                "status": 0,
+            }
+        sentences.append("\n".join(encode_dict(data)).encode())
+    return sentences
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AIS ingest replay benchmark")
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--vessels", type=int, default=500)
+    parser.add_argument("--db", type=str, help="database file for static ship data")
+    args = parser.parse_args()
+
+    datagrams = synthetic_sentences(args.messages, args.vessels)
+
+    tracker = ShipTracker(None, None, 42.3, -83.0, args.db, listen=False)
+    start = time.perf_counter()
+    for datagram in datagrams:
+        # replay as fast as the pipeline will take it without overflowing
+        while len(tracker.pipeline.raw) >= tracker.pipeline.raw.capacity:
+            time.sleep(0.001)
+        tracker.pipeline.submit(datagram)
+    tracker.pipeline.drain()
+    elapsed = time.perf_counter() - start
+    tracker.stop()
+
+    print(f"{args.messages} messages in {elapsed:.3f} s")
+    print(f"sustained rate: {args.messages / elapsed:.0f} msgs/s")
+    for key, value in tracker.pipeline.stats().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+
+import argparse
+import heapq
+import math
+import random
+
+from aistweet.planner import ShotPlanner
+from aistweet.replay import SyntheticTraffic
+from aistweet.units import kn_to_m_s
+
+STATION = (42.3, -83.0)
+# firing to the middle of a single frame burst, and camera busy time
+OFFSET = 1.0
+BUSY = 1.0
+WARMUP = 1.0
+# how long before its crossing a vessel's prediction is settled
+LOOKAHEAD = 30.0
+
+
+class Simulation(object):
+    """Crossings of one camera axis by synthetic traffic, on its own clock,
+    with predictions off by Gaussian noise and the true geometry to check
+    each frame against."""
+
+    def __init__(self, vessels, radius, duration, direction, noise, seed):
+        self.traffic = SyntheticTraffic(*STATION, vessels, radius, seed=seed)
+        self.direction = math.radians(direction)
+        rng = random.Random(seed)
+        self.crossings = []
+        for mmsi, vessel in self.traffic.vessels.items():
+            t = self.traffic.crossing(mmsi, STATION, direction)
+            if t is None or not LOOKAHEAD < t < duration:
+                continue
+            length = rng.choice((15.0, 30.0, 60.0, 120.0, 200.0, 300.0))
+            depth = self.axes(mmsi, t)[1]
+            speed = kn_to_m_s(vessel.speed) * abs(
+                math.sin(math.radians(vessel.course) - self.direction)
+            )
+            predicted = t + rng.gauss(0.0, noise)
+            self.crossings.append((mmsi, predicted, depth, length, speed))
+
+    def axes(self, mmsi, t):
+        """Return a vessel's offset across the axis and depth along it."""
+        x, y = self.traffic.offset(self.traffic.vessels[mmsi], t)
+        return (
+            x * math.cos(self.direction) - y * math.sin(self.direction),
+            x * math.sin(self.direction) + y * math.cos(self.direction),
+        )
+
+    def in_frame(self, mmsi, length, t, large):
+        tangent = ShotPlanner.WIDE if large else ShotPlanner.ZOOMED
+        across, depth = self.axes(mmsi, t)
+        return depth > 0.0 and abs(across) + length / 2.0 <= tangent * depth
+
+
+def independent(simulation):
+    """One timer per vessel, as before: each shot waits for the camera."""
+    lengths = {}
+    shots = []
+    for mmsi, predicted, depth, length, speed in simulation.crossings:
+        lengths[mmsi] = length
+        large = length > 0.9 * ShotPlanner.WIDE * depth
+        shots.append((predicted - OFFSET, mmsi, large))
+    shots.sort()
+
+    free, mode = float("-inf"), None
+    caught = late = 0
+    for fire, mmsi, large in shots:
+        start = max(fire, free)
+        if mode is not None and mode != large:
+            start = max(start, free + WARMUP)
+        late += start > fire
+        free, mode = start + BUSY, large
+        caught += simulation.in_frame(mmsi, lengths[mmsi], start + OFFSET, large)
+    return {"shots": len(shots), "caught": caught, "late": late, "dropped": 0}
+
+
+def planned(simulation):
+    """A shot planner, replanning as each crossing is predicted."""
+    planner = ShotPlanner(BUSY, WARMUP)
+    lengths = {}
+    reveals = [
+        (predicted - LOOKAHEAD, mmsi, predicted, depth, length, speed)
+        for mmsi, predicted, depth, length, speed in simulation.crossings
+    ]
+    heapq.heapify(reveals)
+
+    shots = caught = 0
+    upcoming = []
+    while reveals or upcoming:
+        if reveals and (not upcoming or reveals[0][0] <= upcoming[0].t - OFFSET):
+            now, mmsi, predicted, depth, length, speed = heapq.heappop(reveals)
+            lengths[mmsi] = length
+            planner.add(mmsi, predicted, depth, length, speed, now)
+        else:
+            shot = upcoming[0]
+            now = shot.t - OFFSET
+            if planner.take(shot, shot.t):
+                shots += 1
+                caught += sum(
+                    simulation.in_frame(mmsi, lengths[mmsi], shot.t, shot.large)
+                    for mmsi in shot.mmsis
+                )
+        upcoming = planner.plan(now + OFFSET)
+    stats = planner.stats()
+    return {
+        "shots": shots,
+        "caught": caught,
+        "late": stats["late"],
+        "dropped": stats["missed"],
+        "merged": stats["merged"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="shot planning on a busy axis")
+    parser.add_argument("--vessels", type=int, default=1000)
+    parser.add_argument("--radius", type=float, default=1000.0)
+    parser.add_argument(
+        "--duration", type=float, default=1800.0, help="seconds of traffic"
+    )
+    parser.add_argument("--direction", type=float, default=90.0)
+    parser.add_argument(
+        "--noise", type=float, default=0.5, help="crossing prediction error (s)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    simulation = Simulation(
+        args.vessels,
+        args.radius,
+        args.duration,
+        args.direction,
+        args.noise,
+        args.seed,
+    )
+    print(f"{len(simulation.crossings)} crossings in {args.duration:.0f} s")
+    for name, strategy in (("independent", independent), ("planned", planned)):
+        result = strategy(simulation)
+        print(
+            f"{name}: {result['shots']} shots, "
+            f"{result['caught']} vessels in frame "
+            f"({result['caught'] / len(simulation.crossings):.1%}), "
+            f"{result['late']} late, {result['dropped']} dropped"
+            + (f", {result['merged']} merged" if "merged" in result else "")
+        )
@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from aistweet.predictor import CrossingPredictor
+from aistweet.replay import SyntheticTraffic, read_recording, replay
+from aistweet.ship_tracker import ShipTracker
+
+STATION = (42.3, -83.0)
+
+
+class TimedLock(object):
+    """Reentrant lock that records how long it is held each time."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.acquired = 0.0
+        self.holds = []
+
+    def acquire(self, blocking=True, timeout=-1):
+        if not self.lock.acquire(blocking, timeout):
+            return False
+        self.depth += 1
+        if self.depth == 1:
+            self.acquired = time.perf_counter()
+        return True
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            self.holds.append(time.perf_counter() - self.acquired)
+        self.lock.release()
+
+    __enter__ = acquire
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def percentiles(values, scale=1.0):
+    values = np.asarray(values) * scale
+    if not len(values):
+        return "n/a"
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return f"p50 {p50:.3f} / p90 {p90:.3f} / p99 {p99:.3f} / max {values.max():.3f}"
+
+
+def ingest(records, speed=None):
+    """Feed records in, stamped on submission to measure latency."""
+    tracker = ShipTracker(None, None, *STATION, listen=False)
+    tracker.lock = TimedLock()
+    latencies = []
+    tracker.message_callbacks.append(lambda mmsi, t: latencies.append(time.time() - t))
+
+    def submit(datagram, t, source):
+        # replay as fast as the pipeline will take it without overflowing
+        while len(tracker.pipeline.raw) >= tracker.pipeline.raw.capacity:
+            time.sleep(0.001)
+        tracker.pipeline.submit(datagram, time.time(), source)
+
+    start = time.perf_counter()
+    replay(records, submit, speed)
+    tracker.pipeline.drain()
+    elapsed = time.perf_counter() - start
+    tracker.stop()
+
+    print(f"{len(records)} sentences in {elapsed:.3f} s")
+    print(f"sustained rate: {len(records) / elapsed:.0f} msgs/s")
+    print(f"latency (ms): {percentiles(latencies, 1000.0)}")
+    holds = tracker.lock.holds
+    print(f"lock holds: {len(holds)}, held {sum(holds) / elapsed:.1%} of the time")
+    print(f"lock hold (ms): {percentiles(holds, 1000.0)}")
+
+
+def scheduling(traffic, records, direction):
+    """Schedule shots the way the tweeter does, on the recorded clock."""
+    tracker = ShipTracker(None, None, *STATION, listen=False)
+    predictor = CrossingPredictor(tracker, direction)
+    scheduled = {}
+    shots = {}
+
+    def check(mmsi, t):
+        # a scheduled shot fires unless rescheduled before its time
+        if mmsi in scheduled and scheduled[mmsi] <= t:
+            shots.setdefault(mmsi, scheduled.pop(mmsi))
+        crossing, _ = predictor.predict(mmsi)
+        if crossing is None or not 0.0 < crossing - t < 60.0:
+            return
+        if predictor.needs_reschedule(mmsi, crossing):
+            scheduled[mmsi] = crossing
+            predictor.mark_scheduled(mmsi, crossing)
+
+    tracker.message_callbacks.append(check)
+    replay(records, tracker.pipeline.submit)
+    tracker.pipeline.drain()
+    tracker.stop()
+    for mmsi, crossing in scheduled.items():
+        shots.setdefault(mmsi, crossing)
+
+    end = records[-1][0] if records else traffic.start
+    truth = {}
+    spurious = 0
+    for mmsi in traffic.vessels:
+        crossing = traffic.crossing(mmsi, STATION, direction)
+        if crossing is None:
+            spurious += mmsi in shots
+        # only crossings the tracker had a minute of reports to predict
+        elif traffic.start + 60.0 < crossing < end:
+            truth[mmsi] = crossing
+    errors = [shots[mmsi] - truth[mmsi] for mmsi in truth if mmsi in shots]
+
+    print(f"true crossings: {len(truth)}, shots: {len(errors)}")
+    print(f"missed: {len(truth) - len(errors)}, spurious: {spurious}")
+    print(f"absolute timing error (s): {percentiles(np.abs(errors))}")
+    print(f"predictor: {predictor.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AIS record/replay benchmarks")
+    parser.add_argument("--recording", type=str, help="recording to replay")
+    parser.add_argument("--vessels", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=600.0)
+    parser.add_argument("--direction", type=float, default=90.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--speed",
+        type=float,
+        help="multiple of real time to ingest at (default flat out)",
+    )
+    args = parser.parse_args()
+
+    traffic = None
+    if args.recording:
+        records = list(read_recording(args.recording))
+    else:
+        traffic = SyntheticTraffic(*STATION, args.vessels, seed=args.seed)
+        records = traffic.records(args.duration)
+
+    print("== ingest ==")
+    ingest(records, args.speed)
+    if traffic is not None:
+        print("== scheduling ==")
+        scheduling(traffic, records, args.direction)
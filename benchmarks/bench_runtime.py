@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from aistweet.replay import SyntheticTraffic, UdpSink, replay
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATION = (42.3, -83.0)
+
+
+def scrape(port):
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{port}/metrics", timeout=0.5
+        ) as f:
+            return f.read().decode()
+    except OSError:
+        return ""
+
+
+def value(metrics, name):
+    """Sum a metric over all of its labels."""
+    pattern = re.compile(rf"^aistweet_{name}(\{{[^}}]*\}})? (\S+)$", re.M)
+    return sum(float(match.group(2)) for match in pattern.finditer(metrics))
+
+
+def quantile(metrics, name, q):
+    """Upper bound of the histogram bucket holding quantile q."""
+    pattern = re.compile(rf'^aistweet_{name}_bucket\{{.*le="([^"]+)"\}} (\S+)$', re.M)
+    buckets = {}
+    for match in pattern.finditer(metrics):
+        le = float(match.group(1))
+        buckets[le] = buckets.get(le, 0.0) + float(match.group(2))
+    total = buckets.get(float("inf"), 0.0)
+    for le in sorted(buckets):
+        if total and buckets[le] >= q * total:
+            return le
+    return None
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def run(mode, records, speed, port, metrics_port):
+    """Replay traffic into aistweet.py in one mode; return its figures."""
+    home = tempfile.mkdtemp()
+    command = [
+        sys.executable,
+        os.path.join(ROOT, "aistweet.py"),
+        str(STATION[0]),
+        str(STATION[1]),
+        "90",
+        "--port",
+        str(port),
+        "--metrics",
+        str(metrics_port),
+        "--fake-camera",
+        "--timezone",
+        "America/Detroit",
+        "--spool",
+        os.path.join(home, "spool"),
+    ]
+    if mode == "asyncio":
+        command.append("--asyncio")
+    process = subprocess.Popen(
+        command,
+        env=dict(os.environ, HOME=home, PYTHONPATH=ROOT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while "aistweet_subscriber_" not in scrape(metrics_port):
+            time.sleep(0.1)
+        cpu = cpu_seconds(process.pid)
+        sink = UdpSink("127.0.0.1", port)
+        start = time.perf_counter()
+        sent = replay(records, sink, speed)
+        elapsed = time.perf_counter() - start
+        sink.close()
+        time.sleep(1.0)
+        cpu = cpu_seconds(process.pid) - cpu
+        metrics = scrape(metrics_port)
+    finally:
+        process.terminate()
+        process.wait()
+
+    latency = value(metrics, "update_latency_seconds_sum") / max(
+        value(metrics, "update_latency_seconds_count"), 1.0
+    )
+    return {
+        "sent": sent,
+        "received": int(value(metrics, "ingest_received")),
+        "cpu": cpu / elapsed,
+        "latency": latency,
+        "p99": quantile(metrics, "update_latency_seconds", 0.99),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="threaded vs asyncio runtime")
+    parser.add_argument("--vessels", type=int, default=300)
+    parser.add_argument(
+        "--duration", type=float, default=600.0, help="seconds of traffic"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=20.0, help="multiple of real time"
+    )
+    parser.add_argument("--port", type=int, default=20130)
+    parser.add_argument("--metrics-port", type=int, default=20131)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # traffic stamped from now, so the replayed vessels are on their way
+    traffic = SyntheticTraffic(
+        *STATION, args.vessels, seed=args.seed, start=time.time()
+    )
+    records = traffic.records(args.duration)
+    print(
+        f"{len(records)} sentences over {args.duration / args.speed:.0f} s "
+        f"({len(records) * args.speed / args.duration:.0f}/s)"
+    )
+    for mode in ("threads", "asyncio"):
+        result = run(mode, records, args.speed, args.port, args.metrics_port)
+        print(
+            f"{mode}: received {result['received']}/{result['sent']}, "
+            f"CPU {result['cpu'] * 100:.1f}%, "
+            f"mean update latency {result['latency'] * 1000:.2f} ms "
+            f"(p99 <= {result['p99'] * 1000:.1f} ms)"
+        )
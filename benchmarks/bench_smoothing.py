@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+
+import argparse
+import math
+
+import numpy as np
+
+from aistweet.replay import SyntheticTraffic, read_recording, replay
+from aistweet.ship_tracker import ShipTracker
+
+STATION = (42.3, -83.0)
+LEADS = ((0.0, 15.0), (15.0, 30.0), (30.0, 60.0))
+
+
+def percentiles(values):
+    values = np.asarray(values)
+    if not len(values):
+        return "n/a"
+    p50, p90 = np.percentile(values, [50, 90])
+    return f"p50 {p50:.2f} / p90 {p90:.2f} / max {values.max():.2f}"
+
+
+def predictions(records, direction, smoothing):
+    """Replay records, predicting each vessel's crossing at every report.
+
+    Return the (mmsi, t, crossing, sigma) of every prediction within a
+    minute, and the (t, lat, lon) reported by each vessel.
+    """
+    tracker = ShipTracker(None, None, *STATION, listen=False, smoothing=smoothing)
+    predicted = []
+    tracks = {}
+
+    def check(mmsi, t):
+        # predict once per position report
+        ship = tracker[mmsi]
+        if ship["lat"] is None or ship["last_update"] != t:
+            return
+        tracks.setdefault(mmsi, []).append((t, ship["lat"], ship["lon"]))
+        crossing, _ = tracker.crossing(mmsi, direction)
+        if crossing is None or not 0.0 < crossing - t < 60.0:
+            return
+        sigma = tracker.crossing_uncertainty(mmsi, crossing, direction)
+        predicted.append((mmsi, t, crossing, sigma))
+
+    tracker.message_callbacks.append(check)
+    replay(records, tracker.pipeline.submit)
+    tracker.pipeline.drain()
+    tracker.stop()
+    return predicted, tracks
+
+
+def observed_crossings(tracks, direction):
+    """Interpolate when each reported track crossed the camera axis.
+
+    The reports are as noisy as the predictions made from them, so this
+    truth flatters predictions from the last report shortly before crossing.
+    """
+    direction_r = math.radians(direction)
+    m_per_lon = 111111.0 * math.cos(math.radians(STATION[0]))
+    crossings = {}
+    for mmsi, track in tracks.items():
+        previous = None
+        for t, lat, lon in track:
+            x = (lon - STATION[1]) * m_per_lon
+            y = (lat - STATION[0]) * 111111.0
+            offset = x * math.cos(direction_r) - y * math.sin(direction_r)
+            ahead = x * math.sin(direction_r) + y * math.cos(direction_r) > 0.0
+            if previous is not None and ahead and (previous[1] < 0.0) != (offset < 0.0):
+                t0, offset0 = previous
+                crossings[mmsi] = t0 + (t - t0) * offset0 / (offset0 - offset)
+                break
+            previous = (t, offset)
+    return crossings
+
+
+def evaluate(name, predicted, truth):
+    errors = {lead: [] for lead in LEADS}
+    within = []
+    jitter = []
+    last = {}
+    for mmsi, t, crossing, sigma in predicted:
+        if mmsi in last:
+            jitter.append(abs(crossing - last[mmsi]))
+        last[mmsi] = crossing
+        if mmsi not in truth:
+            continue
+        lead = truth[mmsi] - t
+        error = crossing - truth[mmsi]
+        for low, high in LEADS:
+            if low <= lead < high:
+                errors[(low, high)].append(abs(error))
+        if sigma is not None and lead > 0.0:
+            within.append(abs(error) <= 2.0 * sigma)
+
+    print(f"== {name} ==")
+    print(f"predictions: {len(predicted)}")
+    for (low, high), values in errors.items():
+        print(f"abs error (s), {low:.0f}-{high:.0f} s ahead: {percentiles(values)}")
+    print(f"change between consecutive predictions (s): {percentiles(jitter)}")
+    if within:
+        print(f"errors within 2 sigma: {np.mean(within):.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="track smoothing evaluation")
+    parser.add_argument("--recording", type=str, help="recording to replay")
+    parser.add_argument("--vessels", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=600.0)
+    parser.add_argument("--direction", type=float, default=90.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--position-noise", type=float, default=15.0, help="meters (synthetic)"
+    )
+    parser.add_argument(
+        "--speed-noise", type=float, default=0.3, help="knots (synthetic)"
+    )
+    parser.add_argument(
+        "--course-noise", type=float, default=5.0, help="degrees (synthetic)"
+    )
+    parser.add_argument(
+        "--class-a", action="store_true", help="send Class A reports (synthetic)"
+    )
+    args = parser.parse_args()
+
+    traffic = None
+    if args.recording:
+        records = list(read_recording(args.recording))
+    else:
+        traffic = SyntheticTraffic(
+            *STATION,
+            args.vessels,
+            seed=args.seed,
+            position_noise=args.position_noise,
+            speed_noise=args.speed_noise,
+            course_noise=args.course_noise,
+            class_b=not args.class_a,
+        )
+        records = traffic.records(args.duration)
+
+    raw, tracks = predictions(records, args.direction, False)
+    smoothed, _ = predictions(records, args.direction, True)
+
+    if traffic is not None:
+        # exact crossings of the noiseless tracks
+        truth = {}
+        for mmsi in traffic.vessels:
+            crossing = traffic.crossing(mmsi, STATION, args.direction)
+            if crossing is not None:
+                truth[mmsi] = crossing
+    else:
+        # crossings interpolated between the reports either side of the axis
+        truth = observed_crossings(tracks, args.direction)
+    print(f"crossings: {len(truth)}")
+
+    evaluate("last report", raw, truth)
+    evaluate("filtered", smoothed, truth)
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from pyais.encode import encode_dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ("aistweet.ship_tracker", "aistweet.tweeter")
+
+
+def import_times(runs):
+    """Time importing each module in a fresh interpreter."""
+    for module in MODULES:
+        times = []
+        for _ in range(runs):
+            output = subprocess.check_output(
+                [
+                    sys.executable,
+                    "-c",
+                    "import time; start = time.perf_counter(); "
+                    f"import {module}; print(time.perf_counter() - start)",
+                ],
+                cwd=ROOT,
+            )
+            times.append(float(output))
+        print(f"import {module}: {min(times) * 1000:.0f} ms (best of {runs})")
+
+
+def scrape(port):
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{port}/metrics", timeout=0.1
+        ) as f:
+            return f.read().decode()
+    except OSError:
+        return ""
+
+
+def first_message(port, metrics_port, interval, timeout):
+    """Start aistweet.py while sending it a message every `interval`
+    seconds, and time how long until one is received and until every
+    camera is ready."""
+    sentence = encode_dict(
+        {"msg_type": 1, "mmsi": 316001234, "lat": 42.3, "lon": -83.0, "speed": 5.0}
+    )[0].encode()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    home = tempfile.mkdtemp()
+    env = dict(os.environ, HOME=home, PYTHONPATH=ROOT)
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(ROOT, "aistweet.py"),
+            "42.3",
+            "-83.0",
+            "90",
+            "--port",
+            str(port),
+            "--metrics",
+            str(metrics_port),
+            "--fake-camera",
+            "--timezone",
+            "America/Detroit",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    sent = 0
+    received = ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            sock.sendto(sentence, ("127.0.0.1", port))
+            sent += 1
+            metrics = scrape(metrics_port)
+            for line in metrics.splitlines():
+                if line.startswith("aistweet_ingest_received ") and received is None:
+                    if float(line.split()[1]) > 0:
+                        received = (time.perf_counter() - start, sent)
+                if line.startswith("aistweet_subscriber_") and ready is None:
+                    ready = time.perf_counter() - start
+            if received is not None and ready is not None:
+                break
+            time.sleep(interval)
+    finally:
+        process.terminate()
+        process.wait()
+        sock.close()
+
+    if received is None:
+        print("no message received")
+        return
+    elapsed, sent_by_then = received
+    print(f"first message received after {elapsed * 1000:.0f} ms")
+    print(f"messages sent before then (lost): {sent_by_then - 1}")
+    if ready is not None:
+        print(f"cameras ready after {ready * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=20110)
+    parser.add_argument("--metrics-port", type=int, default=20111)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    print("== imports ==")
+    import_times(args.runs)
+    print("== aistweet.py ==")
+    for _ in range(args.runs):
+        first_message(args.port, args.metrics_port, args.interval, args.timeout)
@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+
+import argparse
+import io
+import time
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from aistweet.compress import JpegEncoder
+from aistweet.poster import Poster
+from aistweet.validate import FrameValidator
+
+MODE = "benchmark"
+
+
+def scene(size, rng, ship=False, dark=False, blur=0.0):
+    """A JPEG of noisy water under the sky, as a camera would capture it."""
+    width, height = size
+    pixels = np.empty((height, width, 3), dtype=np.float32)
+    pixels[: height // 2] = (120, 170, 220)
+    pixels[height // 2 :] = (30, 70, 100)
+    pixels += rng.normal(0.0, 10.0, (height, width, 1))
+    if ship:
+        x = int(rng.uniform(0.1, 0.5) * width)
+        pixels[height // 2 - height // 12 : height // 2, x : x + width // 3] = (
+            160,
+            40,
+            30,
+        )
+    if dark:
+        pixels *= 0.02
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    if blur:
+        image = image.filter(ImageFilter.GaussianBlur(blur))
+    frame = io.BytesIO()
+    image.save(frame, format="JPEG", quality=90)
+    return frame
+
+
+def timed(function, *args, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def compress(frame):
+    frame.seek(0)
+    with Image.open(frame) as image:
+        return JpegEncoder().compress(image, Poster.MAX_SIZE, Poster.RESOLUTION)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="captured frame validation")
+    parser.add_argument("--count", type=int, default=5, help="frames of each kind")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for size in ((1640, 1232), (3280, 2464)):
+        validator = FrameValidator()
+        for _ in range(3):
+            validator.update_background(scene(size, rng), MODE)
+
+        kinds = {
+            "ship": dict(ship=True),
+            "empty": {},
+            "dark": dict(ship=True, dark=True),
+            "blurred": dict(ship=True, blur=size[0] / 80.0),
+        }
+        print(f"== {size[0]}x{size[1]} ==")
+        for kind, options in kinds.items():
+            frames = [scene(size, rng, **options) for _ in range(args.count)]
+            results = [validator.check(frame, MODE) for frame in frames]
+            print(f"{kind}: {[result or 'passed' for result in results]}")
+
+        frame = scene(size, rng, ship=True)
+        decode, (pixels, thumbnail) = timed(validator.decode, frame)
+        brightness, _ = timed(lambda: float(thumbnail.mean()), repeat=100)
+        sharpness, _ = timed(validator.sharpness, pixels, repeat=100)
+        background = validator.backgrounds[MODE]
+        difference, _ = timed(validator.changed, thumbnail, background, repeat=100)
+        total = decode + brightness + sharpness + difference
+        print(
+            f"decode {decode * 1000:.2f} ms, brightness {brightness * 1000:.3f} ms, "
+            f"sharpness {sharpness * 1000:.3f} ms, "
+            f"difference {difference * 1000:.3f} ms"
+        )
+        elapsed, data = timed(compress, frame, repeat=2)
+        print(
+            f"validation {total * 1000:.2f} ms vs compression for posting "
+            f"{elapsed * 1000:.0f} ms ({len(data)} bytes to upload)"
+        )
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from aistweet.ship_tracker import ShipTracker
+from aistweet.vessel_table import VesselTable
+
+FIELDS = {
+    **ShipTracker.STATIC_FIELDS,
+    **ShipTracker.VOYAGE_FIELDS,
+    **ShipTracker.POSITION_FIELDS,
+    "last_update": None,
+}
+
+
+def synthetic_vessels(count, seed=0):
+    rng = random.Random(seed)
+    for mmsi in rng.sample(range(200000000, 776000000), count):
+        yield mmsi, {
+            "shipname": f"VESSEL {mmsi % 100000}",
+            "shiptype": rng.randint(20, 99),
+            "to_bow": rng.randint(5, 200),
+            "to_stern": rng.randint(5, 50),
+            "to_port": rng.randint(2, 20),
+            "to_starboard": rng.randint(2, 20),
+            "lat": rng.uniform(41.0, 43.0),
+            "lon": rng.uniform(-84.0, -82.0),
+            "status": 0,
+            "heading": rng.randint(0, 359),
+            "course": rng.uniform(0.0, 359.9),
+            "speed": rng.uniform(0.0, 20.0),
+            "last_update": time.time(),
+        }
+
+
+def fill_dicts(vessels):
+    ships = {}
+    for mmsi, values in vessels:
+        ships[mmsi] = dict(FIELDS)
+        ships[mmsi].update(values)
+    return ships
+
+
+def fill_table(vessels):
+    ships = VesselTable(FIELDS, capacity=len(vessels))
+    for mmsi, values in vessels:
+        ships.add(mmsi, values["last_update"]).update(values)
+    return ships
+
+
+def measure(fill, vessels):
+    tracemalloc.start()
+    start = time.perf_counter()
+    ships = fill(vessels)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ships, size, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="vessel table memory benchmark")
+    parser.add_argument("--vessels", type=int, default=100000)
+    args = parser.parse_args()
+
+    vessels = list(synthetic_vessels(args.vessels))
+
+    for name, fill in (("dict-of-dicts", fill_dicts), ("VesselTable", fill_table)):
+        ships, size, elapsed = measure(fill, vessels)
+        print(
+            f"{name}: {size / 2**20:.1f} MiB "
+            f"({size / args.vessels:.0f} B/vessel), filled in {elapsed:.3f} s"
+        )
@@ -0,0 +1,88 @@
+import math
+import os
+
+from aistweet.archive import RECORD_DTYPE, TrackArchive
+
+
+def report(lat, lon, speed=5.0, status=0):
+    return {
+        "msg_type": 1,
+        "lat": lat,
+        "lon": lon,
+        "speed": speed,
+        "course": 90.0,
+        "heading": 90,
+        "status": status,
+    }
+
+
+def test_archive_queries_across_segments(tmp_path):
+    directory = str(tmp_path / "archive")
+    archive = TrackArchive(directory, segment_duration=100.0)
+    for i in range(30):
+        t = 1000.0 + 10.0 * i
+        archive.append(316001234, report(42.3, -83.0 + 0.001 * i), t)
+        archive.append(316005678, report(42.31, -83.01), t + 1.0)
+    # a late class B report, without status or speed
+    archive.append(316009999, {"msg_type": 18, "lat": 42.32, "lon": -83.02}, 1005.0)
+
+    track = archive.track(316001234)
+    assert len(track) == 30
+    assert list(track["t"]) == [1000.0 + 10.0 * i for i in range(30)]
+    assert abs(track["lon"][-1] - (-83.0 + 0.029)) < 1e-6
+    assert archive.stats()["rotations"] == 2
+
+    window = archive.window(1095.0, 1121.0)
+    assert [(r["mmsi"], r["t"]) for r in window] == [
+        (316001234, 1100.0),
+        (316005678, 1101.0),
+        (316001234, 1110.0),
+        (316005678, 1111.0),
+        (316001234, 1120.0),
+        (316005678, 1121.0),
+    ]
+    assert len(archive.track(316005678, 1150.0, 1200.0)) == 5
+    assert len(archive.track(316000000)) == 0
+
+    class_b = archive.track(316009999)
+    assert math.isnan(class_b["speed"][0]) and class_b["status"][0] == 15
+    archive.close()
+
+    # after a restart, reports go on being appended to the same segment
+    archive = TrackArchive(directory, segment_duration=100.0)
+    archive.append(316001234, report(42.3, -82.9), 1295.0)
+    assert len(archive.track(316001234)) == 31
+    assert archive.stats()["segments"] == 3
+    archive.close()
+
+
+def test_archive_recovers_from_crash(tmp_path):
+    directory = str(tmp_path / "archive")
+    archive = TrackArchive(directory, segment_duration=100.0)
+    for i in range(5):
+        archive.append(316001234, report(42.3, -83.0), 1000.0 + i)
+    archive.flush()
+    # simulate a crash partway through writing a record
+    path = archive.current.path
+    archive.file.write(b"\x00" * (RECORD_DTYPE.itemsize // 2))
+    archive.file.close()
+    archive.file = None
+    archive.running = False
+    archive.wakeup.set()
+    archive.flusher.join()
+    assert not os.path.exists(archive.current.index_path)
+
+    archive = TrackArchive(directory, segment_duration=100.0)
+    assert os.path.exists(archive.segments[0].index_path)
+    assert len(archive.track(316001234)) == 5
+    assert len(archive.window(1000.0, 1002.0)) == 3
+
+    # the torn record is cut off before the segment is appended to again
+    archive.append(316005678, report(42.31, -83.01), 1005.0)
+    archive.append(316001234, report(42.3, -82.99), 1006.0)
+    track = archive.track(316001234)
+    assert list(track["t"]) == [1000.0 + i for i in range(7) if i != 5]
+    assert abs(track["lon"][-1] - (-82.99)) < 1e-6
+    assert list(archive.track(316005678)["t"]) == [1005.0]
+    archive.close()
+    assert os.path.getsize(path) == 7 * RECORD_DTYPE.itemsize
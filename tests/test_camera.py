@@ -0,0 +1,58 @@
+import fractions
+import io
+import time
+
+from PIL import Image
+
+from aistweet.camera import CameraManager, FakeCamera, open_camera, sharpness
+
+
+def test_fake_camera_captures_to_memory():
+    camera = open_camera(fake=True)
+    assert isinstance(camera, FakeCamera)
+
+    camera.configure(
+        (0.0, 0.0, 1.0, 1.0), (640, 480), fractions.Fraction(30, 1), "auto"
+    )
+    frame = io.BytesIO()
+    camera.capture(frame)
+    frame.seek(0)
+    with Image.open(frame) as image:
+        assert image.format == "JPEG"
+        assert image.size == (640, 480)
+    assert camera.captures == 1
+
+
+def test_camera_manager_keeps_camera_warm():
+    camera = FakeCamera()
+    manager = CameraManager(camera, warmup=0.05)
+    mode = ((0.0, 0.0, 1.0, 1.0), (320, 240), fractions.Fraction(30, 1), "auto")
+
+    manager.prepare(mode)
+    assert camera.previewing
+    time.sleep(0.05)
+    start = time.time()
+    manager.capture(mode)
+    assert time.time() - start < 0.05
+
+    # a different mode has to warm up first
+    manager.capture(mode[:3] + ("night",))
+    assert manager.stats() == {"switches": 2, "warm_captures": 1, "cold_captures": 1}
+
+    scores = iter([1.0, 3.0, 2.0])
+    best = manager.burst(mode, 3, 0.0, score=lambda frame: next(scores))
+    assert camera.captures == 5
+    assert best is not None
+
+    manager.close()
+    assert not camera.previewing
+
+
+def test_sharpness_prefers_detail():
+    camera = FakeCamera()
+    camera.configure(None, (320, 240), None, "auto")
+    detailed = io.BytesIO()
+    camera.capture(detailed)
+    flat = io.BytesIO()
+    Image.new("RGB", (320, 240), (120, 170, 220)).save(flat, format="JPEG")
+    assert sharpness(detailed) > sharpness(flat)
@@ -0,0 +1,34 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from aistweet.compress import JpegEncoder
+
+
+def frame(seed):
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 64, (480, 640, 3))
+    return Image.fromarray(
+        (noise + np.linspace(0, 180, 640)[None, :, None]).astype("uint8")
+    )
+
+
+def test_jpeg_encoder_finds_best_quality():
+    encoder = JpegEncoder()
+    data = encoder.compress(frame(0), 150000, (640, 480))
+    assert len(data) <= 150000
+    assert encoder.encode(frame(0), encoder.quality + 1) > 150000
+
+    # a similar frame only needs the seed and one neighbor
+    encodes = encoder.encodes
+    encoder.compress(frame(1), 150000, (640, 480))
+    assert encoder.encodes - encodes <= 3
+
+
+def test_jpeg_encoder_best_effort():
+    encoder = JpegEncoder()
+    assert encoder.compress(frame(0), 1000, (320, 240)) is None
+    data = encoder.compress(frame(0), 1000, (320, 240), best_effort=True)
+    assert data[:2] == b"\xff\xd8"
+    assert Image.open(io.BytesIO(data)).size == (320, 240)
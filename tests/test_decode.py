@@ -0,0 +1,101 @@
+import random
+
+import pytest
+from pyais import decode
+from pyais.encode import encode_dict
+
+from aistweet.decode import PayloadDecoder, message_type
+from aistweet.ship_tracker import ShipTracker
+
+FIELDS = (
+    list(ShipTracker.STATIC_FIELDS)
+    + list(ShipTracker.VOYAGE_FIELDS)
+    + list(ShipTracker.POSITION_FIELDS)
+)
+
+
+def random_messages(rng, count):
+    for _ in range(count):
+        mmsi = rng.randint(200000000, 775999999)
+        yield {
+            "msg_type": rng.choice((1, 2, 3)),
+            "mmsi": mmsi,
+            "status": rng.randint(0, 15),
+            "speed": rng.randint(0, 1023) / 10.0,
+            "lon": rng.uniform(-180.0, 181.0),
+            "lat": rng.uniform(-90.0, 91.0),
+            "course": rng.randint(0, 3600) / 10.0,
+            "heading": rng.choice((rng.randint(0, 359), 511)),
+        }
+        yield {
+            "msg_type": 18,
+            "mmsi": mmsi,
+            "speed": rng.randint(0, 1023) / 10.0,
+            "lon": rng.uniform(-180.0, 180.0),
+            "lat": rng.uniform(-90.0, 90.0),
+            "course": rng.randint(0, 3600) / 10.0,
+            "heading": rng.randint(0, 511),
+        }
+        yield {
+            "msg_type": 5,
+            "mmsi": mmsi,
+            "imo": rng.randint(0, 9999999),
+            "shipname": rng.choice(("", "TEST", "M/V SOME BOAT 12")),
+            "ship_type": rng.randint(0, 99),
+            "to_bow": rng.randint(0, 511),
+            "to_stern": rng.randint(0, 511),
+            "to_port": rng.randint(0, 63),
+            "to_starboard": rng.randint(0, 63),
+            "draught": rng.randint(0, 255) / 10.0,
+            "destination": rng.choice(("", "DETROIT", "TOLEDO OH")),
+        }
+        yield {"msg_type": 24, "mmsi": mmsi, "partno": 0, "shipname": "TEST"}
+        yield {
+            "msg_type": 24,
+            "mmsi": rng.choice((mmsi, 981234567)),
+            "partno": 1,
+            "ship_type": rng.randint(0, 99),
+            "to_bow": rng.randint(0, 511),
+            "to_stern": rng.randint(0, 511),
+            "to_port": rng.randint(0, 63),
+            "to_starboard": rng.randint(0, 63),
+            "mothership_mmsi": mmsi,
+        }
+
+
+def test_decode_matches_pyais():
+    decoder = PayloadDecoder((1, 2, 3, 5, 18, 24), FIELDS)
+    for message in random_messages(random.Random(0), 200):
+        sentences = encode_dict(message)
+        expected = decode(*sentences).asdict()
+        expected["shiptype"] = expected.pop("ship_type", None)
+
+        payload = b"".join(s.split(",")[5].encode() for s in sentences)
+        fill = int(sentences[-1].split(",")[6][0])
+        data = decoder.decode(payload, fill)
+        assert data["msg_type"] == message["msg_type"]
+        for key, value in data.items():
+            assert value == expected[key], key
+        if message["msg_type"] == 24 and message["partno"] == 1:
+            assert ("to_bow" in data) == (data["mmsi"] != 981234567)
+
+
+def test_decode_only_requested():
+    decoder = PayloadDecoder((1, 5), ("lat", "lon"))
+    position = encode_dict({"msg_type": 1, "mmsi": 316001234, "lat": 42.3})[0]
+    payload = position.split(",")[5].encode()
+    assert decoder.decode(payload) == {
+        "msg_type": 1,
+        "mmsi": 316001234,
+        "lat": 42.3,
+        "lon": 0.0,
+    }
+
+    base = encode_dict({"msg_type": 4, "mmsi": 3160001})[0].split(",")[5].encode()
+    assert message_type(base) == 4
+    assert decoder.decode(base) is None
+
+    with pytest.raises(ValueError):
+        decoder.decode(payload[:10])
+    with pytest.raises(ValueError):
+        decoder.decode(payload[:5] + b"~" + payload[6:])
@@ -0,0 +1,73 @@
+import threading
+
+from pyais.encode import encode_dict
+
+from aistweet.dispatch import Dispatcher
+from aistweet.ship_tracker import ShipTracker
+
+
+def test_dispatch_coalesces_and_isolates_errors():
+    dispatcher = Dispatcher(workers=2, log=lambda message: None)
+    started = threading.Event()
+    gate = threading.Event()
+    latest = []
+    every = []
+
+    def slow(mmsi, t):
+        started.set()
+        gate.wait(5.0)
+        latest.append((mmsi, t))
+
+    def failing(mmsi, t):
+        raise RuntimeError("boom")
+
+    slow_subscriber = dispatcher.subscribe(slow)
+    every_subscriber = dispatcher.subscribe(
+        lambda mmsi, t: every.append((mmsi, t)), "every", coalesce=False
+    )
+    failing_subscriber = dispatcher.subscribe(failing)
+    dispatcher.start()
+
+    # the slow subscriber is stuck on the first event while the rest pile up
+    dispatcher.publish([(1, 0.0)])
+    assert started.wait(5.0)
+    for i in range(1, 10):
+        dispatcher.publish([(1, float(i)), (2, float(i))])
+    assert slow_subscriber.stats()["pending"] == 2
+    gate.set()
+    assert dispatcher.drain(5.0)
+    dispatcher.stop()
+
+    assert latest == [(1, 0.0), (1, 9.0), (2, 9.0)]
+    assert slow_subscriber.stats()["coalesced"] == 16
+    assert slow_subscriber.stats()["max_lag"] > 0.0
+    assert len(every) == 19 and every[-1] == (2, 9.0)
+    assert every_subscriber.stats()["coalesced"] == 0
+    assert failing_subscriber.stats()["errors"] == failing_subscriber.delivered
+    assert dispatcher.stats()["errors"] == failing_subscriber.delivered
+    assert slow_subscriber.stats()["lag"] == 0.0
+
+
+def test_failing_callbacks_do_not_stop_ingest():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    tracker.dispatcher.log = lambda message: None
+    received = []
+
+    def failing(mmsi, t):
+        raise ValueError("boom")
+
+    tracker.message_callbacks.append(failing)
+    tracker.subscribe(failing)
+    tracker.subscribe(lambda mmsi, t: received.append((mmsi, t)), coalesce=False)
+
+    for i in range(3):
+        position = encode_dict(
+            {"msg_type": 1, "mmsi": 316001234, "lat": 42.3, "lon": -83.0}
+        )
+        tracker.pipeline.submit(position[0].encode(), float(i))
+        assert tracker.pipeline.drain(5.0)
+    tracker.stop()
+
+    assert received == [(316001234, 0.0), (316001234, 1.0), (316001234, 2.0)]
+    assert tracker.pipeline.stats()["applied"] == 3
+    assert tracker.dispatcher.stats()["errors"] == 6
@@ -1,6 +1,14 @@
+import numpy as np
 import pytest
 
-from aistweet.geometry import center_coordinates, crossing_time_and_depth
+from geopy.distance import distance
+
+from aistweet.geometry import (
+    DISTANCE_BACKENDS,
+    center_coordinates,
+    crossing_time_and_depth,
+    crossing_time_and_depth_batch,
+)
 
 
 def test_center_coordinates():
@@ -8,3 +16,60 @@ def test_center_coordinates():
         pytest.approx(0.0),
         pytest.approx(0.0),
     )
+
+
+def test_crossing_time_and_depth_batch_matches_scalar():
+    rng = np.random.default_rng(0)
+    n = 500
+    lat = 42.3 + rng.uniform(-0.2, 0.2, n)
+    lon = -83.0 + rng.uniform(-0.2, 0.2, n)
+    speed = rng.uniform(0.2, 20.0, n)
+    course = rng.uniform(0.0, 360.0, n)
+    t = rng.uniform(0.0, 1000.0, n)
+
+    times, depths = crossing_time_and_depth_batch(
+        42.3, -83.0, 45.0, lat, lon, speed, course, t
+    )
+
+    for i in range(n):
+        crossing, depth = crossing_time_and_depth(
+            42.3, -83.0, 45.0, lat[i], lon[i], speed[i], course[i], t[i]
+        )
+        if crossing is None:
+            assert np.isnan(times[i]) and np.isnan(depths[i])
+        else:
+            assert times[i] - t[i] == pytest.approx(crossing - t[i], rel=5e-3)
+            assert depths[i] == pytest.approx(depth, rel=5e-3)
+
+
+def test_crossing_time_and_depth_batch_masks_degenerate():
+    times, depths = crossing_time_and_depth_batch(
+        42.3,
+        -83.0,
+        45.0,
+        np.array([42.3, 42.31]),
+        np.array([-83.0, -83.0]),
+        np.array([5.0, 0.0]),
+        np.array([90.0, 90.0]),
+        np.array([0.0, 0.0]),
+    )
+    assert np.isnan(times).all() and np.isnan(depths).all()
+
+
+@pytest.mark.parametrize("backend, rel", [("haversine", 6e-3), ("tangent", 3e-5)])
+def test_distance_backends_against_geodesic(backend, rel):
+    for lat in range(-70, 75, 10):
+        for meters in (100.0, 1000.0, 10000.0, 50000.0):
+            for bearing in range(0, 360, 30):
+                p = distance(meters=meters).destination((lat, 10.0), bearing)
+                d = DISTANCE_BACKENDS[backend](lat, 10.0, p.latitude, p.longitude)
+                assert d == pytest.approx(meters, rel=rel)
+
+
+@pytest.mark.parametrize("backend", ["haversine", "tangent"])
+def test_crossing_time_and_depth_backends(backend):
+    args = (42.3, -83.0, 45.0, 42.29, -82.98, 8.0, 300.0, 0.0)
+    crossing, depth = crossing_time_and_depth(*args)
+    fast_crossing, fast_depth = crossing_time_and_depth(*args, backend)
+    assert fast_crossing == pytest.approx(crossing, rel=6e-3)
+    assert fast_depth == pytest.approx(depth, rel=6e-3)
@@ -0,0 +1,117 @@
+from pyais.encode import encode_dict
+
+from aistweet.ingest import RingBuffer
+from aistweet.ship_tracker import ShipTracker
+
+
+def test_ring_buffer_drops_oldest():
+    ring = RingBuffer(2)
+    assert not ring.put(1)
+    assert not ring.put(2)
+    assert ring.put(3)
+    assert ring.dropped == 1
+    assert ring.get_batch(10, 0.0) == [2, 3]
+
+
+def test_pipeline_applies_batches():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    received = []
+    tracker.message_callbacks.append(lambda mmsi, t: received.append((mmsi, t)))
+
+    static = encode_dict(
+        {"msg_type": 5, "mmsi": 316001234, "shipname": "TEST", "ship_type": 70}
+    )
+    position = encode_dict(
+        {"msg_type": 1, "mmsi": 316001234, "lat": 42.3, "lon": -83.0, "speed": 5.0}
+    )
+    tracker.pipeline.submit("\n".join(static).encode(), 1.0)
+    tracker.pipeline.submit(position[0].encode(), 2.0)
+    tracker.pipeline.submit(b"!AIVDM,1,1,,A,garbage,0*00", 3.0)
+    assert tracker.pipeline.drain(5.0)
+    tracker.stop()
+
+    assert received == [(316001234, 1.0), (316001234, 2.0)]
+    assert tracker[316001234]["shipname"] == "TEST"
+    assert tracker[316001234]["shiptype"] == 70
+    assert tracker[316001234]["lat"] == 42.3
+    assert tracker.pipeline.stats()["applied"] == 2
+
+
+def test_pipeline_deduplicates_feeds():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    tracker.pipeline.dedup_window = 2.0
+    received = []
+    tracker.message_callbacks.append(lambda mmsi, t: received.append((mmsi, t)))
+
+    static = encode_dict(
+        {"msg_type": 5, "mmsi": 316001234, "shipname": "TEST", "shiptype": 70}
+    )
+    position = encode_dict(
+        {"msg_type": 1, "mmsi": 316001234, "lat": 42.3, "lon": -83.0, "speed": 5.0}
+    )
+    # two receivers hear the same messages, with the multipart message's
+    # fragments interleaved
+    tracker.pipeline.submit(static[0].encode(), 1.0, source=0)
+    tracker.pipeline.submit(static[0].encode(), 1.1, source=1)
+    tracker.pipeline.submit(static[1].encode(), 1.1, source=1)
+    tracker.pipeline.submit(static[1].encode(), 1.2, source=0)
+    tracker.pipeline.submit(position[0].encode(), 2.0, source=1)
+    tracker.pipeline.submit(position[0].encode(), 2.1, source=0)
+    # repeated outside the window, so heard anew
+    tracker.pipeline.submit(position[0].encode(), 10.0, source=0)
+    assert tracker.pipeline.drain(5.0)
+    tracker.stop()
+
+    assert received == [(316001234, 1.1), (316001234, 2.0), (316001234, 10.0)]
+    assert tracker.pipeline.stats()["duplicates"] == 2
+
+
+def test_pipeline_skips_and_bounds_fragments():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    pipeline = tracker.pipeline
+
+    # a base station report is dropped without being decoded
+    base = encode_dict({"msg_type": 4, "mmsi": 3160001, "lat": 42.3, "lon": -83.0})
+    assert pipeline.decode_line(base[0].encode()) is None
+    assert pipeline.stats()["skipped"] == 1
+    assert pipeline.stats()["decode_errors"] == 0
+
+    # the oldest incomplete messages are let go to bound the buffer
+    static = [
+        encode_dict({"msg_type": 5, "mmsi": 316000000 + i, "shipname": "TEST"})
+        for i in range(pipeline.MAX_FRAGMENTS + 10)
+    ]
+    for i, sentences in enumerate(static):
+        assert pipeline.decode_line(sentences[0].encode(), 1.0, source=i) is None
+    assert len(pipeline.fragments) == pipeline.MAX_FRAGMENTS
+    assert pipeline.stats()["fragments_dropped"] == 10
+    assert pipeline.decode_line(static[0][1].encode(), 1.0, source=0) is None
+    last = len(static) - 1
+    data = pipeline.decode_line(static[last][1].encode(), 1.0, source=last)
+    assert data["mmsi"] == 316000000 + last and data["shipname"] == "TEST"
+
+    # and so are those whose fragments stopped coming
+    pipeline.decode_line(static[0][0].encode(), 10.0)
+    assert len(pipeline.fragments) == 1
+    tracker.stop()
+
+
+def test_pipeline_strips_tag_blocks():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    pipeline = tracker.pipeline
+
+    position = encode_dict(
+        {"msg_type": 1, "mmsi": 316001234, "lat": 42.3, "lon": -83.0, "speed": 5.0}
+    )
+    data = pipeline.decode_line(
+        b"\\s:rORBCOMM000,c:1241544035*4A\\" + position[0].encode(), 1.0
+    )
+    assert data["mmsi"] == 316001234 and data["lat"] == 42.3
+
+    # blank lines are passed over, but anything else unreadable is counted
+    assert pipeline.decode_line(b"", 2.0) is None
+    assert pipeline.stats()["decode_errors"] == 0
+    assert pipeline.decode_line(b"\\s:rORBCOMM000*4A", 2.0) is None
+    assert pipeline.decode_line(b"AIVDM,1,1,,A,garbage,0*00", 2.0) is None
+    assert pipeline.stats()["decode_errors"] == 2
+    tracker.stop()
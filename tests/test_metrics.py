@@ -0,0 +1,86 @@
+import functools
+import threading
+import urllib.request
+
+from pyais.ais_types import AISType
+
+from aistweet.metrics import NULL_METRICS, Metrics
+from aistweet.predictor import CrossingPredictor
+from aistweet.ship_tracker import ShipTracker
+
+
+def test_histogram_render():
+    metrics = Metrics()
+    histogram = metrics.histogram("capture_seconds", "Capture time", {"axis": 0})
+    for value in (0.002, 0.02, 20.0):
+        histogram.observe(value)
+
+    text = metrics.render()
+    assert "# TYPE aistweet_capture_seconds histogram" in text
+    assert 'aistweet_capture_seconds_bucket{axis="0",le="0.005"} 1' in text
+    assert 'aistweet_capture_seconds_bucket{axis="0",le="+Inf"} 3' in text
+    assert 'aistweet_capture_seconds_count{axis="0"} 3' in text
+
+
+def test_disabled_metrics_leave_locks_alone():
+    lock = threading.RLock()
+    assert NULL_METRICS.instrument_lock("tracker", lock) is lock
+    NULL_METRICS.histogram("capture_seconds", "Capture time").observe(1.0)
+    assert NULL_METRICS.render() == "\n"
+
+
+def test_tracker_metrics_endpoint():
+    metrics = Metrics()
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False, metrics=metrics)
+    tracker.add_message(
+        {
+            "msg_type": AISType.POS_CLASS_A1,
+            "mmsi": 316001234,
+            "lat": 42.3,
+            "lon": -83.0,
+            "speed": 5.0,
+        },
+        1.0,
+    )
+    tracker.stop()
+
+    metrics.serve(0)
+    try:
+        port = metrics.server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            text = response.read().decode()
+    finally:
+        metrics.stop()
+
+    assert "aistweet_vessels_vessels 1" in text
+    assert "aistweet_ingest_received 0" in text
+    assert "aistweet_add_message_seconds_count 1" in text
+    assert 'aistweet_lock_hold_seconds_count{lock="tracker"} 1' in text
+
+
+def test_stations_reported_separately():
+    metrics = Metrics()
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False, metrics=metrics)
+    predictor = CrossingPredictor(tracker, 90.0)
+    downstream = predictor.add_axis(90.0, (42.25, -83.1))
+    metrics.register("axis", functools.partial(predictor.axis_stats, downstream))
+    tracker.add_message(
+        {
+            "msg_type": AISType.POS_CLASS_A1,
+            "mmsi": 316001234,
+            "lat": 42.298,
+            "lon": -82.99,
+            "course": 0.0,
+            "speed": 10.0,
+        },
+        1.0,
+    )
+    crossing, _ = predictor.predict(316001234, downstream)
+    predictor.mark_scheduled(316001234, crossing, downstream)
+    tracker.stop()
+
+    text = metrics.render()
+    assert 'aistweet_prefilter_checked{station="42.3,-83.0"} 1' in text
+    assert 'aistweet_prefilter_checked{station="42.25,-83.1"} 1' in text
+    assert "aistweet_axis_schedules 1" in text
+    assert predictor.axis_stats(0)["schedules"] == 0
@@ -0,0 +1,128 @@
+import random
+
+import pytest
+from pyais.ais_types import AISType
+
+from aistweet.motion import TrackFilter
+from aistweet.replay import SyntheticTraffic
+from aistweet.ship_tracker import ShipTracker
+from aistweet.units import m_to_lat, m_to_lon
+
+
+def test_filter_smooths_noisy_track():
+    rng = random.Random(0)
+    track = None
+    for i in range(30):
+        t = 10.0 * i
+        # 10 knots due east, reported with 20 m and 5 degree errors
+        lat = 42.3 + m_to_lat(rng.gauss(0.0, 20.0))
+        lon = -83.0 + m_to_lon(51.4444 * i + rng.gauss(0.0, 20.0), 42.3)
+        course = 90.0 + rng.gauss(0.0, 5.0)
+        if track is None:
+            track = TrackFilter(t, lat, lon, 10.0, course, class_b=True)
+        else:
+            track.update(t, lat, lon, 10.0, course, class_b=True)
+
+    estimate = track.estimate()
+    assert estimate.speed == pytest.approx(10.0, abs=0.3)
+    assert estimate.course == pytest.approx(90.0, abs=2.0)
+    assert estimate.lat == pytest.approx(42.3, abs=m_to_lat(15.0))
+    assert len(track.history()) == TrackFilter.HISTORY
+    assert track.history()[-1][0] == 290.0
+    assert track.resets == 0
+
+    # a long gap restarts the track
+    track.update(1000.0, 42.3, -83.0, 10.0, 90.0)
+    assert track.resets == 1
+    assert len(track.history()) == 1
+
+
+def test_filter_velocity_from_history():
+    track = TrackFilter(0.0, 42.3, -83.0, None, None)
+    for i in range(1, 10):
+        track.update(10.0 * i, 42.3 + m_to_lat(51.4444 * i), -83.0, None, None)
+    estimate = track.estimate()
+    assert estimate.speed == pytest.approx(10.0, abs=0.5)
+    assert min(estimate.course, 360.0 - estimate.course) < 2.0
+
+    # after a gap restarts the track, the history starts over with it
+    track.update(1000.0, 42.4, -83.0, None, None)
+    track.update(1010.0, 42.4 + m_to_lat(51.4444), -83.0, None, None)
+    assert track.resets == 1
+    vx, vy = track.velocity(None, None)
+    assert vx == pytest.approx(0.0, abs=1e-6)
+    assert vy == pytest.approx(5.14444, abs=1e-3)
+
+
+def test_smoothed_crossing():
+    station = (42.3, -83.0)
+    traffic = SyntheticTraffic(
+        *station, 50, seed=1, position_noise=15.0, course_noise=5.0, class_b=True
+    )
+    tracker = ShipTracker(None, None, *station, listen=False, smoothing=True)
+    messages = traffic.messages(120.0)
+    for t, data in messages:
+        tracker.add_message(data, t)
+    tracker.stop()
+
+    checked = 0
+    for mmsi in traffic.vessels:
+        truth = traffic.crossing(mmsi, station, 0.0)
+        crossing, _ = tracker.crossing(mmsi, 0.0)
+        if truth is None or crossing is None or not 0.0 < truth - 120.0 < 60.0:
+            continue
+        sigma = tracker.crossing_uncertainty(mmsi, crossing, 0.0)
+        assert 0.0 < sigma < 10.0
+        assert crossing == pytest.approx(truth, abs=max(4.0 * sigma, 1.0))
+        checked += 1
+    assert checked
+
+    # expired positions take their tracks with them
+    tracker.expire(120.0 + tracker.position_ttl + 1.0)
+    assert not tracker.tracks and not tracker.estimates
+
+
+def test_uncertainty_without_smoothing():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    tracker.add_message(
+        {
+            "msg_type": AISType.POS_CLASS_A1,
+            "mmsi": 316000000,
+            "lat": 42.3 + m_to_lat(300.0),
+            "lon": -83.0 + m_to_lon(600.0, 42.3),
+            "course": 270.0,
+            "speed": 10.0,
+        },
+        100.0,
+    )
+    tracker.stop()
+    crossing, _ = tracker.crossing(316000000, 0.0)
+    assert crossing is not None
+    assert tracker.crossing_uncertainty(316000000, crossing, 0.0) is None
+
+
+def test_evicted_vessels_take_their_tracks():
+    tracker = ShipTracker(
+        None, None, 42.3, -83.0, listen=False, smoothing=True, capacity=2
+    )
+    expired = []
+    tracker.expiry_callbacks.append(
+        lambda mmsi, evicted: expired.append((mmsi, evicted))
+    )
+    for i, mmsi in enumerate((316000000, 316000001, 316000002)):
+        tracker.add_message(
+            {
+                "msg_type": AISType.POS_CLASS_A1,
+                "mmsi": mmsi,
+                "lat": 42.29,
+                "lon": -83.0,
+                "course": 0.0,
+                "speed": 10.0,
+            },
+            float(i),
+        )
+    assert tracker.dispatcher.drain(5.0)
+    tracker.stop()
+
+    assert set(tracker.tracks) == set(tracker.estimates) == {316000001, 316000002}
+    assert expired == [(316000000, True)]
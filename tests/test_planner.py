@@ -0,0 +1,73 @@
+from aistweet.planner import ShotPlanner
+
+
+def test_planner_merges_crossings_in_frame_together():
+    planner = ShotPlanner(busy=1.0, warmup=1.0)
+    # small vessels far out fit zoomed in, and are in frame together
+    assert planner.add(1, 100.0, 2000.0, 30.0, 5.0, 50.0)
+    assert planner.add(2, 101.0, 2000.0, 30.0, 5.0, 50.0)
+    # this one is only in a wide frame, and only around its crossing
+    assert planner.add(3, 120.0, 300.0, 250.0, 10.0, 50.0)
+
+    shots = planner.plan(60.0)
+    assert [shot.mmsis for shot in shots] == [[1, 2], [3]]
+    assert not shots[0].large and shots[1].large
+    assert shots[0].start <= 100.5 <= shots[0].end
+    assert shots[0].t == 100.5
+
+    assert planner.take(shots[0], shots[0].t)
+    assert planner.stats()["merged"] == 1
+    # shot vessels cool down before they are planned for again
+    assert not planner.add(1, 130.0, 2000.0, 30.0, 5.0, 101.0)
+    assert [shot.mmsis for shot in planner.plan(102.0)] == [[3]]
+
+
+def test_planner_moves_or_drops_conflicting_shots():
+    planner = ShotPlanner(busy=1.0, warmup=1.0)
+    # a large vessel, only in frame right as it crosses
+    planner.add(1, 100.0, 300.0, 330.0, 10.0, 0.0)
+    # another with a little slack, crossing too soon after it
+    planner.add(2, 100.8, 300.0, 312.0, 10.0, 0.0)
+    shots = planner.plan(0.0)
+    assert [shot.mmsis for shot in shots] == [[1], [2]]
+    # the tighter shot keeps its time, the other makes room
+    assert shots[0].t == 100.0
+    assert abs(shots[1].t - 101.0) < 1e-9
+
+    # another large vessel crossing in between is caught with the second one,
+    # which together outscore the first, left out for want of time
+    planner.add(3, 100.5, 300.0, 340.0, 10.0, 0.0)
+    shots = planner.plan(0.0)
+    assert [shot.mmsis for shot in shots] == [[3, 2]]
+    assert shots[0].large and shots[0].t == 100.5
+
+    # taking a shot after its vessels have left the frame fails
+    assert not planner.take(shots[0], 101.5)
+    assert planner.stats()["late"] == 1
+    assert list(planner.pending) == [1]
+
+    # crossings already past by the earliest possible shot are missed
+    assert planner.plan(101.0) == []
+    assert planner.stats()["missed"] == 1
+
+
+def test_planner_forgets_vessels_shot_long_ago():
+    planner = ShotPlanner(busy=1.0, warmup=1.0)
+
+    def shoot(mmsi, t):
+        assert planner.add(mmsi, t, 2000.0, 30.0, 5.0, t - 10.0)
+        shot = planner.plan(t - 10.0)[0]
+        assert planner.take(shot, shot.t)
+
+    shoot(1, 100.0)
+    shoot(2, 200.0)
+    # shooting a vessel again moves it to the back of the history
+    shoot(1, 40000.0)
+    shoot(3, 86500.0)
+    assert list(planner.history) == [2, 1, 3]
+    shoot(4, 90000.0)
+    assert list(planner.history) == [1, 3, 4]
+
+    # and a forgotten vessel counts as new again
+    planner.add(2, 90100.0, 2000.0, 30.0, 5.0, 90090.0)
+    assert planner.pending[2].score == 2.0 + 30.0 / ShotPlanner.FULL_LENGTH
@@ -0,0 +1,192 @@
+import asyncio
+import base64
+import http.server
+import io
+import json
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from aistweet.poster import AsyncPoster, Poster
+
+
+def fake_jwt():
+    def encode(value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b"=")
+
+    header = encode({"alg": "HS256", "typ": "JWT"})
+    payload = encode({"sub": "did:plc:test", "exp": int(time.time()) + 7200})
+    return (header + b"." + payload + b".sig").decode()
+
+
+class FakeAtprotoHandler(http.server.BaseHTTPRequestHandler):
+    """Stand-in for the handful of XRPC endpoints the poster uses."""
+
+    calls = []
+    fail_uploads = 0
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.calls.append(self.path.split("?")[0])
+        self.reply({"did": "did:plc:test", "handle": "test.bsky.social"})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        method = self.path[len("/xrpc/") :]
+        self.calls.append(method)
+        if method == "com.atproto.server.createSession":
+            self.reply(
+                {
+                    "accessJwt": fake_jwt(),
+                    "refreshJwt": fake_jwt(),
+                    "handle": "test.bsky.social",
+                    "did": "did:plc:test",
+                }
+            )
+        elif method == "com.atproto.repo.uploadBlob":
+            if FakeAtprotoHandler.fail_uploads:
+                FakeAtprotoHandler.fail_uploads -= 1
+                self.reply({"error": "InternalServerError", "message": "nope"}, 500)
+                return
+            self.reply(
+                {
+                    "blob": {
+                        "$type": "blob",
+                        "ref": {
+                            "$link": "bafkreibme22gw2h7y2h7tg2fhqotaqjucnbc24deqo72b6mkl2egezxhvy"
+                        },
+                        "mimeType": "image/jpeg",
+                        "size": 1000,
+                    }
+                }
+            )
+        elif method == "com.atproto.repo.createRecord":
+            self.reply(
+                {
+                    "uri": "at://did:plc:test/app.bsky.feed.post/1",
+                    "cid": "bafyreie5737gdxlw5i64vzichcalba3z2v5n6icifvx5xytvske7mr3hpm",
+                }
+            )
+        else:
+            self.reply({"error": "MethodNotImplemented"}, 501)
+
+
+@pytest.fixture
+def server():
+    FakeAtprotoHandler.calls = []
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeAtprotoHandler)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def capture():
+    frame = io.BytesIO()
+    Image.new("RGB", (320, 240), (40, 80, 160)).save(frame, format="JPEG")
+    frame.seek(0)
+    return frame
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_poster_reuses_session(server, tmp_path):
+    poster = Poster("user", "pass", str(tmp_path / "spool"), base_url=server)
+    for _ in range(2):
+        poster.submit(316001234, capture(), "Ship TEST", "TEST", [])
+    assert wait_for(lambda: poster.posted == 2)
+    poster.stop()
+
+    assert FakeAtprotoHandler.calls.count("com.atproto.server.createSession") == 1
+    assert FakeAtprotoHandler.calls.count("com.atproto.repo.createRecord") == 2
+    assert poster.pending() == 0
+
+
+def test_poster_retries_and_survives_restart(server, tmp_path, monkeypatch):
+    spool_dir = str(tmp_path / "spool")
+    FakeAtprotoHandler.fail_uploads = 1
+
+    # the first upload fails, leaving the compressed post in the spool
+    poster = Poster("user", "pass", spool_dir, base_url=server)
+    poster.submit(316001234, capture(), "Ship TEST", "TEST", [])
+    assert wait_for(lambda: FakeAtprotoHandler.fail_uploads == 0)
+    poster.stop()
+    assert len(list((tmp_path / "spool").glob("*.jpg"))) == 1
+
+    # a fresh poster picks the spooled post up and retries it
+    poster = Poster("user", "pass", spool_dir, base_url=server)
+    assert poster.pending() == 1
+    assert wait_for(lambda: poster.posted == 1)
+    poster.stop()
+    assert FakeAtprotoHandler.calls.count("com.atproto.repo.uploadBlob") == 2
+    assert poster.pending() == 0
+    assert not list((tmp_path / "spool").iterdir())
+
+
+def test_async_poster(server, tmp_path):
+    FakeAtprotoHandler.fail_uploads = 1
+
+    async def post():
+        poster = AsyncPoster("user", "pass", str(tmp_path / "spool"), base_url=server)
+        poster.submit(316001234, capture(), "Ship TEST", "TEST", [])
+        poster.submit(316005678, capture(), "Ship TEST", "TEST", [])
+        # the failed upload is retried after two seconds
+        for _ in range(1000):
+            if poster.posted == 2:
+                break
+            await asyncio.sleep(0.01)
+        await poster.stop()
+        return poster
+
+    poster = asyncio.run(post())
+    assert poster.posted == 2 and poster.errors == 1
+    assert FakeAtprotoHandler.calls.count("com.atproto.server.createSession") == 1
+    assert FakeAtprotoHandler.calls.count("com.atproto.repo.createRecord") == 2
+    assert poster.pending() == 0
+
+
+def test_poster_spools_posts_on_stop(server, tmp_path):
+    spool_dir = str(tmp_path / "spool")
+    poster = Poster("user", "pass", spool_dir, base_url=server)
+    writers = set()
+
+    def save(*args, **kwargs):
+        writers.add(threading.current_thread())
+        Poster.save(poster, *args, **kwargs)
+
+    poster.save = save
+    for _ in range(4):
+        poster.submit(316001234, capture(), "Ship TEST", "TEST", [])
+    # stopped with posts still queued, and frames not yet compressed
+    poster.stop()
+    posted = poster.posted
+    assert poster.pending() == 4 - posted
+    # only compressed images are spooled, and never by the caller of submit
+    assert threading.current_thread() not in writers
+    for path in (tmp_path / "spool").glob("*.jpg"):
+        assert path.read_bytes() == poster.encoded[path.stem]
+
+    poster = Poster("user", "pass", spool_dir, base_url=server)
+    assert poster.pending() == 4 - posted
+    assert wait_for(lambda: poster.posted == 4 - posted)
+    poster.stop()
+    assert FakeAtprotoHandler.calls.count("com.atproto.repo.createRecord") == 4
+    assert not list((tmp_path / "spool").iterdir())
@@ -0,0 +1,88 @@
+import random
+
+from pyais.ais_types import AISType
+
+from aistweet.predictor import CrossingPredictor
+from aistweet.ship_tracker import ShipTracker
+from aistweet.units import m_to_lat
+
+
+def report(tracker, lat, t, course=0.0, speed=10.0):
+    tracker.add_message(
+        {
+            "msg_type": AISType.POS_CLASS_A1,
+            "mmsi": 316001234,
+            "lat": lat,
+            "lon": -82.99,
+            "heading": int(course),
+            "course": course,
+            "speed": speed,
+        },
+        t,
+    )
+
+
+def test_predictor_reuses_consistent_reports():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    predictor = CrossingPredictor(tracker, 90.0)
+
+    # heading north at 10 kn towards an easterly camera axis
+    report(tracker, 42.298, 0.0)
+    crossing, _ = predictor.predict(316001234)
+    assert predictor.needs_reschedule(316001234, crossing)
+    predictor.mark_scheduled(316001234, crossing)
+
+    # exactly where dead reckoning puts it ten seconds later
+    report(tracker, 42.298 + m_to_lat(10.0 * 5.14444444), 10.0)
+    assert predictor.predict(316001234)[0] == crossing
+    assert not predictor.needs_reschedule(316001234, crossing)
+
+    # a turn forces a fresh prediction
+    report(tracker, 42.298 + m_to_lat(20.0 * 5.14444444), 20.0, course=20.0)
+    assert predictor.predict(316001234)[0] != crossing
+    tracker.stop()
+
+    assert predictor.stats() == {
+        "computed": 2,
+        "reused": 1,
+        "schedules": 1,
+        "avoided_reschedules": 1,
+    }
+
+
+def test_predictor_evaluates_axes_together():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    predictor = CrossingPredictor(tracker)
+    east = predictor.add_axis(90.0)
+    upstream = predictor.add_axis(90.0, (42.301, -83.01))
+
+    report(tracker, 42.298, 0.0)
+    crossing, _ = predictor.predict(316001234, east)
+    other, _ = predictor.predict(316001234, upstream)
+    tracker.stop()
+
+    assert crossing == tracker.crossing(316001234, 90.0)[0]
+    assert other == tracker.crossing(316001234, 90.0, (42.301, -83.01))[0]
+    # the vessel reaches the upstream camera's axis later
+    assert other > crossing
+    assert predictor.stats()["computed"] == 1
+
+
+def test_predictor_reuses_noisy_reports():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    predictor = CrossingPredictor(tracker, 90.0)
+    rng = random.Random(0)
+
+    # heading north at 10 kn, with the position error of a Class A report
+    for i in range(15):
+        t = 2.0 * i
+        report(tracker, 42.298 + m_to_lat(10.28889 * i + rng.gauss(0.0, 10.0)), t)
+        predictor.predict(316001234)
+    assert predictor.stats()["computed"] == 1
+    assert predictor.stats()["reused"] == 14
+
+    # but a report well away from where the vessel should be is not
+    report(tracker, 42.298 + m_to_lat(10.28889 * 15 + 60.0), 30.0)
+    predictor.predict(316001234)
+    tracker.stop()
+    assert predictor.stats()["computed"] == 2
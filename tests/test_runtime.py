@@ -0,0 +1,41 @@
+import asyncio
+import socket
+
+from pyais.encode import encode_dict
+
+from aistweet.runtime import AsyncRuntime
+from aistweet.ship_tracker import ShipTracker
+
+
+def test_async_runtime_ingests_and_delivers():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    async def run():
+        tracker = ShipTracker(
+            "127.0.0.1", port, 42.3, -83.0, aging=False, threaded=False
+        )
+        runtime = AsyncRuntime(tracker)
+        runtime.start()
+        received = []
+        tracker.subscribe(lambda mmsi, t: received.append(mmsi), coalesce=False)
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for mmsi in (316001234, 316005678):
+            data = {"msg_type": 1, "mmsi": mmsi, "lat": 42.3, "lon": -83.0}
+            sender.sendto(encode_dict(data)[0].encode(), ("127.0.0.1", port))
+        sender.close()
+        for _ in range(500):
+            if len(received) == 2:
+                break
+            await asyncio.sleep(0.01)
+        runtime.stop()
+        return tracker, received
+
+    tracker, received = asyncio.run(run())
+    assert received == [316001234, 316005678]
+    assert tracker[316005678]["lat"] == 42.3
+    # everything ran on the loop
+    assert not tracker.pipeline.threads and not tracker.dispatcher.threads
@@ -0,0 +1,133 @@
+import random
+
+import pytest
+from pyais.ais_types import AISType
+
+from aistweet.ship_tracker import ShipTracker
+from aistweet.units import m_to_lat, m_to_lon
+
+
+def test_crossings_matches_crossing():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    for i, (course, speed) in enumerate(((300.0, 8.0), (120.0, 0.0), (200.0, 12.0))):
+        tracker.add_message(
+            {
+                "msg_type": AISType.POS_CLASS_A1,
+                "mmsi": 316000000 + i,
+                "lat": 42.3 + m_to_lat(300.0),
+                "lon": -83.0 + m_to_lon(600.0, 42.3),
+                "heading": int(course),
+                "course": course,
+                "speed": speed,
+            },
+            100.0,
+        )
+    tracker.stop()
+
+    crossings = tracker.crossings(45.0)
+    assert set(crossings) == {316000000, 316000002}
+    for mmsi, (crossing, depth) in crossings.items():
+        expected_crossing, expected_depth = tracker.crossing(mmsi, 45.0)
+        assert crossing - 100.0 == pytest.approx(expected_crossing - 100.0, rel=5e-3)
+        assert depth == pytest.approx(expected_depth, rel=5e-3)
+
+
+def test_crossings_matches_crossing_when_smoothed():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False, smoothing=True)
+    rng = random.Random(0)
+    for i, (north, east, course) in enumerate(
+        (
+            (-300.0, 600.0, 0.0),
+            (400.0, -500.0, 170.0),
+            # out of range, though it would reach the axis in time
+            (-300.0, 30000.0, 0.0),
+        )
+    ):
+        for j in range(5):
+            tracker.add_message(
+                {
+                    "msg_type": AISType.POS_CLASS_A1,
+                    "mmsi": 316000000 + i,
+                    "lat": 42.3 + m_to_lat(north + rng.gauss(0.0, 20.0)),
+                    "lon": -83.0 + m_to_lon(east + rng.gauss(0.0, 20.0), 42.3),
+                    "heading": int(course),
+                    "course": course + rng.gauss(0.0, 3.0),
+                    "speed": 8.0,
+                },
+                100.0 + j,
+            )
+    tracker.stop()
+
+    crossings = tracker.crossings(90.0)
+    assert set(crossings) == {316000000, 316000001}
+    for mmsi in range(316000000, 316000003):
+        crossing, depth = tracker.crossing(mmsi, 90.0)
+        if mmsi not in crossings:
+            assert crossing is None
+            continue
+        assert crossings[mmsi][0] - 100.0 == pytest.approx(crossing - 100.0, rel=5e-3)
+        assert crossings[mmsi][1] == pytest.approx(depth, rel=5e-3)
+
+
+def test_crossing_prefilter():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    for i, (lat, lon, course) in enumerate(
+        (
+            # nearby and heading for the axis
+            (42.3 + m_to_lat(2000.0), -83.0 + m_to_lon(100.0, 42.3), 270.0),
+            # heading away from the axis
+            (42.3 + m_to_lat(2000.0), -83.0 + m_to_lon(1000.0, 42.3), 90.0),
+            # too far away
+            (42.3 + m_to_lat(50000.0), -83.0 + m_to_lon(1000.0, 42.3), 270.0),
+        )
+    ):
+        tracker.add_message(
+            {
+                "msg_type": AISType.POS_CLASS_A1,
+                "mmsi": 316000000 + i,
+                "lat": lat,
+                "lon": lon,
+                "course": course,
+                "speed": 10.0,
+            },
+            100.0,
+        )
+    tracker.stop()
+
+    assert tracker.crossing(316000000, 0.0)[0] is not None
+    assert tracker.crossing(316000001, 0.0) == (None, None)
+    assert tracker.crossing(316000002, 0.0) == (None, None)
+    assert tracker.prefilter.stats()["hit_rate"] == pytest.approx(2.0 / 3.0)
+
+
+def test_expiry_forgets_stale_positions_and_vessels():
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False, position_ttl=60.0)
+    tracker.ships.max_age = 300.0
+    expired = []
+    tracker.expiry_callbacks.append(
+        lambda mmsi, evicted: expired.append((mmsi, evicted))
+    )
+    for mmsi, t in ((316000000, 0.0), (316000001, 50.0)):
+        tracker.add_message(
+            {
+                "msg_type": AISType.POS_CLASS_A1,
+                "mmsi": mmsi,
+                "lat": 42.29,
+                "lon": -83.0,
+                "heading": 0,
+                "course": 0.0,
+                "speed": 10.0,
+            },
+            t,
+        )
+
+    tracker.expire(100.0)
+    assert expired == [(316000000, False)]
+    assert tracker[316000000]["lat"] is None
+    assert tracker.crossing(316000000, 90.0) == (None, None)
+    assert tracker[316000001]["lat"] == 42.29
+
+    tracker.expire(400.0)
+    tracker.stop()
+    assert expired[1:] == [(316000001, False), (316000000, True), (316000001, True)]
+    assert 316000000 not in tracker.ships
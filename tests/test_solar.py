@@ -0,0 +1,53 @@
+import datetime
+import json
+
+import pytz
+
+from aistweet import solar
+from aistweet.solar import SolarService
+
+
+def test_timezone_resolved_once(tmp_path, monkeypatch):
+    cache_file = str(tmp_path / "timezone.json")
+    service = SolarService(40.7, -74.0, cache_file)
+    assert service.timezone == "America/New_York"
+    # a second station shares the cache file without displacing the first
+    assert SolarService(41.9, -87.6, cache_file).timezone == "America/Chicago"
+    with open(cache_file) as f:
+        assert json.load(f)["stations"] == {
+            "40.7,-74.0": "America/New_York",
+            "41.9,-87.6": "America/Chicago",
+        }
+
+    # later runs read the zones back without looking them up
+    def fail(lat, lon):
+        raise AssertionError("time zone looked up again")
+
+    monkeypatch.setattr(solar, "find_timezone", fail)
+    assert SolarService(40.7, -74.0, cache_file).timezone == "America/New_York"
+    assert SolarService(41.9, -87.6, cache_file).timezone == "America/Chicago"
+
+
+def test_is_night():
+    service = SolarService(40.7, -74.0, timezone="America/New_York")
+    tz = pytz.timezone("America/New_York")
+
+    def at(hour):
+        return tz.localize(datetime.datetime(2024, 6, 21, hour)).timestamp()
+
+    assert service.is_night(at(2))
+    assert not service.is_night(at(12))
+    assert service.is_night(at(23))
+    assert service.is_night(at(2) + 86400.0)
+    assert len(service.phases) == 2
+
+
+def test_polar_day_and_night():
+    service = SolarService(78.2, 15.6, timezone="Arctic/Longyearbyen")
+    tz = pytz.timezone("Arctic/Longyearbyen")
+    assert not service.is_night(
+        tz.localize(datetime.datetime(2024, 6, 21, 0)).timestamp()
+    )
+    assert service.is_night(
+        tz.localize(datetime.datetime(2024, 12, 21, 12)).timestamp()
+    )
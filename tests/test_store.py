@@ -0,0 +1,19 @@
+from aistweet.ship_tracker import ShipTracker
+from aistweet.store import StaticStore
+
+
+def test_static_store_round_trip(tmp_path):
+    db_file = str(tmp_path / "ships.db")
+    fields = ShipTracker.STATIC_FIELDS
+
+    store = StaticStore(db_file, fields, flush_threshold=1000)
+    store.put(316001234, {**fields, "shipname": "FIRST"})
+    store.put(316001234, {**fields, "shipname": "SECOND"})
+    assert store.stats()["pending"] == 1
+    store.close()
+    assert store.rows_written == 1
+
+    store = StaticStore(db_file, fields)
+    assert store.get(316001234)["shipname"] == "SECOND"
+    assert store.get(316005678) is None
+    store.close()
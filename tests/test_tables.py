@@ -0,0 +1,8 @@
+from aistweet import tables
+
+
+def test_tables_match_csv():
+    # a stale table means `python -m aistweet.tables` was not rerun
+    assert tables.MID == tables.read_csv("mid")
+    assert tables.SHIPTYPE == tables.read_csv("shiptype")
+    assert tables.STATUS == tables.read_csv("status")
@@ -0,0 +1,131 @@
+import time
+
+import pytest
+from pyais.ais_types import AISType
+
+from aistweet.ship_tracker import ShipTracker
+from aistweet.tweeter import Tweeter
+from aistweet.units import m_to_lat, m_to_lon
+
+
+class FakePoster(object):
+    def __init__(self):
+        self.posts = []
+
+    def submit(self, mmsi, frame, text, alt, facets):
+        self.posts.append((mmsi, text, alt, facets))
+
+    def stop(self):
+        pass
+
+
+def report(tracker, mmsi, north, east, t, speed=10.0, course=0.0, **static):
+    tracker.add_message(
+        {
+            "msg_type": AISType.POS_CLASS_A1,
+            "mmsi": mmsi,
+            "lat": 42.3 + m_to_lat(north),
+            "lon": -83.0 + m_to_lon(east, 42.3),
+            "heading": int(course),
+            "course": course,
+            "speed": speed,
+        },
+        t,
+    )
+    if static:
+        tracker.add_message({"msg_type": AISType.STATIC, "mmsi": mmsi, **static}, t)
+
+
+@pytest.fixture
+def tweeter(tmp_path):
+    tracker = ShipTracker(None, None, 42.3, -83.0, listen=False)
+    tweeter = Tweeter(
+        tracker,
+        90.0,
+        logging=False,
+        fake_camera=True,
+        timezone="America/Detroit",
+        timezone_cache=str(tmp_path / "timezone.json"),
+        poster=FakePoster(),
+    )
+    yield tweeter
+    # the scheduler's thread would otherwise outlive a failed test
+    tweeter.stop()
+    tweeter.tracker.stop()
+
+
+def test_check_plans_and_expire_drops_shots(tweeter):
+    tracker = tweeter.tracker
+
+    # heading north at 10 kn, 20 seconds short of the easterly axis
+    now = time.time()
+    report(tracker, 316001234, -20.0 * 5.14444444, 500.0, now)
+    tweeter.check(316001234, now)
+    event, shot = tweeter.next_shot
+    assert shot.mmsis == [316001234]
+    assert abs(shot.t - (now + 20.0)) < 1.0
+    # a second report that agrees with the first leaves the plan alone
+    tweeter.check(316001234, now)
+    assert tweeter.next_shot[0] is event
+
+    tweeter.expire(316001234, False)
+    assert tweeter.next_shot is None
+    assert tweeter.planner.stats()["pending"] == 0
+
+
+def test_begin_shot_keeps_camera_mode_until_captured(tweeter):
+    tracker = tweeter.tracker
+    now = time.time()
+    for mmsi in (316000001, 316000002):
+        report(tracker, mmsi, 0.0, 0.0, now, speed=0.0, shipname=f"TEST {mmsi}")
+
+    # a long vessel close by, needing a wide shot, and then a small one
+    # further out, which fits zoomed in
+    tweeter.planner.add(316000001, now + 5.0, 100.0, 100.0, 5.0, now)
+    tweeter.planner.add(316000002, now + 20.0, 1000.0, 20.0, 5.0, now)
+    tweeter.replan()
+    first = tweeter.next_shot[1]
+    assert first.large and first.mmsis == [316000001]
+    wide = tweeter.camera.mode
+
+    assert tweeter.begin_shot(first)
+    second = tweeter.next_shot[1]
+    assert not second.large and second.mmsis == [316000002]
+    # the camera is not switched out from under the shot about to be taken
+    assert tweeter.camera.mode == wide
+    frame = tweeter.capture(first)
+    assert tweeter.camera.stats()["switches"] == 1
+    assert tweeter.submit_shot(first, frame)
+    assert tweeter.camera.mode == tweeter.camera_mode(False)
+    assert tweeter.poster.posts[0][0] == 316000001
+
+    # a shot that was replanned away is not taken
+    assert not tweeter.begin_shot(first)
+
+
+def test_post_text_links_each_name(tweeter):
+    tracker = tweeter.tracker
+    now = time.time()
+    report(tracker, 316000001, 0.0, 0.0, now, shipname="ALGOMA SPIRIT")
+    tracker.add_message(
+        {
+            "msg_type": AISType.STATIC_AND_VOYAGE,
+            "mmsi": 316000001,
+            "shipname": "ALGOMA SPIRIT",
+            "imo": 9117569,
+            "destination": "DETROIT",
+            "draught": 8.0,
+        },
+        now,
+    )
+    # named after the first vessel's destination, which comes before it
+    report(tracker, 316000002, 0.0, 0.0, now, shipname="DETROIT")
+
+    text, facets = tweeter.post_text([316000001, 316000002])
+    data = text.encode()
+    names = [
+        data[f["index"]["byteStart"] : f["index"]["byteEnd"]].decode() for f in facets
+    ]
+    assert names == ["ALGOMA SPIRIT", "DETROIT"]
+    assert facets[1]["index"]["byteEnd"] == len(data)
+    assert facets[1]["features"][0]["uri"].endswith("/316000002")
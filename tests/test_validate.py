@@ -0,0 +1,61 @@
+import io
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from aistweet.validate import FrameValidator
+
+MODE = ((0.0, 0.0, 1.0, 1.0), (640, 480), 30, "auto")
+
+
+def scene(ship=False, level=0.0, blur=0.0, dark=False):
+    """A JPEG of textured water under the sky, with a ship if asked for."""
+    rng = np.random.default_rng(0)
+    pixels = np.empty((480, 640, 3), dtype=np.float32)
+    pixels[:240] = (120, 170, 220)
+    pixels[240:] = (30, 70, 100)
+    pixels[240:] += rng.normal(0.0, 12.0, (240, 640, 1))
+    if ship:
+        pixels[200:240, 200:440] = (160, 40, 30)
+    if dark:
+        pixels *= 0.02
+    pixels = np.clip(pixels + level, 0, 255).astype(np.uint8)
+    image = Image.fromarray(pixels)
+    if blur:
+        image = image.filter(ImageFilter.GaussianBlur(blur))
+    frame = io.BytesIO()
+    image.save(frame, format="JPEG", quality=90)
+    frame.seek(0)
+    return frame
+
+
+def test_validator_rejects_unusable_frames():
+    validator = FrameValidator()
+    # without a background, any well exposed frame in focus passes
+    assert validator.check(scene(), MODE) is None
+    assert validator.check(scene(dark=True), MODE) == "brightness"
+    assert validator.check(scene(blur=16.0), MODE) == "sharpness"
+
+    validator.update_background(scene(), MODE)
+    validator.update_background(scene(level=10.0), MODE)
+    assert validator.check(scene(ship=True), MODE) is None
+    # a change of exposure alone shows no vessel
+    assert validator.check(scene(level=25.0), MODE) == "difference"
+    # a mode without a background of its own cannot be told apart
+    assert validator.check(scene(), MODE[:3] + ("night",)) is None
+
+    stats = validator.stats()
+    assert stats["passed"] == 3 and stats["backgrounds"] == 1
+    assert stats["rejected_brightness"] == 1
+    assert stats["rejected_sharpness"] == 1
+    assert stats["rejected_difference"] == 1
+
+
+def test_validator_leaves_frame_readable():
+    validator = FrameValidator()
+    frame = scene(ship=True)
+    frame.seek(100)
+    validator.check(frame, MODE)
+    assert frame.tell() == 0
+    with Image.open(frame) as image:
+        assert image.size == (640, 480)
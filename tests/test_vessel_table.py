@@ -0,0 +1,80 @@
+from aistweet.ship_tracker import ShipTracker
+from aistweet.vessel_table import VesselTable
+
+DEFAULTS = {
+    **ShipTracker.STATIC_FIELDS,
+    **ShipTracker.VOYAGE_FIELDS,
+    **ShipTracker.POSITION_FIELDS,
+    "last_update": None,
+}
+
+
+def test_vessel_record_defaults_and_writes():
+    table = VesselTable(DEFAULTS)
+    ship = table.add(316001234, 0.0)
+    assert ship["shipname"] == "(Unidentified)"
+    assert ship["lat"] is None and ship["shiptype"] is None
+    ship["lat"] = 42.3
+    ship["heading"] = 90
+    assert table[316001234]["lat"] == 42.3
+    assert table[316001234]["heading"] == 90
+    ship["heading"] = None
+    assert table[316001234]["heading"] is None
+
+
+def test_vessel_table_recycles_rows():
+    table = VesselTable(DEFAULTS, capacity=2, max_age=100.0)
+    table.add(1, 0.0)
+    table.add(2, 50.0)
+    table.touch(1, 60.0)
+    # at capacity: the least recently heard vessel (2) makes way
+    assert table.evict(70.0) == [2]
+    table.add(3, 70.0)
+    assert 2 not in table and 1 in table and 3 in table
+    # vessel 1 has not been heard from in over max_age
+    assert table.evict(165.0) == [1]
+    table.add(4, 165.0)
+    assert 1 not in table
+    assert table.stats() == {
+        "vessels": 2,
+        "rows": 2,
+        "free": 0,
+        "evicted": 2,
+        "expired": 0,
+    }
+
+
+def test_snapshots_are_published_copies():
+    table = VesselTable(DEFAULTS)
+    ship = table.add(316001234, 0.0)
+    ship["lat"] = 42.3
+    table.publish(316001234)
+    snapshot = table.snapshot(316001234)
+
+    # later writes stay invisible until published again
+    ship["lat"] = 42.4
+    ship["shipname"] = "TEST"
+    assert snapshot["lat"] == 42.3
+    assert table.snapshot(316001234) is snapshot
+    table.publish(316001234)
+    assert snapshot["lat"] == 42.3
+    assert table.snapshot(316001234)["lat"] == 42.4
+    assert table.snapshot(316001234)["shipname"] == "TEST"
+    assert table.snapshot(316001234)["heading"] is None
+
+    del table[316001234]
+    assert 316001234 not in table.snapshots
+
+
+def test_positions_expire_in_order():
+    table = VesselTable(DEFAULTS)
+    for mmsi, t in ((1, 0.0), (2, 10.0), (3, 20.0)):
+        ship = table.add(mmsi, t)
+        ship["lat"], ship["lon"] = 42.3, -83.0
+        table.position_reported(mmsi, t)
+    table.position_reported(1, 30.0)
+
+    assert table.expire_positions(45.0, 30.0, ("lat", "lon")) == [2]
+    assert table[2]["lat"] is None and table[1]["lat"] == 42.3
+    assert table.expire_positions(70.0, 30.0, ("lat", "lon")) == [3, 1]
+    assert table.expire_positions(100.0, 30.0, ("lat", "lon")) == []